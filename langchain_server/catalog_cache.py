@@ -0,0 +1,217 @@
+from typing import Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+from collections import deque
+from product_client import Product, logger
+from product_index import content_key
+import asyncio
+import time
+
+
+class CatalogDiff:
+    """Ids of the products added, changed and removed by a catalog refresh"""
+
+    __slots__ = ("added", "changed", "removed")
+
+    def __init__(self, added: List[str], changed: List[str], removed: List[str]):
+        self.added = added
+        self.changed = changed
+        self.removed = removed
+
+    def __bool__(self):
+        return bool(self.added or self.changed or self.removed)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "added": len(self.added),
+            "changed": len(self.changed),
+            "removed": len(self.removed),
+        }
+
+    @classmethod
+    def between(cls, old: Dict[str, int], new: Dict[str, int]) -> "CatalogDiff":
+        """Diff two ``{product id: content key}`` maps"""
+        added, changed = [], []
+        for pid, key in new.items():
+            previous = old.get(pid)
+            if previous is None:
+                added.append(pid)
+            elif previous != key:
+                changed.append(pid)
+        removed = [pid for pid in old if pid not in new]
+        return cls(added, changed, removed)
+
+    @classmethod
+    def combine(cls, diffs: List["CatalogDiff"], current: Dict[str, int]) -> "CatalogDiff":
+        """One diff spanning consecutive ``diffs``, given the content keys
+        of the catalog they lead to"""
+        if len(diffs) == 1:
+            return diffs[0]
+        # Whether each product touched along the way existed before the first diff
+        existed: Dict[str, bool] = {}
+        for diff in diffs:
+            for pid in diff.added:
+                existed.setdefault(pid, False)
+            for pid in diff.changed + diff.removed:
+                existed.setdefault(pid, True)
+        added, changed, removed = [], [], []
+        for pid, before in existed.items():
+            if pid in current:
+                (changed if before else added).append(pid)
+            elif before:
+                removed.append(pid)
+        return cls(added, changed, removed)
+
+
+class CatalogCache:
+    """In-process product catalog cache with a TTL and stale-while-revalidate.
+
+    Fresh reads are served from memory. Once the TTL expires, readers keep
+    getting the stale copy while a single background refresh runs. Concurrent
+    misses on a cold cache share one fetch.
+
+    A downloaded catalog only becomes a new ``version`` when the content
+    key of some product differs; ``last_diff`` lists which ones did, and
+    ``diff_since()`` what changed since an earlier version, so consumers of
+    the catalog only revisit those products.
+    """
+
+    # Diffs of the most recent versions kept for ``diff_since()``
+    history = 16
+
+    def __init__(self, fetch: Callable[[], Awaitable[List[Product]]], ttl: float = 60.0):
+        self.fetch = fetch
+        self.ttl = ttl
+        self.products: Optional[List[Product]] = None
+        self.version = 0
+        self.fetched_at = 0.0
+        # The last refresh failed, so the catalog may be out of date
+        self.failing = False
+        # Content key and product per id of the current catalog
+        self.keys: Dict[str, int] = {}
+        self.by_id: Dict[str, Product] = {}
+        self.last_diff: Optional[CatalogDiff] = None
+        self._diffs: Deque[Tuple[int, CatalogDiff]] = deque(maxlen=self.history)
+        self._refresh_task: Optional[asyncio.Task] = None
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.refresh_failures = 0
+        self.unchanged = 0
+
+    def is_fresh(self) -> bool:
+        return (
+            self.products is not None
+            and time.monotonic() - self.fetched_at < self.ttl
+        )
+
+    async def get(self) -> List[Product]:
+        """Return the cached catalog, fetching or revalidating as needed"""
+        if self.products is None:
+            self.misses += 1
+            return await self.refresh()
+
+        if self.is_fresh():
+            self.hits += 1
+        else:
+            self.stale_hits += 1
+            self._start_refresh()
+        return self.products
+
+    async def refresh(self) -> List[Product]:
+        """Fetch the catalog now, joining a refresh that is already running"""
+        # Shield so a cancelled caller does not cancel the shared fetch
+        return await asyncio.shield(self._start_refresh())
+
+    def diff_since(self, version: Optional[int]) -> Optional[CatalogDiff]:
+        """What changed between an earlier version and the current one, or
+        None when that is no longer known (a full pass is needed)"""
+        if version is None:
+            return None
+        if version == self.version:
+            return CatalogDiff([], [], [])
+        diffs = [diff for v, diff in self._diffs if v > version]
+        if len(diffs) != self.version - version:
+            return None
+        return CatalogDiff.combine(diffs, self.keys)
+
+    def invalidate(self):
+        """Mark the cached catalog as expired so the next read revalidates it"""
+        logger.info("Product catalog cache invalidated")
+        self.fetched_at = 0.0
+
+    async def close(self):
+        """Cancel a background refresh that is still running"""
+        if self._refresh_task is not None and not self._refresh_task.done():
+            self._refresh_task.cancel()
+            try:
+                await self._refresh_task
+            except asyncio.CancelledError:
+                pass
+
+    def stats(self) -> Dict:
+        return {
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "refreshes": self.refreshes,
+            "refresh_failures": self.refresh_failures,
+            "unchanged_downloads": self.unchanged,
+            "version": self.version,
+            "size": len(self.products or []),
+            "failing": self.failing,
+            "last_change": self.last_diff.stats() if self.last_diff else {},
+        }
+
+    def _diff(
+        self, products: List[Product]
+    ) -> Tuple[Dict[str, int], Dict[str, Product], CatalogDiff]:
+        keys = {p.id: content_key(p) for p in products}
+        by_id = {p.id: p for p in products}
+        return keys, by_id, CatalogDiff.between(self.keys, keys)
+
+    def _start_refresh(self) -> asyncio.Task:
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(self._refresh())
+        return self._refresh_task
+
+    async def _refresh(self) -> List[Product]:
+        self.refreshes += 1
+        try:
+            products = await self.fetch()
+        except Exception as e:
+            logger.error("Error refreshing product catalog: %s", e, exc_info=True)
+            products = []
+
+        # ProductClient reports failures as an empty list; keep the last good copy
+        if not products:
+            self.refresh_failures += 1
+            self.failing = True
+            return self.products or []
+
+        self.fetched_at = time.monotonic()
+        self.failing = False
+        # A 304 from the backend hands back the very same list
+        if products is self.products:
+            logger.info("Product catalog cache revalidated, catalog unchanged")
+            return products
+
+        # A full download may still carry the same content. Keying a large
+        # catalog is CPU work, so it runs in a worker thread.
+        keys, by_id, diff = await asyncio.to_thread(self._diff, products)
+        self.products = products
+        self.keys = keys
+        self.by_id = by_id
+        if not diff and self.version:
+            self.unchanged += 1
+            logger.info("Product catalog downloaded, content unchanged")
+            return products
+
+        self.version += 1
+        self.last_diff = diff
+        self._diffs.append((self.version, diff))
+        logger.info(
+            "Product catalog cache refreshed with %d products",
+            len(products),
+            extra=dict(diff.stats(), version=self.version),
+        )
+        return products
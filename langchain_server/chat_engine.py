@@ -1,23 +1,77 @@
-from typing import List, Dict
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
 from langchain_openai import ChatOpenAI
-from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import (
+    AIMessage,
+    AIMessageChunk,
+    HumanMessage,
+    SystemMessage,
+    ToolMessage,
+)
+from langchain_core.runnables import RunnableConfig
 from langgraph.graph import MessagesState, StateGraph
 from langgraph.prebuilt import ToolNode, tools_condition
 from langgraph.graph import START, END
 from inventory import InventoryManager
-import asyncio
+from session_store import create_session_store
+from context_window import (
+    ContextBuilder,
+    PromptSizeHistogram,
+    count_tokens,
+    message_tokens,
+)
+from response_cache import ResponseCache
+from concurrency import LLMLimiter, OverloadedError, SessionLocks
+from metrics import metrics
+from product_client import logger
+import os
+import time
+import uuid
 
 
 class ChatEngine:
-    def __init__(self):
+    def __init__(self, llm: Optional[BaseChatModel] = None):
         self.inventory_manager = InventoryManager()
-        self.tools = [self.get_product_list]  # Use instance method
-        self.llm = ChatOpenAI(model="gpt-3.5-turbo", temperature=0.7)
+        self.tools = [  # Use instance methods
+            self.search_products,
+            self.semantic_search_products,
+            self.filter_products,
+            self.get_product,
+            self.get_product_list,
+        ]
+        self.llm = llm or ChatOpenAI(model="gpt-3.5-turbo", temperature=0.7)
         self.llm_with_tools = self.llm.bind_tools(self.tools)
-        self.conversations: Dict[str, List[HumanMessage]] = {}
+        self.conversations = create_session_store()
+        self.context = ContextBuilder(
+            budget_tokens=int(os.getenv("CONTEXT_TOKEN_BUDGET", "2000")),
+            summary_tokens=int(os.getenv("CONTEXT_SUMMARY_TOKENS", "200")),
+        )
+        self.prompt_sizes = PromptSizeHistogram()
+        self.responses = ResponseCache(
+            max_entries=int(os.getenv("RESPONSE_CACHE_SIZE", "1000")),
+            ttl=float(os.getenv("RESPONSE_CACHE_TTL", "300")),
+            similarity=float(os.getenv("RESPONSE_CACHE_SIMILARITY", "0")),
+            embeddings=self.inventory_manager.semantic_index.embeddings,
+        )
+        self.fast_path = os.getenv("FAST_PATH_ANSWERS", "true").lower() == "true"
+        self.session_locks = SessionLocks(
+            max_pending=int(os.getenv("SESSION_MAX_PENDING", "4"))
+        )
+        self.llm_limiter = LLMLimiter(
+            max_concurrent=int(os.getenv("LLM_MAX_CONCURRENCY", "8")),
+            max_queue=int(os.getenv("LLM_MAX_QUEUE", "32")),
+            queue_timeout=float(os.getenv("LLM_QUEUE_TIMEOUT", "10")),
+            rate=float(os.getenv("LLM_RATE_LIMIT", "0")),
+            burst=int(os.getenv("LLM_RATE_BURST", "8")),
+        )
         self.system_message = SystemMessage(
             content="""You are AIda, a friendly AI assistant managing our computer inventory system.
-    First, ALWAYS get the product list using the get_product_list tool to ensure you have the latest information.
+    First, ALWAYS look up the products you need with your tools to ensure you have the latest information:
+    use search_products for products or features named by the user, semantic_search_products for
+    vague needs or use cases, filter_products for categories, price ranges, availability and counts,
+    and get_product for the details of a product ID.
+    Only use get_product_list when the user asks about the whole catalog.
     Then, based on the user's question:
 
     1. For counting: Simply state the number of computers available
@@ -38,21 +92,82 @@ Remember:
         )
         self.graph = self._create_graph()
 
-    def get_product_list(self) -> str:
-        """Wrapper for async get_product_list"""
-        return asyncio.run(self.inventory_manager.get_product_list())
+    async def start(self):
+        """Open resources that live for the whole server lifetime"""
+        await self.inventory_manager.start()
+        await self.conversations.start()
+
+    async def close(self):
+        """Release resources opened by start()"""
+        await self.conversations.close()
+        await self.inventory_manager.close()
+
+    async def get_product_list(self) -> str:
+        """Get the full list of available products with all their details"""
+        return await self.inventory_manager.get_product_list()
+
+    async def search_products(
+        self,
+        query: str,
+        category: Optional[str] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        in_stock: bool = False,
+    ) -> str:
+        """Search products by keywords in their name, brand, model, description and
+        specs (e.g. "MacBook", "laptop RTX"), optionally filtered by category,
+        price range and availability. Best matches come first."""
+        return await self.inventory_manager.search_products(
+            query, category, min_price, max_price, in_stock
+        )
+
+    async def semantic_search_products(self, description: str) -> str:
+        """Find products that fit a vague need or use case rather than exact
+        keywords (e.g. "something light for travel", "algo para diseño gráfico")"""
+        return await self.inventory_manager.semantic_search(description)
+
+    async def filter_products(
+        self,
+        category: Optional[str] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        in_stock: bool = False,
+    ) -> str:
+        """Filter products by category (e.g. "Computacion", "Impresion"), price range
+        and availability. The result starts with the total number of matches."""
+        return await self.inventory_manager.filter_products(
+            category, min_price, max_price, in_stock
+        )
+
+    async def get_product(self, product_id: str) -> str:
+        """Get the full details of one product by its ID"""
+        return await self.inventory_manager.get_product(product_id)
 
     def _create_graph(self) -> StateGraph:
         """Create the LangChain graph for processing messages"""
         builder = StateGraph(MessagesState)
 
-        def assistant(state: MessagesState):
-            messages = [self.system_message] + state["messages"]
-            response = self.llm_with_tools.invoke(messages)
-            return {"messages": [response]}
+        async def assistant(state: MessagesState):
+            with metrics.span("graph.assistant"):
+                messages = [self.system_message] + state["messages"]
+                prompt_tokens = count_tokens(messages)
+                self.prompt_sizes.observe(prompt_tokens)
+                # Calls after a tool result belong to a request that was already admitted
+                follow_up = isinstance(state["messages"][-1], ToolMessage)
+                async with self.llm_limiter.slot(may_reject=not follow_up):
+                    with metrics.span("llm.invoke"):
+                        response = await self.llm_with_tools.ainvoke(messages)
+                self._count_tokens(prompt_tokens, response)
+                return {"messages": [response]}
+
+        tool_node = ToolNode(self.tools)
+
+        async def tools(state: MessagesState, config: RunnableConfig):
+            with metrics.span("graph.tools"):
+                return await tool_node.ainvoke(state, config)
 
         builder.add_node("assistant", assistant)
-        builder.add_node("tools", ToolNode(self.tools))
+        builder.add_node("tools", tools)
         builder.add_edge(START, "assistant")
         builder.add_conditional_edges("assistant", tools_condition)
         builder.add_edge("tools", "assistant")
@@ -60,33 +175,199 @@ Remember:
 
         return builder.compile()
 
-    async def process_message(self, message: str, session_id: str = "default") -> str:
-        """Process a message and return the response"""
-        try:
-            # Initialize conversation history if needed
-            if session_id not in self.conversations:
-                self.conversations[session_id] = []
-
-            # Add new message to conversation
-            self.conversations[session_id].append(HumanMessage(content=message))
-
-            # Get response using conversation history
-            result = self.graph.invoke(
-                {
-                    "messages": self.conversations[session_id][
-                        -5:
-                    ]  # Keep last 5 messages for context
-                }
+    @staticmethod
+    def _count_tokens(prompt_tokens: int, response: AIMessage):
+        """Token counters, from the provider's usage when it reports one"""
+        if not metrics.enabled:
+            return
+        usage = getattr(response, "usage_metadata", None)
+        if usage:
+            prompt_tokens = usage["input_tokens"]
+            completion_tokens = usage["output_tokens"]
+        else:
+            completion_tokens = message_tokens(response)
+        metrics.inc("llm_calls")
+        metrics.inc("llm_tokens", prompt_tokens, type="prompt")
+        metrics.inc("llm_tokens", completion_tokens, type="completion")
+
+    async def _catalog_version(self) -> Optional[int]:
+        """Version of the catalog this turn may answer from without the LLM,
+        or None when there is no catalog or the backend is failing. Read once
+        per turn and never waits for the backend: an expired copy is
+        revalidated in the background, a missing one is left to the tools."""
+        catalog = self.inventory_manager.catalog
+        if not catalog.products or catalog.failing:
+            return None
+        await catalog.get()
+        return catalog.version
+
+    async def _answer_directly(
+        self, message: str, session_id: str, catalog_version: Optional[int]
+    ) -> Optional[str]:
+        """Answer from the catalog without the LLM, recording the turn"""
+        if not self.fast_path or catalog_version is None:
+            return None
+        answer = await self.inventory_manager.answer_directly(message)
+        if answer is not None:
+            metrics.inc("answers", path="direct")
+            self.conversations.append(
+                session_id, HumanMessage(content=message), AIMessage(content=answer)
             )
+        return answer
+
+    def _cache_version(
+        self, session_id: str, catalog_version: Optional[int]
+    ) -> Optional[int]:
+        """Catalog version to cache the answer under, or None when the answer
+        may depend on earlier turns or there is no fresh catalog to answer
+        from"""
+        if not self.responses.max_entries or self.conversations.get(session_id):
+            return None
+        return catalog_version
+
+    def end_session(self, session_id: str):
+        """Drop the conversation history of a session that will not return"""
+        self.conversations.delete(session_id)
 
-            # Extract and store AI response
-            ai_messages = [m for m in result["messages"] if isinstance(m, AIMessage)]
-            if ai_messages:
-                response = ai_messages[-1].content
-                self.conversations[session_id].append(AIMessage(content=response))
-                return response
+    @asynccontextmanager
+    async def _session(self, session_id: Optional[str]) -> AsyncIterator[str]:
+        """Hold a conversation for one turn. Messages of a conversation are
+        answered in order; a request without a session id is a one-off
+        conversation of its own, answered without waiting for others."""
+        if session_id is not None:
+            async with self.session_locks.hold(session_id):
+                yield session_id
+            return
+        session_id = f"anonymous-{uuid.uuid4().hex}"
+        try:
+            yield session_id
+        finally:
+            self.end_session(session_id)
 
-            return "I'm sorry, I couldn't process that message."
+    @metrics.timed("chat_engine.process_message")
+    async def process_message(self, message: str, session_id: Optional[str] = None) -> str:
+        """Process a message and return the response"""
+        try:
+            async with self._session(session_id) as session_id:
+                return await self._process_message(message, session_id)
+        except OverloadedError as e:
+            return str(e)
         except Exception as e:
-            print(f"Error processing message: {e}")
+            logger.info("Error processing message: %s", e, exc_info=True)
             return "I apologize, there was an error processing your message."
+
+    async def _process_message(self, message: str, session_id: str) -> str:
+        await self.conversations.ensure_loaded(session_id)
+
+        # Counting, price and stock questions are answered from the catalog
+        catalog_version = await self._catalog_version()
+        direct = await self._answer_directly(message, session_id, catalog_version)
+        if direct is not None:
+            return direct
+
+        # A first question may have been answered already
+        version = self._cache_version(session_id, catalog_version)
+        if version is not None:
+            cached = self.responses.get(message, version)
+            if cached is not None:
+                metrics.inc("answers", path="cache")
+                self.conversations.append(
+                    session_id, HumanMessage(content=message), AIMessage(content=cached)
+                )
+                return cached
+        start = time.perf_counter()
+
+        # The question is recorded with its answer, so a turn that is
+        # rejected or fails leaves no unanswered message in the history
+        question = HumanMessage(content=message)
+        history = self.conversations.get(session_id) + [question]
+
+        # Get response using as much history as fits the token budget
+        result = await self.graph.ainvoke({"messages": self.context.build(history)})
+
+        # Extract and store AI response
+        ai_messages = [m for m in result["messages"] if isinstance(m, AIMessage)]
+        if ai_messages:
+            response = ai_messages[-1].content
+            metrics.inc("answers", path="llm")
+            self.conversations.append(session_id, question, AIMessage(content=response))
+            if version is not None and isinstance(response, str):
+                self.responses.put(
+                    message, version, response, time.perf_counter() - start
+                )
+            return response
+
+        return "I'm sorry, I couldn't process that message."
+
+    async def stream_message(
+        self, message: str, session_id: Optional[str] = None
+    ) -> AsyncIterator[str]:
+        """Process a message, yielding the response text as the LLM produces it"""
+        try:
+            with metrics.span("chat_engine.stream_message"):
+                async with self._session(session_id) as session_id:
+                    async for chunk in self._stream_message(message, session_id):
+                        yield chunk
+        except OverloadedError as e:
+            yield str(e)
+        except Exception as e:
+            logger.info("Error streaming message: %s", e, exc_info=True)
+            yield "I apologize, there was an error processing your message."
+
+    async def _stream_message(self, message: str, session_id: str) -> AsyncIterator[str]:
+        await self.conversations.ensure_loaded(session_id)
+
+        catalog_version = await self._catalog_version()
+        direct = await self._answer_directly(message, session_id, catalog_version)
+        if direct is not None:
+            yield direct
+            return
+
+        version = self._cache_version(session_id, catalog_version)
+        if version is not None:
+            cached = self.responses.get(message, version)
+            if cached is not None:
+                metrics.inc("answers", path="cache")
+                self.conversations.append(
+                    session_id, HumanMessage(content=message), AIMessage(content=cached)
+                )
+                yield cached
+                return
+        start = time.perf_counter()
+
+        question = HumanMessage(content=message)
+        history = self.conversations.get(session_id) + [question]
+
+        final_state = None
+        async for mode, data in self.graph.astream(
+            {"messages": self.context.build(history)},
+            stream_mode=["messages", "values"],
+        ):
+            if mode == "values":
+                final_state = data
+                continue
+            chunk, metadata = data
+            # Only forward answer text, not tool calls or tool output
+            if (
+                metadata.get("langgraph_node") == "assistant"
+                and isinstance(chunk, AIMessageChunk)
+                and isinstance(chunk.content, str)
+                and chunk.content
+            ):
+                yield chunk.content
+
+        ai_messages = [
+            m for m in (final_state or {}).get("messages", [])
+            if isinstance(m, AIMessage)
+        ]
+        if ai_messages:
+            response = ai_messages[-1].content
+            metrics.inc("answers", path="llm")
+            self.conversations.append(session_id, question, AIMessage(content=response))
+            if version is not None and isinstance(response, str):
+                self.responses.put(
+                    message, version, response, time.perf_counter() - start
+                )
+            return
+
+        yield "I'm sorry, I couldn't process that message."
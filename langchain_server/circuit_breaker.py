@@ -0,0 +1,85 @@
+from typing import Dict
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a backend whose circuit breaker is open"""
+
+
+class CircuitBreaker:
+    """Stops calling a backend after ``failure_threshold`` consecutive failures.
+
+    While open, ``check()`` raises ``CircuitOpenError`` without touching the
+    network. After ``reset_timeout`` seconds one trial request is let
+    through (half-open): success closes the breaker, failure re-opens it for
+    another ``reset_timeout``.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        # When the half-open trial request was let through
+        self._trial_at = None
+        self.opened = 0
+        self.short_circuited = 0
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def check(self):
+        """Raise CircuitOpenError unless a request may be sent now"""
+        state = self.state
+        if state == "closed":
+            return
+        now = time.monotonic()
+        # One trial at a time; a trial that never reported back is replaced
+        if state == "half_open" and (
+            self._trial_at is None or now - self._trial_at >= self.reset_timeout
+        ):
+            self._trial_at = now
+            return
+        self.short_circuited += 1
+        raise CircuitOpenError(
+            f"Product backend circuit open after {self.failures} consecutive failures"
+        )
+
+    def record_success(self):
+        if self.opened_at is not None:
+            logger.info("Product backend recovered, circuit breaker closed")
+        self.failures = 0
+        self.opened_at = None
+        self._trial_at = None
+
+    def record_failure(self):
+        self.failures += 1
+        trial = self._trial_at is not None
+        if trial or (
+            self.opened_at is None and self.failures >= self.failure_threshold
+        ):
+            if not trial:
+                self.opened += 1
+            logger.warning(
+                "Product backend failed %d times in a row, circuit breaker open for %ss",
+                self.failures,
+                self.reset_timeout,
+            )
+            self.opened_at = time.monotonic()
+            self._trial_at = None
+
+    def stats(self) -> Dict:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.failures,
+            "opened": self.opened,
+            "short_circuited": self.short_circuited,
+        }
@@ -0,0 +1,179 @@
+from typing import AsyncIterator, Dict, List
+from contextlib import asynccontextmanager
+from product_client import logger
+import asyncio
+import time
+
+
+class OverloadedError(Exception):
+    """Raised instead of queueing a request that would wait too long; the
+    message is meant for the user"""
+
+
+class SessionLocks:
+    """Runs the messages of one conversation one at a time, in arrival order.
+
+    A session with ``max_pending`` messages already running or waiting
+    rejects further messages instead of queueing them. Locks are dropped as
+    soon as a session has nothing pending.
+    """
+
+    def __init__(self, max_pending: int = 4):
+        self.max_pending = max_pending
+        # Session id -> [lock, messages running or waiting]
+        self._locks: Dict[str, List] = {}
+        self.waiting = 0
+        self.max_waiting = 0
+        self.rejected = 0
+
+    @asynccontextmanager
+    async def hold(self, session_id: str) -> AsyncIterator[None]:
+        entry = self._locks.get(session_id)
+        if entry is None:
+            entry = self._locks[session_id] = [asyncio.Lock(), 0]
+        if entry[1] >= self.max_pending:
+            self.rejected += 1
+            raise OverloadedError(
+                "Please wait for my previous answers before sending more messages."
+            )
+
+        entry[1] += 1
+        try:
+            if entry[0].locked():
+                self.waiting += 1
+                self.max_waiting = max(self.max_waiting, self.waiting)
+                try:
+                    await entry[0].acquire()
+                finally:
+                    self.waiting -= 1
+            else:
+                await entry[0].acquire()
+            try:
+                yield
+            finally:
+                entry[0].release()
+        finally:
+            entry[1] -= 1
+            if not entry[1]:
+                del self._locks[session_id]
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "active_sessions": len(self._locks),
+            "waiting": self.waiting,
+            "max_waiting": self.max_waiting,
+            "rejected": self.rejected,
+            "max_pending": self.max_pending,
+        }
+
+
+class LLMLimiter:
+    """Caps concurrent LLM calls and, optionally, their rate.
+
+    At most ``max_concurrent`` calls run at once and at most ``max_queue``
+    wait for a slot; beyond that, or after waiting ``queue_timeout`` seconds,
+    callers get an ``OverloadedError`` straight away. With ``rate`` above
+    zero a token bucket also limits calls to ``rate`` per second with bursts
+    of up to ``burst`` calls.
+    """
+
+    def __init__(
+        self,
+        max_concurrent: int = 8,
+        max_queue: int = 32,
+        queue_timeout: float = 10.0,
+        rate: float = 0.0,
+        burst: int = 1,
+    ):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self.in_flight = 0
+        self.queued = 0
+        self.max_queued = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self.wait_seconds = 0.0
+
+    @asynccontextmanager
+    async def slot(self, may_reject: bool = True) -> AsyncIterator[None]:
+        """Hold one LLM call slot. Follow-up calls of a request that was
+        already admitted pass ``may_reject=False`` and wait instead."""
+        start = time.monotonic()
+        if not self._semaphore.locked():
+            # A slot is free: no queueing, at most a wait for a rate token
+            await self._acquire()
+        else:
+            if may_reject and self.queued >= self.max_queue:
+                self.rejected += 1
+                raise self._overloaded()
+
+            self.queued += 1
+            self.max_queued = max(self.max_queued, self.queued)
+            try:
+                await asyncio.wait_for(
+                    self._acquire(), self.queue_timeout if may_reject else None
+                )
+            except asyncio.TimeoutError:
+                self.timeouts += 1
+                logger.warning("LLM call waited over %ss, rejected", self.queue_timeout)
+                raise self._overloaded()
+            finally:
+                self.queued -= 1
+        self.wait_seconds += time.monotonic() - start
+
+        self.admitted += 1
+        self.in_flight += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            self._semaphore.release()
+
+    def stats(self) -> Dict:
+        return {
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "max_queued": self.max_queued,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "timeouts": self.timeouts,
+            "average_wait_seconds": (
+                round(self.wait_seconds / self.admitted, 4) if self.admitted else 0.0
+            ),
+            "max_concurrent": self.max_concurrent,
+            "max_queue": self.max_queue,
+            "rate": self.rate,
+        }
+
+    @staticmethod
+    def _overloaded() -> OverloadedError:
+        return OverloadedError(
+            "I'm receiving too many questions right now. Please try again in a few seconds."
+        )
+
+    async def _acquire(self):
+        await self._semaphore.acquire()
+        try:
+            await self._take_token()
+        except BaseException:
+            self._semaphore.release()
+            raise
+
+    async def _take_token(self):
+        if self.rate <= 0:
+            return
+        while True:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return
+            await asyncio.sleep((1 - self._tokens) / self.rate)
@@ -0,0 +1,129 @@
+from typing import Dict, List, Sequence, Tuple
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage
+import bisect
+import weakref
+
+# Per-message overhead of the chat format (role, separators)
+MESSAGE_OVERHEAD = 4
+
+# Token counts of live messages by id(); an entry goes when its message does.
+# History is re-packed every turn, so each message is counted once.
+_message_tokens: Dict[int, Tuple[weakref.ref, int]] = {}
+
+
+def estimate_tokens(text: str) -> int:
+    """Fast local token estimate: roughly 4 characters per token for
+    English and Spanish text, never fewer tokens than words"""
+    return max(len(text) // 4, len(text.split())) + 1
+
+
+def message_tokens(message: BaseMessage) -> int:
+    key = id(message)
+    cached = _message_tokens.get(key)
+    if cached is not None and cached[0]() is message:
+        return cached[1]
+    tokens = _count_message(message)
+    _message_tokens[key] = (
+        weakref.ref(message, lambda _, key=key: _message_tokens.pop(key, None)),
+        tokens,
+    )
+    return tokens
+
+
+def _count_message(message: BaseMessage) -> int:
+    content = message.content
+    if not isinstance(content, str):
+        content = str(content)
+    tokens = estimate_tokens(content) + MESSAGE_OVERHEAD
+    for call in getattr(message, "tool_calls", None) or ():
+        tokens += estimate_tokens(f"{call['name']} {call['args']}")
+    return tokens
+
+
+def count_tokens(messages: Sequence[BaseMessage]) -> int:
+    return sum(message_tokens(m) for m in messages)
+
+
+class PromptSizeHistogram:
+    """Distribution of prompt sizes (in estimated tokens) sent to the LLM"""
+
+    buckets = (256, 512, 1024, 2048, 4096, 8192, 16384, 32768)
+
+    def __init__(self):
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.total = 0
+        self.requests = 0
+        self.largest = 0
+
+    def observe(self, tokens: int):
+        self.counts[bisect.bisect_left(self.buckets, tokens)] += 1
+        self.total += tokens
+        self.requests += 1
+        self.largest = max(self.largest, tokens)
+
+    def stats(self) -> Dict:
+        labels = [f"<={b}" for b in self.buckets] + [f">{self.buckets[-1]}"]
+        return {
+            "requests": self.requests,
+            "average": round(self.total / self.requests) if self.requests else 0,
+            "largest": self.largest,
+            "buckets": dict(zip(labels, self.counts)),
+        }
+
+
+class ContextBuilder:
+    """Packs conversation history into a token budget.
+
+    The newest messages are kept first. The window always starts at a user
+    message, so no answer is sent without its question. Older turns that do
+    not fit are reduced to a one-line-per-question summary of at most
+    ``summary_tokens`` tokens.
+    """
+
+    def __init__(self, budget_tokens: int = 2000, summary_tokens: int = 200):
+        self.budget_tokens = budget_tokens
+        self.summary_tokens = summary_tokens
+
+    def build(self, history: Sequence[BaseMessage]) -> List[BaseMessage]:
+        if not history:
+            return []
+
+        # The latest message is always sent, even if it alone exceeds the budget
+        start = len(history) - 1
+        used = message_tokens(history[start])
+        while start > 0:
+            tokens = message_tokens(history[start - 1])
+            if used + tokens > self.budget_tokens - self.summary_tokens:
+                break
+            used += tokens
+            start -= 1
+
+        # Don't open the window on an answer whose question was cut off
+        while start < len(history) - 1 and not isinstance(history[start], HumanMessage):
+            start += 1
+
+        window = list(history[start:])
+        summary = self._summarise(history[:start])
+        return [summary] + window if summary else window
+
+    def _summarise(self, dropped: Sequence[BaseMessage]):
+        questions = [m.content for m in dropped if isinstance(m, HumanMessage)]
+        if not questions:
+            return None
+
+        lines = []
+        used = estimate_tokens("Earlier in this conversation the user asked:")
+        # Most recent questions are the most relevant ones to keep
+        for question in reversed(questions):
+            line = f"- {str(question)[:120]}"
+            tokens = estimate_tokens(line)
+            if used + tokens > self.summary_tokens:
+                break
+            lines.append(line)
+            used += tokens
+        if not lines:
+            return None
+        return SystemMessage(
+            content="Earlier in this conversation the user asked:\n"
+            + "\n".join(reversed(lines))
+        )
@@ -0,0 +1,256 @@
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Set, Tuple
+from product_client import Product, logger
+from product_index import tokenize_key
+import re
+
+if TYPE_CHECKING:
+    from catalog_cache import CatalogDiff
+
+# Words users call each catalog category by, in English and Spanish
+CATEGORY_NOUNS = {
+    "computacion": (
+        "computers", "computer", "pcs", "pc",
+        "computadores", "computadoras", "computadora", "computador", "ordenadores",
+    ),
+    "impresion": ("printers", "printer", "impresoras", "impresora"),
+    None: ("products", "product", "items", "productos", "articulos", "equipos"),
+}
+CATEGORY_LABELS = {
+    "computacion": ("computers", "computadores"),
+    "impresion": ("printers", "impresoras"),
+    None: ("products", "productos"),
+}
+NOUN_CATEGORIES = {
+    noun: category for category, nouns in CATEGORY_NOUNS.items() for noun in nouns
+}
+
+# Patterns run on normalised text (lowercase, no accents or punctuation) and
+# must match the whole question; anything with extra conditions goes to the LLM
+GREETING = r"(?:(?:hi|hello|hey|hola|buenas|buenos dias|buenas tardes) )?"
+POLITE = r"(?: please| por favor)?"
+EN_PATTERNS = [
+    (
+        "count",
+        r"how many (?P<subject>[\w ]+?)(?: (?:do|does) (?:you|u|aida) (?:have|sell|carry|stock)"
+        r"| are (?:there|available|in stock)| are there(?: available| in stock)"
+        r"| (?:you|u) have)?(?: available| in stock| right now| now)?",
+    ),
+    (
+        "price",
+        r"(?:what is|whats|what s) the price of (?P<subject>[\w ]+?)"
+        r"|how much (?:is|does|do) (?P<subject2>[\w ]+?)(?: cost)?",
+    ),
+    (
+        "stock",
+        r"(?:is|are) (?:the )?(?P<subject>[\w ]+?) (?:in stock|available)"
+        r"|do (?:you|u) have (?:the |any )?(?P<subject2>[\w ]+?) in stock",
+    ),
+]
+ES_PATTERNS = [
+    (
+        "count",
+        r"cuant[oa]s (?P<subject>[\w ]+?)(?: (?:hay|tienen|tienes|tiene|venden|quedan))?"
+        r"(?: disponibles?| en stock| en existencia| en inventario| ahora)?",
+    ),
+    (
+        "price",
+        r"(?:cual es el |que )?precio (?:de |del |tiene )?(?P<subject>[\w ]+?)"
+        r"|cuanto (?:cuesta|cuestan|vale|valen) (?P<subject2>[\w ]+?)",
+    ),
+    (
+        "stock",
+        r"(?:hay|tienen|tienes|queda|quedan) (?P<subject>[\w ]+?) (?:en stock|disponibles?|en existencia)"
+        r"|(?:esta|estan) (?P<subject2>[\w ]+?) (?:en stock|disponibles?)",
+    ),
+]
+ARTICLES = re.compile(r"^(?:the|a|an|el|la|los|las|un|una|del|de) ")
+
+
+def _compile(patterns) -> List[Tuple[str, "re.Pattern"]]:
+    return [
+        (intent, re.compile(GREETING + f"(?:{pattern})" + POLITE))
+        for intent, pattern in patterns
+    ]
+
+
+class IntentRouter:
+    """Answers counting, price and stock questions straight from the catalog.
+
+    Questions are normalised and matched against strict English and Spanish
+    patterns. A match is only answered when it is unambiguous: a known
+    category for counts, or a name that identifies exactly one product for
+    prices and stock. Everything else returns None and goes to the LLM.
+    """
+
+    def __init__(self):
+        self.en = _compile(EN_PATTERNS)
+        self.es = _compile(ES_PATTERNS)
+        # Normalised product names (and brand/model variants) -> products by id
+        self._names: Dict[str, Dict[str, Product]] = {}
+        # Category key (None for the whole catalog) -> [products, in stock]
+        self._counts: Dict[Optional[str], List[int]] = {}
+        self._by_id: Dict[str, Product] = {}
+        self.routed: Dict[str, int] = {"count": 0, "price": 0, "stock": 0}
+        self.fallbacks = 0
+
+    def update(
+        self,
+        products: Iterable[Product],
+        diff: Optional["CatalogDiff"] = None,
+        swap: bool = False,
+    ):
+        """Bring the name and count lookups in line with the catalog. With
+        the catalog's ``diff`` since the indexed version only the products
+        it names are re-indexed; without one the lookups are rebuilt and
+        swapped in whole. With ``swap`` a diff is applied to copies of the
+        lookups that are swapped in whole too, so the update can run in a
+        worker thread while messages are routed."""
+        if diff is None:
+            names: Dict[str, Dict[str, Product]] = {}
+            counts: Dict[Optional[str], List[int]] = {None: [0, 0]}
+            by_id: Dict[str, Product] = {}
+            for p in products:
+                self._index(p, names, counts, by_id)
+            self._names, self._counts, self._by_id = names, counts, by_id
+            logger.info("Intent router indexed %d product names", len(names))
+            return
+
+        names, counts, by_id = self._names, self._counts, self._by_id
+        # Names whose matches were copied, when the lookups are shared
+        owned: Optional[Set[str]] = None
+        if swap:
+            names, by_id = dict(names), dict(by_id)
+            counts = {category: list(count) for category, count in counts.items()}
+            owned = set()
+        for pid in diff.changed + diff.removed:
+            old = by_id.pop(pid, None)
+            if old is not None:
+                self._unindex(old, names, counts, owned)
+        touched = set(diff.added).union(diff.changed)
+        for p in products:
+            if p.id in touched:
+                self._index(p, names, counts, by_id, owned)
+        self._names, self._counts, self._by_id = names, counts, by_id
+        logger.info("Intent router updated %d products", len(touched) + len(diff.removed))
+
+    @staticmethod
+    def _name_keys(p: Product) -> Set[str]:
+        return {
+            tokenize_key(p.name),
+            tokenize_key(f"{p.brand} {p.name}"),
+            tokenize_key(f"{p.name} {p.model}"),
+            tokenize_key(f"{p.brand} {p.model}"),
+        }
+
+    @staticmethod
+    def _matches(names, key: str, owned: Optional[Set[str]]) -> Dict[str, Product]:
+        matches = names.get(key)
+        if matches is None:
+            matches = names[key] = {}
+        elif owned is not None and key not in owned:
+            matches = names[key] = dict(matches)
+        if owned is not None:
+            owned.add(key)
+        return matches
+
+    def _index(self, p: Product, names, counts, by_id, owned=None):
+        for key in self._name_keys(p):
+            self._matches(names, key, owned)[p.id] = p
+        for category in (None, tokenize_key(p.category)):
+            count = counts.setdefault(category, [0, 0])
+            count[0] += 1
+            count[1] += p.stock > 0
+        by_id[p.id] = p
+
+    def _unindex(self, p: Product, names, counts, owned=None):
+        for key in self._name_keys(p):
+            if key in names:
+                matches = self._matches(names, key, owned)
+                matches.pop(p.id, None)
+                if not matches:
+                    del names[key]
+        for category in (None, tokenize_key(p.category)):
+            count = counts[category]
+            count[0] -= 1
+            count[1] -= p.stock > 0
+            if not count[0] and category is not None:
+                del counts[category]
+
+    def route(self, message: str) -> Optional[str]:
+        """Answer the message from the catalog, or None to use the LLM"""
+        text = tokenize_key(message)
+        for language, patterns in (("en", self.en), ("es", self.es)):
+            for intent, pattern in patterns:
+                match = pattern.fullmatch(text)
+                if match is None:
+                    continue
+                subject = match.group("subject") or match.groupdict().get("subject2")
+                answer = getattr(self, f"_{intent}")(ARTICLES.sub("", subject), language)
+                if answer is not None:
+                    self.routed[intent] += 1
+                    return answer
+        self.fallbacks += 1
+        return None
+
+    def stats(self) -> Dict[str, int]:
+        return dict(self.routed, fallbacks=self.fallbacks)
+
+    def _product(self, subject: str) -> Optional[Product]:
+        matches = self._names.get(subject, {})
+        return next(iter(matches.values())) if len(matches) == 1 else None
+
+    def _count(self, subject: str, language: str) -> Optional[str]:
+        if subject not in NOUN_CATEGORIES:
+            return None
+        category = NOUN_CATEGORIES[subject]
+        if category not in self._counts:
+            return None
+        total, in_stock = self._counts[category]
+        en, es = CATEGORY_LABELS[category]
+        if language == "es":
+            return (
+                f"Tenemos {total} {es} en nuestro catálogo y {in_stock} están "
+                f"disponibles en este momento. ¿Te gustaría más información?"
+            )
+        return (
+            f"We have {total} {en} in our catalog, {in_stock} of them currently "
+            f"in stock. Would you like more information about any of them?"
+        )
+
+    def _price(self, subject: str, language: str) -> Optional[str]:
+        p = self._product(subject)
+        if p is None:
+            return None
+        if language == "es":
+            return (
+                f"El {p.name} cuesta ${p.price:,.2f}. "
+                f"¿Te gustaría más información sobre este producto?"
+            )
+        return (
+            f"The {p.name} costs ${p.price:,.2f}. "
+            f"Would you like more information about it?"
+        )
+
+    def _stock(self, subject: str, language: str) -> Optional[str]:
+        p = self._product(subject)
+        if p is None:
+            return None
+        if language == "es":
+            if p.stock > 0:
+                return (
+                    f"Sí, tenemos {p.stock} unidades del {p.name} disponibles. "
+                    f"¿Te gustaría más información sobre este producto?"
+                )
+            return (
+                f"Lo siento, el {p.name} está agotado en este momento. "
+                f"¿Te gustaría ver alternativas?"
+            )
+        if p.stock > 0:
+            return (
+                f"Yes, we have {p.stock} units of the {p.name} in stock. "
+                f"Would you like more information about it?"
+            )
+        return (
+            f"Sorry, the {p.name} is currently out of stock. "
+            f"Would you like to see some alternatives?"
+        )
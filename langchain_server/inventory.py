@@ -1,57 +1,392 @@
-from product_client import ProductClient, logger
+from typing import Awaitable, Callable, Dict, List, Optional
+from product_client import Product, ProductClient, gc_paused, logger
+from catalog_cache import CatalogCache, CatalogDiff
+from product_index import ProductIndex
+from semantic_index import SemanticIndex
+from intent_router import IntentRouter
+from metrics import metrics
+from logging_config import configure_logging, sampled
+from langchain_core.embeddings import Embeddings
 import asyncio
+import os
+
+# Products a consumer updates on the event loop, about 2ms of work each at
+# 100k products; bigger updates run on a copy in a worker thread. The
+# formatted catalog is re-joined in full, so its limit is the catalog size.
+INLINE_UPDATE_LIMITS = {"formatted": 1000, "index": 50, "semantic_index": 15, "router": 50}
 
 
 class InventoryManager:
-    def __init__(self):
+    def __init__(self, embeddings: Optional[Embeddings] = None):
         logger.info("Initializing InventoryManager")
         self.product_client = ProductClient()
+        self.catalog = CatalogCache(
+            self.product_client.get_products,
+            ttl=float(os.getenv("CATALOG_CACHE_TTL", "60")),
+        )
+        self._formatted = None
+        # Rendered text per product id
+        self._blocks: Dict[str, str] = {}
+        self.index = ProductIndex()
+        self.semantic_index = SemanticIndex(embeddings)
+        self.router = IntentRouter()
+        # Catalog version each consumer (formatted list, indexes, router) was
+        # last brought up to, and its update in progress
+        self._versions: Dict[str, int] = {}
+        self._syncs: Dict[str, asyncio.Task] = {}
+        self.max_results = int(os.getenv("PRODUCT_TOOL_MAX_RESULTS", "10"))
+        # Background catalog watcher; a poll interval of 0 only reacts to webhooks
+        self.poll_interval = float(os.getenv("CATALOG_POLL_INTERVAL", "30"))
+        self.prefetch_timeout = float(os.getenv("CATALOG_PREFETCH_TIMEOUT", "10"))
+        self._watcher: Optional[asyncio.Task] = None
+        self._wake: Optional[asyncio.Event] = None
+        self.polls = 0
+        self.pushes = 0
+
+    async def start(self):
+        """Open the connection pool, load the catalog and start watching it
+        so no user message waits for a cold fetch"""
+        await self.product_client.start()
+        try:
+            await asyncio.wait_for(self.catalog.refresh(), self.prefetch_timeout)
+            await self.warm()
+        except asyncio.TimeoutError:
+            # The fetch carries on in the background; don't hold up startup
+            logger.warning(
+                "Product catalog not loaded after %ss, starting without it",
+                self.prefetch_timeout,
+            )
+        # Created here so it belongs to the loop the service runs on
+        self._wake = asyncio.Event()
+        self._watcher = asyncio.create_task(self._watch())
+
+    async def close(self):
+        if self._watcher is not None:
+            self._watcher.cancel()
+            try:
+                await self._watcher
+            except asyncio.CancelledError:
+                pass
+            self._watcher = None
+        for task in self._syncs.values():
+            if not task.done():
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        await self.catalog.close()
+        await self.product_client.close()
+
+    def refresh_soon(self):
+        """Ask the watcher to revalidate the catalog now (webhook pushes);
+        a burst of requests is served by a single refresh"""
+        self.pushes += 1
+        # Readers revalidate too, should the watcher not be running
+        self.catalog.invalidate()
+        if self._wake is not None:
+            self._wake.set()
+
+    async def warm(self):
+        """Build the formatted list and the indexes for the current catalog"""
+        if not self.catalog.products:
+            return
+        await self.get_product_list()
+        await self.get_index()
+        await self.get_semantic_index()
+        await self.get_router()
 
+    async def _watch(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.poll_interval or None)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            self.polls += 1
+            try:
+                version = self.catalog.version
+                await self.catalog.refresh()
+                if self.catalog.version != version:
+                    await self.warm()
+            except Exception as e:
+                logger.error("Error watching the product catalog: %s", e, exc_info=True)
+
+    def watcher_stats(self) -> Dict:
+        return {
+            "running": self._watcher is not None and not self._watcher.done(),
+            "poll_interval": self.poll_interval,
+            "polls": self.polls,
+            "pushes": self.pushes,
+        }
+
+    async def get_products(self) -> List[Product]:
+        """Get the product catalog, served from the cache when possible"""
+        return await self.catalog.get()
+
+    @metrics.timed("inventory.get_product_list")
     async def get_product_list(self) -> str:
         """Get the formatted product list with all details"""
-        logger.info("Getting formatted product list")
+        if sampled():
+            logger.info("Getting formatted product list")
 
-        # Fetch products from the backend
-        products = await self.product_client.get_products()
+        # Fetch products from the backend (or the catalog cache)
+        products = await self.get_products()
 
         if not products:
             logger.warning("No products returned from backend")
             return "Sorry, I couldn't retrieve the product list at the moment."
 
-        logger.info(f"Formatting {len(products)} products")
-        formatted = "Available Products:\n\n"
+        # The formatted text only changes when the catalog does
+        await self._sync("formatted", self._update_formatted)
+        if self._formatted is None:
+            return "Sorry, there was an error formatting the product list."
+        return self._stale_note() + self._formatted
+
+    async def get_index(self) -> ProductIndex:
+        """Get the product index, updated when the catalog version changes"""
+        await self.get_products()
+        await self._sync("index", self._update_index)
+        return self.index
+
+    async def search_products(
+        self,
+        query: str,
+        category: Optional[str] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        in_stock: bool = False,
+    ) -> str:
+        """Get the products best matching a free-text query, optionally filtered"""
+        index = await self.get_index()
+        if not len(index):
+            return "Sorry, I couldn't retrieve the product list at the moment."
+        total, matches = index.search(
+            query, category, min_price, max_price, in_stock, limit=self.max_results
+        )
+        return self._stale_note() + self._format_matches(total, matches)
+
+    async def filter_products(
+        self,
+        category: Optional[str] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        in_stock: bool = False,
+    ) -> str:
+        """Get the products matching a category, price range and availability"""
+        index = await self.get_index()
+        if not len(index):
+            return "Sorry, I couldn't retrieve the product list at the moment."
+        total, matches = index.search(
+            None, category, min_price, max_price, in_stock, limit=self.max_results
+        )
+        if not total and category:
+            categories = ", ".join(index.categories())
+            return f"No products found. Available categories: {categories}"
+        return self._stale_note() + self._format_matches(total, matches)
+
+    async def get_semantic_index(self) -> SemanticIndex:
+        """Get the embedding index, re-embedding products that changed"""
+        await self.get_products()
+        await self._sync("semantic_index", self._update_semantic_index)
+        return self.semantic_index
+
+    async def semantic_search(self, query: str) -> str:
+        """Get the products closest in meaning to a free-form description"""
+        index = await self.get_semantic_index()
+        if not len(index):
+            return "Sorry, I couldn't retrieve the product list at the moment."
+        matches = index.search(query, limit=self.max_results)
+        return self._stale_note() + self._format_matches(
+            len(matches),
+            [p for p, _ in matches],
+            header=f"The {len(matches)} products closest to this description, best first",
+        )
+
+    async def answer_directly(self, message: str) -> Optional[str]:
+        """Answer a counting, price or stock question from the catalog, or
+        None when the question needs the LLM. Never fetches the catalog."""
+        # Possibly outdated numbers are left to the LLM, which can caveat them
+        if not self.catalog.products or self.catalog.failing:
+            return None
+        return (await self.get_router()).route(message)
+
+    async def get_router(self) -> IntentRouter:
+        """Get the intent router, updated when the catalog version changes"""
+        await self.get_products()
+        await self._sync("router", self._update_router)
+        return self.router
+
+    async def _sync(
+        self,
+        name: str,
+        update: Callable[
+            [List[Product], List[Product], Optional[CatalogDiff]], Awaitable[None]
+        ],
+    ):
+        """Bring a catalog consumer up to the current catalog version.
+        Concurrent callers share a single update."""
+        while self._versions.get(name) != self.catalog.version:
+            task = self._syncs.get(name)
+            if task is None or task.done():
+                task = self._syncs[name] = asyncio.create_task(self._run_sync(name, update))
+            # Shield so a cancelled caller does not cancel the shared update
+            await asyncio.shield(task)
+
+    async def _run_sync(self, name: str, update):
+        catalog = self.catalog
+        products, version = catalog.products or [], catalog.version
+        diff = catalog.diff_since(self._versions.get(name))
+        # The added and changed products, so a diffed update costs what it touches
+        changed = products if diff is None else [
+            catalog.by_id[pid] for pid in diff.added + diff.changed
+        ]
+        await update(products, changed, diff)
+        self._versions[name] = version
+
+    @staticmethod
+    def _in_thread(name: str, changed: List[Product], diff: Optional[CatalogDiff]) -> bool:
+        """Whether an update is too big to run on the event loop"""
+        touched = len(changed) + (len(diff.removed) if diff is not None else 0)
+        return touched > INLINE_UPDATE_LIMITS[name]
+
+    @staticmethod
+    def _updated_copy(index, changed: List[Product], diff: Optional[CatalogDiff]):
+        # Skip the collector passes the copy's allocations trigger: they
+        # form no cycles and a pass over the catalog holds up the loop
+        with gc_paused():
+            copy = index.copy()
+            copy.update(changed, diff)
+        return copy
+
+    def _update_router_lookups(self, changed: List[Product], diff: Optional[CatalogDiff]):
+        with gc_paused():
+            self.router.update(changed, diff, swap=True)
+
+    async def _update_formatted(
+        self, products: List[Product], changed: List[Product], diff: Optional[CatalogDiff]
+    ):
+        with metrics.span("inventory.format_products"):
+            if self._in_thread("formatted", products, None):
+                self._formatted = await asyncio.to_thread(self._format_products, products, diff)
+            else:
+                self._formatted = self._format_products(products, diff)
+
+    async def _update_index(
+        self, products: List[Product], changed: List[Product], diff: Optional[CatalogDiff]
+    ):
+        # Readers keep searching the current index while a copy is updated
+        if self._in_thread("index", changed, diff):
+            self.index = await asyncio.to_thread(self._updated_copy, self.index, changed, diff)
+        else:
+            self.index.update(changed, diff)
+
+    async def _update_semantic_index(
+        self, products: List[Product], changed: List[Product], diff: Optional[CatalogDiff]
+    ):
+        # Only new and changed text is embedded, on the copy as well
+        if self._in_thread("semantic_index", changed, diff):
+            self.semantic_index = await asyncio.to_thread(
+                self._updated_copy, self.semantic_index, changed, diff
+            )
+        else:
+            self.semantic_index.update(changed, diff)
+
+    async def _update_router(
+        self, products: List[Product], changed: List[Product], diff: Optional[CatalogDiff]
+    ):
+        # The router swaps its updated lookups in whole when it is done
+        if self._in_thread("router", changed, diff):
+            await asyncio.to_thread(self._update_router_lookups, changed, diff)
+        else:
+            self.router.update(changed, diff)
+
+    async def get_product(self, product_id: str) -> str:
+        """Get the full details of a single product"""
+        product = await self.product_client.get_product(product_id)
+        if product is not None:
+            return self._render_product(product)
+
+        # The backend is failing: fall back to the last known catalog
+        if self.product_client.breaker.failures and self.catalog.products:
+            p = self.catalog.by_id.get(product_id)
+            if p is not None:
+                return self._stale_note(force=True) + self._render_product(p)
+        return f"Sorry, I couldn't find a product with ID {product_id}."
+
+    def _stale_note(self, force: bool = False) -> str:
+        if not (force or self.catalog.failing):
+            return ""
+        return (
+            "Note: the product backend is unavailable, this is the last known "
+            "catalog and prices or stock may have changed.\n\n"
+        )
+
+    def _format_matches(
+        self, total: int, shown: List[Product], header: Optional[str] = None
+    ) -> str:
+        if not total:
+            return "No matching products found."
+
+        if header is None:
+            header = f"Found {total} matching products"
+            if len(shown) < total:
+                header += f" (showing the first {len(shown)})"
+        parts = [header + ":\n\n"]
+        for p in shown:
+            parts.append(self._render_product(p).rstrip("\n") + f"\n  ID: {p.id}\n\n")
+        return "".join(parts)
+
+    def _format_products(
+        self, products: List[Product], diff: Optional[CatalogDiff] = None
+    ) -> Optional[str]:
+        logger.info("Formatting %d products", len(products))
 
         try:
+            # Only re-render products whose displayed content changed
+            touched = None if diff is None else set(diff.added).union(diff.changed)
+            blocks = {}
+            parts = ["Available Products:\n\n"]
+            rendered = 0
             for p in products:
-                logger.debug(f"Formatting product: {p.name}")
-                formatted += f"• {p.name} ({p.brand} {p.model})\n"
-                formatted += f"  Description: {p.description}\n"
-                formatted += f"  Category: {p.category}\n"
-                formatted += f"  Price: ${p.price:,.2f}\n"
-                formatted += f"  Stock: {p.stock} units\n"
-
-                # Add category-specific details
-                if p.processor:  # Computer specific
-                    formatted += f"  Processor: {p.processor}\n"
-                    formatted += f"  RAM: {p.ram}\n"
-                    formatted += f"  Storage: {p.storageCapacity} {p.storageType}\n"
-                    formatted += f"  Graphics: {p.graphicsCard}\n"
-                    formatted += f"  OS: {p.operatingSystem}\n"
-                elif p.printingTechnology:  # Printer specific
-                    formatted += f"  Printing Technology: {p.printingTechnology}\n"
-                    if p.connectivityOptions:
-                        formatted += (
-                            f"  Connectivity: {', '.join(p.connectivityOptions)}\n"
-                        )
-
-                formatted += "\n"
-
-            logger.info("Successfully formatted all products")
-            return formatted
+                block = self._blocks.get(p.id)
+                if block is None or touched is None or p.id in touched:
+                    block = self._render_product(p)
+                    rendered += 1
+                blocks[p.id] = block
+                parts.append(block)
+
+            self._blocks = blocks
+            logger.info("Successfully formatted all products (%d re-rendered)", rendered)
+            return "".join(parts)
 
         except Exception as e:
-            logger.error(f"Error formatting products: {str(e)}", exc_info=True)
-            return "Sorry, there was an error formatting the product list."
+            logger.error("Error formatting products: %s", e, exc_info=True)
+            return None
+
+    @staticmethod
+    def _render_product(p: Product) -> str:
+        lines = [
+            f"• {p.name} ({p.brand} {p.model})",
+            f"  Description: {p.description}",
+            f"  Category: {p.category}",
+            f"  Price: ${p.price:,.2f}",
+            f"  Stock: {p.stock} units",
+        ]
+
+        # Add category-specific details
+        if p.processor:  # Computer specific
+            lines.append(f"  Processor: {p.processor}")
+            lines.append(f"  RAM: {p.ram}")
+            lines.append(f"  Storage: {p.storageCapacity} {p.storageType}")
+            lines.append(f"  Graphics: {p.graphicsCard}")
+            lines.append(f"  OS: {p.operatingSystem}")
+        elif p.printingTechnology:  # Printer specific
+            lines.append(f"  Printing Technology: {p.printingTechnology}")
+            if p.connectivityOptions:
+                lines.append(f"  Connectivity: {', '.join(p.connectivityOptions)}")
+
+        return "\n".join(lines) + "\n\n"
 
     # Commented out old hardcoded products
     """
@@ -83,6 +418,7 @@ class InventoryManager:
 
 
 async def main():
+    configure_logging()
     # Create inventory manager
     inventory = InventoryManager()
 
@@ -94,8 +430,10 @@ async def main():
         print(product_list)
         logger.info("=== Product list test completed ===")
     except Exception as e:
-        logger.error(f"Error in main: {str(e)}", exc_info=True)
+        logger.error("Error in main: %s", e, exc_info=True)
         print(f"Error getting product list: {e}")
+    finally:
+        await inventory.close()
 
 
 if __name__ == "__main__":
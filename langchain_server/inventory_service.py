@@ -1,17 +1,36 @@
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Header, HTTPException, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, StreamingResponse
 import uvicorn
 from dotenv import load_dotenv
+import hmac
 import json
+import os
 
+from logging_config import SampleRequests, configure_logging
+from metrics import metrics
 from models import ChatMessage, ChatResponse
+from product_client import logger
 from websocket_manager import WebSocketManager
 
 # Load environment variables
 load_dotenv()
+configure_logging()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Open shared resources (HTTP connection pool) for the app lifetime"""
+    await ws_manager.chat_engine.start()
+    try:
+        yield
+    finally:
+        await ws_manager.chat_engine.close()
+
 
 # Initialize FastAPI app
-app = FastAPI(title="Inventory Chat Service")
+app = FastAPI(title="Inventory Chat Service", lifespan=lifespan)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -20,23 +39,133 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Decide once per request whether its per-request lines are logged
+app.add_middleware(SampleRequests)
+
+
 # Initialize WebSocket manager
 ws_manager = WebSocketManager()
 
+# The /*/stats counters are also exported as gauges on /metrics
+engine = ws_manager.chat_engine
+metrics.register("catalog", engine.inventory_manager.catalog.stats)
+metrics.register("catalog_watcher", engine.inventory_manager.watcher_stats)
+metrics.register("backend", engine.inventory_manager.product_client.stats)
+metrics.register("sessions", engine.conversations.stats)
+metrics.register("prompt_tokens", engine.prompt_sizes.stats)
+metrics.register("responses", engine.responses.stats)
+metrics.register("router", engine.inventory_manager.router.stats)
+metrics.register("llm_limiter", engine.llm_limiter.stats)
+metrics.register("session_queue", engine.session_locks.stats)
+metrics.register(
+    "websocket", lambda: {"active_connections": len(ws_manager.active_connections)}
+)
+
 
 @app.post("/chat", response_model=ChatResponse)
 async def chat(message: ChatMessage):
     """HTTP endpoint for Streamlit compatibility"""
     try:
         response = await ws_manager.chat_engine.process_message(
-            message.message, message.session_id or "default"
+            message.message, message.session_id
         )
         return ChatResponse(message=response)
     except Exception as e:
-        print(f"Error in chat endpoint: {e}")
+        logger.info("Error in chat endpoint: %s", e, exc_info=True)
         return ChatResponse(message="Lo siento, hubo un error al procesar tu mensaje.")
 
 
+@app.post("/chat/stream")
+async def chat_stream(message: ChatMessage):
+    """Server-Sent Events variant of /chat: one "data" event per chunk of the
+    answer, then a "done" event with the full text"""
+
+    async def events():
+        chunks = []
+        async for chunk in ws_manager.chat_engine.stream_message(
+            message.message, message.session_id
+        ):
+            chunks.append(chunk)
+            yield f"data: {json.dumps({'content': chunk})}\n\n"
+        yield f"event: done\ndata: {json.dumps({'message': ''.join(chunks)})}\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.get("/catalog/stats")
+async def catalog_stats():
+    """Product catalog cache counters"""
+    return ws_manager.chat_engine.inventory_manager.catalog.stats()
+
+
+@app.post("/catalog/webhook", status_code=202)
+async def catalog_webhook(x_webhook_token: str = Header("")):
+    """Called by the product backend when products change; the catalog is
+    revalidated in the background and the indexes rebuilt for the changes"""
+    secret = os.getenv("CATALOG_WEBHOOK_SECRET", "")
+    if not secret:
+        raise HTTPException(status_code=404, detail="Catalog webhook is disabled")
+    if not hmac.compare_digest(x_webhook_token.encode(), secret.encode()):
+        raise HTTPException(status_code=401, detail="Invalid webhook token")
+    ws_manager.chat_engine.inventory_manager.refresh_soon()
+    return {"status": "accepted"}
+
+
+@app.get("/catalog/watcher/stats")
+async def catalog_watcher_stats():
+    """Background catalog polling and webhook pushes"""
+    return ws_manager.chat_engine.inventory_manager.watcher_stats()
+
+
+@app.get("/backend/stats")
+async def backend_stats():
+    """Product backend circuit breaker state and retry counter"""
+    return ws_manager.chat_engine.inventory_manager.product_client.stats()
+
+
+@app.get("/sessions/stats")
+async def session_stats():
+    """Conversation history store size gauges"""
+    return ws_manager.chat_engine.conversations.stats()
+
+
+@app.get("/context/stats")
+async def context_stats():
+    """Histogram of estimated prompt tokens per LLM call"""
+    return ws_manager.chat_engine.prompt_sizes.stats()
+
+
+@app.get("/responses/stats")
+async def response_cache_stats():
+    """Response cache hit ratio and estimated LLM time saved"""
+    return ws_manager.chat_engine.responses.stats()
+
+
+@app.get("/router/stats")
+async def router_stats():
+    """Questions answered from the catalog per intent, and LLM fallbacks"""
+    return ws_manager.chat_engine.inventory_manager.router.stats()
+
+
+@app.get("/limits/stats")
+async def limit_stats():
+    """LLM call concurrency and per-session queue gauges"""
+    engine = ws_manager.chat_engine
+    return {"llm": engine.llm_limiter.stats(), "sessions": engine.session_locks.stats()}
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    """Stage timings, counters and the stats above in Prometheus text format"""
+    return PlainTextResponse(
+        metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
 @app.websocket("/ws/chat")
 async def websocket_endpoint(websocket: WebSocket):
     session_id = await ws_manager.connect(websocket)
@@ -46,7 +175,13 @@ async def websocket_endpoint(websocket: WebSocket):
                 data = await websocket.receive_text()
                 message_data = json.loads(data)
                 user_message = message_data.get("message", "")
-                await ws_manager.process_message(websocket, user_message, session_id)
+                # {"stream": true} opts in to chunk frames followed by a "done" frame
+                await ws_manager.process_message(
+                    websocket,
+                    user_message,
+                    session_id,
+                    stream=bool(message_data.get("stream", False)),
+                )
             except json.JSONDecodeError:
                 await websocket.send_json(
                     {
@@ -57,9 +192,14 @@ async def websocket_endpoint(websocket: WebSocket):
                 ws_manager.disconnect(session_id)
                 break
     except Exception as e:
-        print(f"WebSocket error: {e}")
+        logger.info("WebSocket error: %s", e, exc_info=True)
         ws_manager.disconnect(session_id)
 
 
 if __name__ == "__main__":
-    uvicorn.run(app, host="0.0.0.0", port=8001)
+    workers = int(os.getenv("WORKERS", "1"))
+    if workers > 1:
+        # Multiple workers need an import string and a shared session store
+        uvicorn.run("inventory_service:app", host="0.0.0.0", port=8001, workers=workers)
+    else:
+        uvicorn.run(app, host="0.0.0.0", port=8001)
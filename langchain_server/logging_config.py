@@ -0,0 +1,161 @@
+"""Logging setup for the service: structured, lazily formatted and off the
+event loop.
+
+Records go from the calling thread into a queue and are formatted and
+written by a QueueListener thread, so neither string formatting nor log I/O
+runs on the event loop. Per-request INFO lines are sampled with
+``sampled()`` so their volume does not grow with traffic; warnings and
+errors are always logged. ``sample_request()`` decides once, at the start
+of a request, so a sampled request keeps all of its lines.
+"""
+
+from contextvars import ContextVar
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional, TextIO
+import atexit
+import json
+import logging
+import os
+import queue
+import random
+import sys
+
+# Attributes every LogRecord has; anything else was passed with extra={...}
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {
+    "message",
+    "asctime",
+    "taskName",
+}
+
+# Share of requests whose per-request INFO lines are logged
+SAMPLE_RATE = 1.0
+
+_listener: Optional[QueueListener] = None
+
+# Whether the current request was picked for logging; None outside requests
+_request_sampled: ContextVar[Optional[bool]] = ContextVar("request_sampled", default=None)
+
+
+def _draw() -> bool:
+    return SAMPLE_RATE >= 1.0 or random.random() < SAMPLE_RATE
+
+
+def sample_request() -> bool:
+    """Decide whether the request starting in this context is logged"""
+    decision = _draw()
+    _request_sampled.set(decision)
+    return decision
+
+
+class SampleRequests:
+    """ASGI middleware that calls ``sample_request()`` as each HTTP request
+    starts. Plain ASGI, so responses (SSE streams included) pass straight
+    through instead of being relayed by a task as BaseHTTPMiddleware does."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            sample_request()
+        await self.app(scope, receive, send)
+
+
+def sampled() -> bool:
+    """Whether to log the per-request lines of this request. Outside a
+    request each line is sampled on its own."""
+    decision = _request_sampled.get()
+    return _draw() if decision is None else decision
+
+
+def _fields(record: logging.LogRecord) -> dict:
+    return {k: v for k, v in vars(record).items() if k not in _RECORD_ATTRS}
+
+
+class StructuredFormatter(logging.Formatter):
+    """``time level logger message key=value ...`` with the record's extra
+    fields appended"""
+
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)s %(name)s %(message)s")
+
+    def format(self, record: logging.LogRecord) -> str:
+        text = super().format(record)
+        fields = _fields(record)
+        if not fields:
+            return text
+        pairs = " ".join(f"{k}={json.dumps(v, default=str)}" for k, v in fields.items())
+        head, newline, tail = text.partition("\n")
+        return f"{head} {pairs}{newline}{tail}"
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per line, with the record's extra fields as keys"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        entry.update(_fields(record))
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class DeferredQueueHandler(QueueHandler):
+    """Queues the record as is. The stock QueueHandler formats the message
+    in the calling thread; here the listener thread does it, so arguments
+    must not be mutated after logging them."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+def configure_logging(
+    level: Optional[str] = None,
+    stream: Optional[TextIO] = None,
+) -> Optional[QueueListener]:
+    """Route the root logger through a queue to a background writer.
+
+    LOG_LEVEL sets the level (default info), LOG_FORMAT "text" or "json" the
+    output, and LOG_SAMPLE_RATE the share of requests with per-request logs.
+    Calling it again only updates the level and sample rate.
+    """
+    global _listener, SAMPLE_RATE
+    level_name = (level or os.getenv("LOG_LEVEL", "info")).upper()
+    SAMPLE_RATE = float(os.getenv("LOG_SAMPLE_RATE", "0.1"))
+
+    root = logging.getLogger()
+    root.setLevel(level_name)
+    # httpx logs every request at INFO; keep that for debugging only
+    logging.getLogger("httpx").setLevel(
+        logging.DEBUG if root.level <= logging.DEBUG else logging.WARNING
+    )
+    if _listener is not None:
+        return _listener
+
+    handler = logging.StreamHandler(stream or sys.stderr)
+    if os.getenv("LOG_FORMAT", "text").lower() == "json":
+        handler.setFormatter(JSONFormatter())
+    else:
+        handler.setFormatter(StructuredFormatter())
+
+    records: queue.SimpleQueue = queue.SimpleQueue()
+    for existing in root.handlers[:]:
+        root.removeHandler(existing)
+    root.addHandler(DeferredQueueHandler(records))
+    _listener = QueueListener(records, handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_logging)
+    return _listener
+
+
+def stop_logging():
+    """Flush queued records and stop the writer thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
@@ -0,0 +1,183 @@
+"""Per-stage timings and counters exposed in Prometheus text format.
+
+Spans time a stage of a chat turn into a latency histogram labelled with the
+stage name, counters accumulate totals such as tokens or cache hits, and
+registered ``stats()`` callables are read as gauges only when /metrics is
+scraped. With METRICS_ENABLED=false spans and counters are no-ops.
+"""
+
+from typing import Callable, Dict, Iterator, List, Tuple
+import bisect
+import functools
+import os
+import re
+import time
+
+PREFIX = "aida"
+# Upper bounds, in seconds, of the stage latency buckets
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class Histogram:
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, seconds: float):
+        self.counts[bisect.bisect_left(BUCKETS, seconds)] += 1
+        self.sum += seconds
+        self.count += 1
+
+
+class Span:
+    """Times a ``with`` block into a stage histogram"""
+
+    __slots__ = ("histogram", "start")
+
+    def __init__(self, histogram: Histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start)
+        return False
+
+
+class NoSpan:
+    """Shared stand-in for Span when metrics are disabled"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+NO_SPAN = NoSpan()
+
+
+def _name(text: str) -> str:
+    return re.sub(r"[^a-zA-Z0-9_]", "_", text).strip("_").lower()
+
+
+def _label(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def _gauges(prefix: str, stats: Dict) -> Iterator[Tuple[str, str, float]]:
+    """Flatten a stats() dict into (metric, labels, value) gauges. Nested
+    dicts become a ``key`` label, strings a ``value`` label set to 1."""
+    for key, value in stats.items():
+        metric = f"{prefix}_{_name(key)}"
+        if isinstance(value, dict):
+            for label, item in value.items():
+                if isinstance(item, (int, float)):
+                    yield metric, f'{{key="{_label(label)}"}}', float(item)
+        elif isinstance(value, (int, float)):
+            yield metric, "", float(value)
+        elif isinstance(value, str):
+            yield metric, f'{{value="{_label(value)}"}}', 1.0
+
+
+class Metrics:
+    """Process-wide registry of stage spans, counters and stats gauges"""
+
+    def __init__(self, enabled: bool = None):
+        if enabled is None:
+            enabled = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+        self.enabled = enabled
+        self._stages: Dict[str, Histogram] = {}
+        self._counters: Dict[str, Dict[Tuple, float]] = {}
+        self._help: Dict[str, str] = {}
+        self._collectors: List[Tuple[str, Callable[[], Dict]]] = []
+
+    def span(self, stage: str):
+        """Context manager timing one stage"""
+        if not self.enabled:
+            return NO_SPAN
+        histogram = self._stages.get(stage)
+        if histogram is None:
+            histogram = self._stages[stage] = Histogram()
+        return Span(histogram)
+
+    def timed(self, stage: str):
+        """Decorator timing every call of a coroutine function as one stage"""
+
+        def decorate(func):
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                with self.span(stage):
+                    return await func(*args, **kwargs)
+
+            return wrapper
+
+        return decorate
+
+    def describe(self, name: str, help_text: str):
+        self._help[name] = help_text
+
+    def inc(self, name: str, amount: float = 1, **labels):
+        """Add to a counter, exported as ``<prefix>_<name>_total``"""
+        if not self.enabled:
+            return
+        series = self._counters.setdefault(name, {})
+        key = tuple(sorted(labels.items()))
+        series[key] = series.get(key, 0) + amount
+
+    def register(self, name: str, stats: Callable[[], Dict]):
+        """Export the numbers of a stats() callable as gauges on every scrape"""
+        self._collectors.append((name, stats))
+
+    def render(self) -> str:
+        lines = []
+        if self._stages:
+            metric = f"{PREFIX}_stage_seconds"
+            lines.append(f"# HELP {metric} Time spent in each stage of a chat turn")
+            lines.append(f"# TYPE {metric} histogram")
+            for stage, histogram in sorted(self._stages.items()):
+                stage = _label(stage)
+                cumulative = 0
+                for bound, count in zip(BUCKETS, histogram.counts):
+                    cumulative += count
+                    lines.append(f'{metric}_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+                lines.append(f'{metric}_bucket{{stage="{stage}",le="+Inf"}} {histogram.count}')
+                lines.append(f'{metric}_sum{{stage="{stage}"}} {histogram.sum:.6f}')
+                lines.append(f'{metric}_count{{stage="{stage}"}} {histogram.count}')
+
+        for name, series in sorted(self._counters.items()):
+            metric = f"{PREFIX}_{name}_total"
+            if name in self._help:
+                lines.append(f"# HELP {metric} {self._help[name]}")
+            lines.append(f"# TYPE {metric} counter")
+            for labels, value in sorted(series.items()):
+                text = ",".join(f'{k}="{_label(v)}"' for k, v in labels)
+                text = f"{{{text}}}" if text else ""
+                lines.append(f"{metric}{text} {_number(value)}")
+
+        for name, stats in self._collectors:
+            typed = set()
+            for metric, labels, value in _gauges(f"{PREFIX}_{_name(name)}", stats()):
+                if metric not in typed:
+                    lines.append(f"# TYPE {metric} gauge")
+                    typed.add(metric)
+                lines.append(f"{metric}{labels} {_number(value)}")
+
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
+metrics.describe("llm_calls", "LLM calls made by the assistant node")
+metrics.describe("llm_tokens", "Prompt and completion tokens of LLM calls")
+metrics.describe("answers", "Chat answers by the path that produced them")
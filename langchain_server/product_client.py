@@ -1,15 +1,34 @@
 import httpx
-from typing import List, Optional, Dict
+from typing import Any, Callable, List, Optional, Dict
 from pydantic import BaseModel
 from datetime import datetime
+from contextlib import contextmanager
+from circuit_breaker import CircuitBreaker, CircuitOpenError
+from metrics import metrics
+from logging_config import sampled
+import asyncio
+import gc
+import json
 import logging
+import os
+import random
+import sys
+import time
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+# Handlers and level are set up by logging_config.configure_logging()
 logger = logging.getLogger(__name__)
 
+# Statuses worth retrying: the request may succeed when sent again
+RETRY_STATUSES = {429, 502, 503, 504}
+
+
+class ProductModel(BaseModel):
+    """Schema of a product as served by the backend API.
+
+    Only used to validate records the fast path in ``Product`` can't
+    handle; the catalog itself is kept as ``Product`` records.
+    """
 
-class Product(BaseModel):
     id: str
     name: str
     brand: str
@@ -34,80 +53,342 @@ class Product(BaseModel):
 
     class Config:
         extra = "ignore"
-        validate_assignment = True
-        arbitrary_types_allowed = True
+
+
+# Short, highly repeated strings share one copy across the catalog
+INTERNED_FIELDS = (
+    "brand",
+    "category",
+    "model",
+    "processor",
+    "ram",
+    "storageType",
+    "storageCapacity",
+    "graphicsCard",
+    "operatingSystem",
+    "printingTechnology",
+)
+TEXT_TYPES = frozenset((str, type(None)))
+intern = sys.intern
+
+
+class Product:
+    """Compact in-memory product record.
+
+    Has the fields of ``ProductModel`` as slots, with repeated labels
+    (brand, category, specs) interned and connectivity options stored as a
+    tuple. Well-formed backend records are checked with plain type tests;
+    anything else is validated (and coerced) by ``ProductModel``, which
+    raises ``ValidationError`` exactly as before.
+    """
+
+    __slots__ = tuple(ProductModel.model_fields)
+
+    def __init__(self, **data):
+        self._fill(data)
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "Product":
+        product = cls.__new__(cls)
+        product._fill(data)
+        return product
+
+    def _fill(self, data: Dict):
+        get = data.get
+        price = get("price")
+        options = get("connectivityOptions")
+        specifications = get("specifications")
+        images = get("images")
+        warranty = get("warrantyPeriod")
+        labels = [get(field) for field in INTERNED_FIELDS]
+        if not (
+            type(get("id")) is str
+            and type(get("name")) is str
+            and type(get("description")) is str
+            and type(labels[0]) is str
+            and type(labels[1]) is str
+            and (type(price) is float or type(price) is int)
+            and type(get("stock")) is int
+            and type(get("releaseDate")) is int
+            and (warranty is None or type(warranty) is int)
+            and (specifications is None or type(specifications) is dict)
+            and (images is None or type(images) is dict)
+            and (
+                options is None
+                or (type(options) is list and all(type(o) is str for o in options))
+            )
+            and TEXT_TYPES.issuperset(map(type, labels))
+        ):
+            # Missing fields, wrong types or coercible values ("12.5")
+            data = ProductModel(**data).__dict__
+            get = data.get
+            price = data["price"]
+            options = data["connectivityOptions"]
+            labels = [get(field) for field in INTERNED_FIELDS]
+
+        self.id = get("id")
+        self.name = get("name")
+        self.description = get("description")
+        self.price = float(price)
+        self.stock = get("stock")
+        self.warrantyPeriod = get("warrantyPeriod")
+        self.releaseDate = get("releaseDate")
+        self.specifications = get("specifications")
+        self.images = get("images")
+        self.connectivityOptions = (
+            tuple([intern(o) for o in options]) if options is not None else None
+        )
+        (
+            self.brand,
+            self.category,
+            self.model,
+            self.processor,
+            self.ram,
+            self.storageType,
+            self.storageCapacity,
+            self.graphicsCard,
+            self.operatingSystem,
+            self.printingTechnology,
+        ) = [intern(label) if label is not None else None for label in labels]
+
+    def __repr__(self) -> str:
+        return f"Product(id={self.id!r}, name={self.name!r})"
+
+
+@contextmanager
+def gc_paused():
+    """Skip the collector passes triggered by allocating a whole catalog;
+    nothing built while decoding and parsing forms reference cycles"""
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def parse_products(items: List[Dict]) -> List[Product]:
+    """Build catalog records from decoded backend JSON"""
+    from_dict = Product.from_dict
+    with gc_paused():
+        return [from_dict(item) for item in items]
+
+
+def load_products(body: bytes, loads: Callable[[bytes], Any] = json.loads) -> List[Product]:
+    """Decode a catalog response body and build its records in one pass"""
+    with gc_paused():
+        return parse_products(loads(body))
+
+
+def _elapsed_ms(start: float) -> float:
+    return round((time.perf_counter() - start) * 1000, 1)
 
 
 class ProductClient:
-    def __init__(self, base_url: str = "http://localhost:8081/api"):
+    def __init__(
+        self,
+        base_url: str = "http://localhost:8081/api",
+        max_connections: Optional[int] = None,
+        max_keepalive_connections: Optional[int] = None,
+        keepalive_expiry: Optional[float] = None,
+        http2: Optional[bool] = None,
+        timeout: Optional[float] = None,
+        connect_timeout: Optional[float] = None,
+        retries: Optional[int] = None,
+        retry_backoff: Optional[float] = None,
+    ):
         self.base_url = base_url
-        self.client = httpx.Client(timeout=10.0)
-        logger.info(f"ProductClient initialized with base URL: {base_url}")
+        if max_connections is None:
+            max_connections = int(os.getenv("PRODUCT_CLIENT_MAX_CONNECTIONS", "100"))
+        if max_keepalive_connections is None:
+            max_keepalive_connections = int(os.getenv("PRODUCT_CLIENT_MAX_KEEPALIVE", "20"))
+        if keepalive_expiry is None:
+            keepalive_expiry = float(os.getenv("PRODUCT_CLIENT_KEEPALIVE_EXPIRY", "30"))
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        if http2 is None:
+            http2 = os.getenv("PRODUCT_CLIENT_HTTP2", "false").lower() == "true"
+        self.http2 = http2
+        if timeout is None:
+            timeout = float(os.getenv("PRODUCT_CLIENT_READ_TIMEOUT", "10"))
+        if connect_timeout is None:
+            connect_timeout = float(os.getenv("PRODUCT_CLIENT_CONNECT_TIMEOUT", "2"))
+        self.timeout = httpx.Timeout(timeout, connect=connect_timeout)
+        if retries is None:
+            retries = int(os.getenv("PRODUCT_CLIENT_RETRIES", "2"))
+        self.retries = retries
+        if retry_backoff is None:
+            retry_backoff = float(os.getenv("PRODUCT_CLIENT_RETRY_BACKOFF", "0.2"))
+        self.retry_backoff = retry_backoff
+        self.breaker = CircuitBreaker(
+            failure_threshold=int(os.getenv("PRODUCT_CLIENT_BREAKER_THRESHOLD", "5")),
+            reset_timeout=float(os.getenv("PRODUCT_CLIENT_BREAKER_RESET", "30")),
+        )
+        self.retried = 0
+        # Decoder of response bodies, replaceable to count or time decodes
+        self.loads: Callable[[bytes], Any] = json.loads
+        self.client: Optional[httpx.AsyncClient] = None
+        # Validators and parsed body of the last full catalog response
+        self._etag: Optional[str] = None
+        self._last_modified: Optional[str] = None
+        self._products: Optional[List[Product]] = None
+        logger.info("ProductClient initialized with base URL: %s", base_url)
+
+    async def start(self):
+        """Open the shared connection pool"""
+        if self.client is not None:
+            return
+        try:
+            self.client = httpx.AsyncClient(
+                limits=self.limits, http2=self.http2, timeout=self.timeout
+            )
+        except ImportError:
+            logger.warning("HTTP/2 requested but 'h2' is not installed, using HTTP/1.1")
+            self.http2 = False
+            self.client = httpx.AsyncClient(limits=self.limits, timeout=self.timeout)
+        logger.info("ProductClient connection pool started (http2=%s)", self.http2)
+
+    async def close(self):
+        """Close the shared connection pool"""
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
+            logger.info("ProductClient connection pool closed")
+
+    async def _get_client(self) -> httpx.AsyncClient:
+        # Callers outside the FastAPI lifespan (scripts, tests) start lazily
+        if self.client is None:
+            await self.start()
+        return self.client
+
+    async def _get(self, url: str, headers: Optional[Dict] = None) -> httpx.Response:
+        """GET with jittered exponential backoff behind the circuit breaker.
 
+        Network errors and 429/5xx gateway statuses are retried; the
+        response of the last attempt is returned for the caller to check.
+        """
+        self.breaker.check()
+        client = await self._get_client()
+        for attempt in range(self.retries + 1):
+            try:
+                response = await client.get(url, headers=headers)
+                if response.status_code not in RETRY_STATUSES and response.status_code < 500:
+                    self.breaker.record_success()
+                    return response
+                if attempt == self.retries:
+                    self.breaker.record_failure()
+                    return response
+                logger.warning("GET %s returned %s, retrying", url, response.status_code)
+            except httpx.RequestError as e:
+                if attempt == self.retries:
+                    self.breaker.record_failure()
+                    raise
+                logger.warning("GET %s failed (%s), retrying", url, type(e).__name__)
+            self.retried += 1
+            # Full jitter keeps many clients from retrying in lockstep
+            await asyncio.sleep(random.uniform(0, self.retry_backoff * 2**attempt))
+
+    def stats(self) -> Dict:
+        return dict(self.breaker.stats(), retries=self.retried)
+
+    @metrics.timed("product_client.get_products")
     async def get_products(self) -> List[Product]:
         """Fetch all products from the backend API"""
-        logger.info("Attempting to fetch products from backend")
+        start = time.perf_counter()
         try:
-            async with httpx.AsyncClient() as client:
-                logger.info(f"Making GET request to {self.base_url}/products")
-                response = await client.get(f"{self.base_url}/products")
-                logger.info(f"Response status code: {response.status_code}")
+            headers = {}
+            if self._products is not None:
+                if self._etag:
+                    headers["If-None-Match"] = self._etag
+                if self._last_modified:
+                    headers["If-Modified-Since"] = self._last_modified
 
-                response.raise_for_status()
-                products_data = response.json()
-                logger.info(f"Successfully fetched {len(products_data)} products")
-                logger.debug(f"Raw products data: {products_data}")
+            response = await self._get(f"{self.base_url}/products", headers)
 
-                products = [Product(**product) for product in products_data]
-                logger.info("Successfully parsed all products")
-                return products
+            if response.status_code == 304 and self._products is not None:
+                if sampled():
+                    logger.info(
+                        "Product catalog not modified, reusing parsed products",
+                        extra={"status": 304, "elapsed_ms": _elapsed_ms(start)},
+                    )
+                return self._products
 
+            response.raise_for_status()
+            # Decode the raw bytes directly, without httpx's text round trip
+            with metrics.span("product_client.parse"):
+                products = load_products(response.content, self.loads)
+            logger.info(
+                "Fetched and parsed the product catalog",
+                extra={
+                    "status": response.status_code,
+                    "products": len(products),
+                    "bytes": len(response.content),
+                    "elapsed_ms": _elapsed_ms(start),
+                },
+            )
+            self._etag = response.headers.get("ETag")
+            self._last_modified = response.headers.get("Last-Modified")
+            self._products = products
+            return products
+
+        except CircuitOpenError as e:
+            logger.warning("Not fetching products: %s", e)
+            return []
         except httpx.RequestError as e:
-            logger.error(f"Network error while fetching products: {str(e)}")
+            logger.error("Network error while fetching products: %s", e)
             return []
         except httpx.HTTPStatusError as e:
             logger.error(
-                f"HTTP error while fetching products: {e.response.status_code} - {e.response.text}"
+                "HTTP error while fetching products: %s - %s",
+                e.response.status_code,
+                e.response.text,
             )
             return []
         except Exception as e:
-            logger.error(f"Unexpected error while fetching products: {str(e)}")
-            if hasattr(e, "__traceback__"):
-                logger.error(f"Traceback: ", exc_info=True)
+            logger.error("Unexpected error while fetching products: %s", e, exc_info=True)
             return []
 
     async def get_product(self, product_id: str) -> Optional[Product]:
         """Fetch a specific product by ID"""
-        logger.info(f"Attempting to fetch product with ID: {product_id}")
+        start = time.perf_counter()
         try:
-            async with httpx.AsyncClient() as client:
+            response = await self._get(f"{self.base_url}/products/{product_id}")
+            response.raise_for_status()
+            product_data = self.loads(response.content)
+            logger.debug("Raw product data: %s", product_data)
+
+            product = Product.from_dict(product_data)
+            if sampled():
                 logger.info(
-                    f"Making GET request to {self.base_url}/products/{product_id}"
+                    "Fetched product",
+                    extra={
+                        "product_id": product_id,
+                        "status": response.status_code,
+                        "elapsed_ms": _elapsed_ms(start),
+                    },
                 )
-                response = await client.get(f"{self.base_url}/products/{product_id}")
-                logger.info(f"Response status code: {response.status_code}")
-
-                response.raise_for_status()
-                product_data = response.json()
-                logger.info("Successfully fetched product data")
-                logger.debug(f"Raw product data: {product_data}")
-
-                product = Product(**product_data)
-                logger.info("Successfully parsed product")
-                return product
+            return product
 
+        except CircuitOpenError as e:
+            logger.warning("Not fetching product %s: %s", product_id, e)
+            return None
         except httpx.RequestError as e:
-            logger.error(f"Network error while fetching product {product_id}: {str(e)}")
+            logger.error("Network error while fetching product %s: %s", product_id, e)
             return None
         except httpx.HTTPStatusError as e:
             logger.error(
-                f"HTTP error while fetching product {product_id}: {e.response.status_code} - {e.response.text}"
+                "HTTP error while fetching product %s: %s - %s",
+                product_id,
+                e.response.status_code,
+                e.response.text,
             )
             return None
         except Exception as e:
             logger.error(
-                f"Unexpected error while fetching product {product_id}: {str(e)}"
+                "Unexpected error while fetching product %s: %s", product_id, e, exc_info=True
             )
-            if hasattr(e, "__traceback__"):
-                logger.error(f"Traceback: ", exc_info=True)
             return None
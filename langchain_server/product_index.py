@@ -0,0 +1,369 @@
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Set, Tuple
+from product_client import Product, logger
+from collections import Counter
+import math
+import re
+import unicodedata
+import numpy as np
+
+if TYPE_CHECKING:
+    from catalog_cache import CatalogDiff
+
+TOKEN_RE = re.compile(r"\w+")
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """Lowercase, accent-insensitive word tokens ("Impresión" -> "impresion")"""
+    if not text:
+        return []
+    text = text.lower()
+    if not text.isascii():
+        text = unicodedata.normalize("NFKD", text)
+        text = "".join(c for c in text if not unicodedata.combining(c))
+    return TOKEN_RE.findall(text)
+
+
+def tokenize_key(text: str) -> str:
+    return " ".join(tokenize(text))
+
+
+def content_key(p: Product) -> int:
+    """Hash of the product fields shown to users and indexed for search"""
+    return hash((text_key(p), p.price, p.stock))
+
+
+def text_key(p: Product) -> int:
+    """Hash of the product fields that are tokenized or categorised, i.e.
+    everything in ``content_key`` but price and stock"""
+    return hash(
+        (
+            p.name,
+            p.brand,
+            p.model,
+            p.description,
+            p.category,
+            p.processor,
+            p.ram,
+            p.storageCapacity,
+            p.storageType,
+            p.graphicsCard,
+            p.operatingSystem,
+            p.printingTechnology,
+            tuple(p.connectivityOptions or ()),
+        )
+    )
+
+
+def searchable_text(p: Product) -> str:
+    return " ".join(
+        filter(
+            None,
+            (
+                p.name,
+                p.brand,
+                p.model,
+                p.description,
+                p.processor,
+                p.graphicsCard,
+                p.ram,
+                p.storageType,
+                p.storageCapacity,
+                p.printingTechnology,
+                " ".join(p.connectivityOptions or ()),
+            ),
+        )
+    )
+
+
+class ProductIndex:
+    """BM25 inverted index with sorted price/stock indexes over the catalog.
+
+    Every product occupies a row in contiguous NumPy arrays (price, stock,
+    category, document length). Posting lists map a term to the rows that
+    contain it and are compiled to arrays of precomputed BM25 weights on first
+    use, so a query costs a few vector operations per term. ``update()`` diffs a new catalog against
+    the indexed one and only touches the rows of products that changed; a
+    product whose text is unchanged has its price and stock updated in place.
+    """
+
+    k1 = 1.2
+    b = 0.75
+
+    def __init__(self, products: Iterable[Product] = ()):
+        self._rows: Dict[str, int] = {}
+        self._products: List[Optional[Product]] = []
+        self._keys: List[Optional[int]] = []
+        self._text_keys: List[Optional[int]] = []
+        self._doc_terms: List[Tuple[str, ...]] = []
+        self._free: List[int] = []
+        self._postings: Dict[str, Dict[int, int]] = {}
+        # Once copied, the terms whose postings this index has made its own
+        self._owned: Optional[Set[str]] = None
+        self._compiled: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        self._sorted: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        self._category_codes: Dict[str, int] = {}
+        self._category_names: List[str] = []
+        self._total_length = 0
+        self._size = 0
+        self._allocate(0)
+        self.update(products)
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def copy(self) -> "ProductIndex":
+        """An independent copy, to update while readers use this one"""
+        clone = ProductIndex.__new__(ProductIndex)
+        clone.__dict__.update(self.__dict__)
+        for name in ("_products", "_keys", "_text_keys", "_doc_terms", "_free", "_category_names"):
+            setattr(clone, name, list(getattr(self, name)))
+        for name in ("_rows", "_postings", "_compiled", "_sorted", "_category_codes"):
+            setattr(clone, name, dict(getattr(self, name)))
+        # Both sides copy a term's postings before changing them
+        self._owned, clone._owned = set(), set()
+        for name in ("price", "stock", "category", "doc_len", "alive"):
+            setattr(clone, name, getattr(self, name).copy())
+        return clone
+
+    def categories(self) -> List[str]:
+        n = self._size
+        used = set(self.category[:n][self.alive[:n]].tolist())
+        return sorted(self._category_names[code] for code in used)
+
+    def update(
+        self, products: Iterable[Product], diff: Optional["CatalogDiff"] = None
+    ) -> Tuple[int, int, int]:
+        """Bring the index in line with a catalog, re-indexing only the
+        products that were added, changed or removed. With the catalog's
+        ``diff`` since the indexed version, only the products it names are
+        looked at and ``products`` may hold just the added and changed ones."""
+        if diff is not None:
+            touched = set(diff.added).union(diff.changed)
+            products = [p for p in products if p.id in touched]
+        seen = set()
+        added = changed = repriced = 0
+        for p in products:
+            seen.add(p.id)
+            key = content_key(p)
+            row = self._rows.get(p.id)
+            if row is None:
+                self._add(p, key)
+                added += 1
+            elif self._keys[row] == key:
+                self._products[row] = p
+            elif self._text_keys[row] == text_key(p):
+                # Only price or stock changed: the postings stay valid
+                self._products[row] = p
+                self._keys[row] = key
+                self.price[row] = p.price
+                self.stock[row] = p.stock
+                repriced += 1
+            else:
+                self._remove(p.id)
+                self._add(p, key)
+                changed += 1
+
+        if diff is None:
+            removed = [pid for pid in self._rows if pid not in seen]
+        else:
+            removed = [pid for pid in diff.removed if pid in self._rows]
+        for pid in removed:
+            self._remove(pid)
+
+        if added or changed or removed:
+            # Term weights depend on the average document length
+            self._compiled.clear()
+        if added or changed or repriced or removed:
+            self._sorted.clear()
+            logger.info(
+                "Product index updated: %d added, %d changed, %d removed, %d indexed",
+                added,
+                changed + repriced,
+                len(removed),
+                len(self),
+            )
+        return added, changed + repriced, len(removed)
+
+    def search(
+        self,
+        query: Optional[str] = None,
+        category: Optional[str] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        in_stock: bool = False,
+        limit: int = 10,
+    ) -> Tuple[int, List[Product]]:
+        """Return the number of matches and the best ``limit`` of them.
+
+        With a query, matches are ranked by BM25 score; without one they are
+        listed cheapest first.
+        """
+        n = self._size
+        terms = set(tokenize(query))
+        scores = None
+
+        if terms:
+            scores = self._score(terms)
+            mask = scores > 0
+        else:
+            mask = self.alive[:n].copy()
+
+        if category:
+            code = self._category_codes.get(tokenize_key(category))
+            if code is None:
+                return 0, []
+            mask &= self.category[:n] == code
+        if min_price is not None or max_price is not None:
+            mask &= self._range_mask("price", min_price, max_price)
+        if in_stock:
+            mask &= self._range_mask("stock", 1, None)
+
+        total = int(mask.sum())
+        if not total or limit <= 0:
+            return total, []
+
+        if scores is not None:
+            rows = np.flatnonzero(mask)
+            if len(rows) > limit:
+                top = np.argpartition(-scores[rows], limit - 1)[:limit]
+                rows = rows[top]
+            rows = rows[np.argsort(-scores[rows], kind="stable")]
+        else:
+            _, by_price = self._sorted_index("price")
+            rows = by_price[mask[by_price]][:limit]
+
+        return total, [self._products[row] for row in rows.tolist()]
+
+    def _score(self, terms) -> np.ndarray:
+        scores = np.zeros(self._size, dtype=np.float32)
+        docs = len(self)
+        for term in terms:
+            compiled = self._postings_array(term)
+            if compiled is None:
+                continue
+            rows, weights = compiled
+            df = len(rows)
+            idf = math.log(1 + (docs - df + 0.5) / (df + 0.5))
+            scores[rows] += np.float32(idf) * weights
+        return scores
+
+    def _postings_array(self, term: str) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """Rows containing a term and their BM25 term-frequency weights"""
+        compiled = self._compiled.get(term)
+        if compiled is None:
+            postings = self._postings.get(term)
+            if not postings:
+                return None
+            rows = np.fromiter(postings.keys(), dtype=np.intp, count=len(postings))
+            tf = np.fromiter(postings.values(), dtype=np.float32, count=len(postings))
+            avgdl = self._total_length / len(self)
+            norm = self.k1 * (1 - self.b + self.b * self.doc_len[rows] / avgdl)
+            compiled = (rows, (tf * (self.k1 + 1) / (tf + norm)).astype(np.float32))
+            self._compiled[term] = compiled
+        return compiled
+
+    def _sorted_index(self, field: str) -> Tuple[np.ndarray, np.ndarray]:
+        """Values and rows of live products, sorted by a numeric field"""
+        if field not in self._sorted:
+            rows = np.flatnonzero(self.alive[: self._size])
+            values = getattr(self, field)[rows]
+            order = np.argsort(values, kind="stable")
+            self._sorted[field] = (values[order], rows[order])
+        return self._sorted[field]
+
+    def _range_mask(self, field: str, low, high) -> np.ndarray:
+        values, rows = self._sorted_index(field)
+        start = 0 if low is None else np.searchsorted(values, low, side="left")
+        end = len(values) if high is None else np.searchsorted(values, high, side="right")
+
+        # Selective ranges only touch their slice of the sorted index; wide
+        # ones are cheaper as a single comparison over the column
+        if (end - start) * 8 < len(values):
+            mask = np.zeros(self._size, dtype=bool)
+            mask[rows[start:end]] = True
+            return mask
+
+        column = getattr(self, field)[: self._size]
+        mask = self.alive[: self._size].copy()
+        if low is not None:
+            mask &= column >= low
+        if high is not None:
+            mask &= column <= high
+        return mask
+
+    def _allocate(self, capacity: int):
+        def grow(name, dtype):
+            array = np.zeros(capacity, dtype=dtype)
+            old = getattr(self, name, None)
+            if old is not None:
+                array[: len(old)] = old
+            setattr(self, name, array)
+
+        grow("price", np.float64)
+        grow("stock", np.int64)
+        grow("category", np.int32)
+        grow("doc_len", np.float32)
+        grow("alive", bool)
+
+    def _add(self, p: Product, key: int):
+        if self._free:
+            row = self._free.pop()
+        else:
+            row = self._size
+            if row >= len(self.price):
+                self._allocate(max(1024, 2 * len(self.price)))
+            self._size += 1
+            self._products.append(None)
+            self._keys.append(None)
+            self._text_keys.append(None)
+            self._doc_terms.append(())
+
+        terms = Counter(tokenize(searchable_text(p)))
+        for term, tf in terms.items():
+            self._own_postings(term)[row] = tf
+
+        category = tokenize_key(p.category)
+        if category not in self._category_codes:
+            self._category_codes[category] = len(self._category_names)
+            self._category_names.append(p.category)
+
+        self._rows[p.id] = row
+        self._products[row] = p
+        self._keys[row] = key
+        self._text_keys[row] = text_key(p)
+        self._doc_terms[row] = tuple(terms)
+        length = sum(terms.values())
+        self._total_length += length
+        self.doc_len[row] = length
+        self.price[row] = p.price
+        self.stock[row] = p.stock
+        self.category[row] = self._category_codes[category]
+        self.alive[row] = True
+
+    def _own_postings(self, term: str) -> Dict[int, int]:
+        postings = self._postings.get(term)
+        if postings is None:
+            postings = self._postings[term] = {}
+        elif self._owned is not None and term not in self._owned:
+            postings = self._postings[term] = dict(postings)
+        else:
+            return postings
+        if self._owned is not None:
+            self._owned.add(term)
+        return postings
+
+    def _remove(self, product_id: str):
+        row = self._rows.pop(product_id)
+        for term in self._doc_terms[row]:
+            postings = self._own_postings(term)
+            del postings[row]
+            if not postings:
+                del self._postings[term]
+
+        self._total_length -= int(self.doc_len[row])
+        self._products[row] = None
+        self._keys[row] = None
+        self._text_keys[row] = None
+        self._doc_terms[row] = ()
+        self.alive[row] = False
+        self._free.append(row)
@@ -0,0 +1,166 @@
+from typing import Dict, List, Optional, Tuple
+from collections import OrderedDict
+from langchain_core.embeddings import Embeddings
+from product_client import logger
+from product_index import tokenize
+import time
+import numpy as np
+
+
+def normalise_query(text: str) -> str:
+    """Lowercase, accent-folded words of a question, without punctuation"""
+    return " ".join(tokenize(text))
+
+
+class CachedResponse:
+    __slots__ = ("answer", "stored_at", "vector")
+
+    def __init__(self, answer: str, vector: Optional[np.ndarray]):
+        self.answer = answer
+        self.stored_at = time.monotonic()
+        self.vector = vector
+
+
+class ResponseCache:
+    """Answers to standalone questions, reused while the catalog is unchanged.
+
+    Entries are keyed on the normalised question and belong to one catalog
+    version; the whole cache is dropped as soon as a newer version is seen.
+    Lookups and answers for an older version, from turns that started
+    before the change, are ignored. It
+    holds at most ``max_entries`` answers in least-recently-used order, each
+    for up to ``ttl`` seconds. With a ``similarity`` threshold above zero, a
+    question without an exact match may reuse the answer of the cached
+    question whose embedding is at least that similar.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1000,
+        ttl: float = 300.0,
+        similarity: float = 0.0,
+        embeddings: Optional[Embeddings] = None,
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.similarity = similarity
+        self.embeddings = embeddings if similarity > 0 else None
+        self.version = None
+        self._entries: "OrderedDict[str, CachedResponse]" = OrderedDict()
+        # Stacked entry vectors for similarity lookups, rebuilt after changes
+        self._matrix: Optional[Tuple[List[str], np.ndarray]] = None
+        self.hits = 0
+        self.similar_hits = 0
+        self.misses = 0
+        self.evicted = 0
+        self.expired = 0
+        self.invalidations = 0
+        self.miss_seconds = 0.0
+        self.saved_seconds = 0.0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, question: str, version: int) -> Optional[str]:
+        """Return a cached answer for the question, or None"""
+        self._check_version(version)
+        if version != self.version:
+            # The turn read the catalog before it changed
+            self.misses += 1
+            return None
+        key = normalise_query(question)
+        entry = self._entries.get(key)
+        similar = False
+        if entry is None and self.embeddings is not None:
+            key = self._most_similar(question)
+            entry = self._entries.get(key) if key is not None else None
+            similar = entry is not None
+        if entry is not None and time.monotonic() - entry.stored_at > self.ttl:
+            self._drop(key)
+            self.expired += 1
+            entry = None
+
+        if entry is None:
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        self.similar_hits += similar
+        # A hit saves what an average miss costs
+        if self.misses:
+            self.saved_seconds += self.miss_seconds / self.misses
+        return entry.answer
+
+    def put(self, question: str, version: int, answer: str, elapsed: float = 0.0):
+        """Store the answer to a question that missed, and what it cost"""
+        self.miss_seconds += elapsed
+        if version != self.version:
+            # The catalog changed while the answer was being produced
+            return
+        key = normalise_query(question)
+        if not key:
+            return
+        vector = None
+        if self.embeddings is not None:
+            vector = self._normalise(self.embeddings.embed_query(question))
+        self._entries[key] = CachedResponse(answer, vector)
+        self._entries.move_to_end(key)
+        self._matrix = None
+        while len(self._entries) > self.max_entries:
+            self._drop(next(iter(self._entries)))
+            self.evicted += 1
+
+    def clear(self):
+        self._entries.clear()
+        self._matrix = None
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "similar_hits": self.similar_hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evicted": self.evicted,
+            "expired": self.expired,
+            "invalidations": self.invalidations,
+            "average_miss_seconds": (
+                round(self.miss_seconds / self.misses, 4) if self.misses else 0.0
+            ),
+            "latency_saved_seconds": round(self.saved_seconds, 3),
+        }
+
+    def _check_version(self, version: int):
+        """Drop every entry when the catalog moves to a newer version"""
+        if self.version is not None and version <= self.version:
+            return
+        if self._entries:
+            self.invalidations += 1
+            logger.info(
+                "Catalog changed, dropping %d cached responses", len(self._entries)
+            )
+        self.clear()
+        self.version = version
+
+    def _most_similar(self, question: str) -> Optional[str]:
+        if not self._entries:
+            return None
+        if self._matrix is None:
+            keys = list(self._entries)
+            self._matrix = (keys, np.stack([self._entries[k].vector for k in keys]))
+        keys, matrix = self._matrix
+        scores = matrix @ self._normalise(self.embeddings.embed_query(question))
+        best = int(np.argmax(scores))
+        return keys[best] if scores[best] >= self.similarity else None
+
+    @staticmethod
+    def _normalise(vector) -> np.ndarray:
+        vector = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _drop(self, key: str):
+        del self._entries[key]
+        self._matrix = None
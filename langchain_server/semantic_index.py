@@ -0,0 +1,205 @@
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Sequence, Tuple
+from langchain_core.embeddings import Embeddings
+from product_client import Product, logger
+from product_index import searchable_text, tokenize
+import zlib
+import numpy as np
+
+if TYPE_CHECKING:
+    from catalog_cache import CatalogDiff
+
+
+def embedded_text(p: Product) -> str:
+    """The text a product's vector is computed from"""
+    return f"{p.category} {searchable_text(p)}"
+
+
+class HashingEmbedder(Embeddings):
+    """Deterministic, offline embeddings using the hashing trick.
+
+    Words and their character trigrams are hashed into a fixed number of
+    signed buckets, which makes the vectors tolerant to typos and inflections
+    without any model download. Any LangChain ``Embeddings`` implementation
+    can be used in its place for real semantic matching.
+    """
+
+    def __init__(self, dimensions: int = 256):
+        self.dimensions = dimensions
+
+    def _features(self, text: str) -> Iterable[Tuple[str, float]]:
+        for word in tokenize(text):
+            yield word, 1.0
+            padded = f"#{word}#"
+            for i in range(len(padded) - 2):
+                yield padded[i : i + 3], 0.5
+
+    def _embed(self, text: str) -> np.ndarray:
+        buckets = []
+        weights = []
+        for feature, weight in self._features(text):
+            h = zlib.crc32(feature.encode())
+            buckets.append(h % self.dimensions)
+            weights.append(weight if h & 0x80000000 else -weight)
+        return np.bincount(buckets, weights, minlength=self.dimensions).astype(
+            np.float32
+        )
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self._embed(text).tolist() for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed(text).tolist()
+
+
+class SemanticIndex:
+    """Cosine-similarity index over product embeddings.
+
+    Vectors are L2-normalised rows of one contiguous float32 matrix, so a
+    batch of queries is scored with a single matrix multiplication. Products
+    are only re-embedded when the text they are embedded from changes, so a
+    new price or stock level costs nothing.
+    """
+
+    # Documents embedded per call
+    batch_size = 512
+
+    def __init__(self, embeddings: Optional[Embeddings] = None):
+        self.embeddings = embeddings or HashingEmbedder()
+        self._rows: Dict[str, int] = {}
+        self._products: List[Optional[Product]] = []
+        self._keys: List[Optional[int]] = []
+        self._free: List[int] = []
+        self._size = 0
+        self.matrix: Optional[np.ndarray] = None
+        self.alive = np.zeros(0, dtype=bool)
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def copy(self) -> "SemanticIndex":
+        """An independent copy, to update while readers use this one"""
+        clone = SemanticIndex.__new__(SemanticIndex)
+        clone.__dict__.update(self.__dict__)
+        clone._rows = dict(self._rows)
+        clone._products = list(self._products)
+        clone._keys = list(self._keys)
+        clone._free = list(self._free)
+        if self.matrix is not None:
+            # In slices, so a copy made in a worker thread lets the loop run
+            clone.matrix = np.empty_like(self.matrix)
+            for start in range(0, len(self.matrix), 8192):
+                clone.matrix[start : start + 8192] = self.matrix[start : start + 8192]
+        clone.alive = self.alive.copy()
+        return clone
+
+    def update(
+        self, products: Iterable[Product], diff: Optional["CatalogDiff"] = None
+    ) -> int:
+        """Embed new and changed products, drop removed ones; returns the
+        number of products embedded. With the catalog's ``diff`` since the
+        indexed version, only the products it names are looked at and
+        ``products`` may hold just the added and changed ones."""
+        if diff is not None:
+            touched = set(diff.added).union(diff.changed)
+            products = [p for p in products if p.id in touched]
+        seen = set()
+        pending: List[Tuple[Product, int, str]] = []
+        for p in products:
+            seen.add(p.id)
+            text = embedded_text(p)
+            key = hash(text)
+            row = self._rows.get(p.id)
+            if row is None or self._keys[row] != key:
+                pending.append((p, key, text))
+            else:
+                self._products[row] = p
+
+        if diff is None:
+            removed = [pid for pid in self._rows if pid not in seen]
+        else:
+            removed = [pid for pid in diff.removed if pid in self._rows]
+        for pid in removed:
+            row = self._rows.pop(pid)
+            self._products[row] = None
+            self._keys[row] = None
+            self.alive[row] = False
+            self._free.append(row)
+
+        # In batches, so a build in a worker thread never holds the GIL for long
+        for start in range(0, len(pending), self.batch_size):
+            batch = pending[start : start + self.batch_size]
+            vectors = self._embed_documents([text for _, _, text in batch])
+            for (p, key, _), vector in zip(batch, vectors):
+                row = self._rows.get(p.id)
+                if row is None:
+                    row = self._allocate_row(len(vector))
+                    self._rows[p.id] = row
+                self.matrix[row] = vector
+                self._products[row] = p
+                self._keys[row] = key
+                self.alive[row] = True
+        if pending:
+            logger.info(
+                "Semantic index embedded %d products, %d indexed", len(pending), len(self)
+            )
+        return len(pending)
+
+    def search(self, query: str, limit: int = 10) -> List[Tuple[Product, float]]:
+        return self.search_batch([query], limit)[0]
+
+    def search_batch(
+        self, queries: Sequence[str], limit: int = 10
+    ) -> List[List[Tuple[Product, float]]]:
+        """Top ``limit`` products by cosine similarity for each query"""
+        if not len(self) or not queries:
+            return [[] for _ in queries]
+
+        n = self._size
+        q = self._normalise(
+            np.asarray(
+                [self.embeddings.embed_query(query) for query in queries],
+                dtype=np.float32,
+            )
+        )
+        scores = q @ self.matrix[:n].T
+        scores[:, ~self.alive[:n]] = -np.inf
+
+        k = min(limit, len(self))
+        results = []
+        for row_scores in scores:
+            top = np.argpartition(-row_scores, k - 1)[:k]
+            top = top[np.argsort(-row_scores[top], kind="stable")]
+            results.append(
+                [(self._products[row], float(row_scores[row])) for row in top.tolist()]
+            )
+        return results
+
+    def _embed_documents(self, texts: List[str]) -> np.ndarray:
+        return self._normalise(
+            np.asarray(self.embeddings.embed_documents(texts), dtype=np.float32)
+        )
+
+    @staticmethod
+    def _normalise(vectors: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+    def _allocate_row(self, dimensions: int) -> int:
+        if self._free:
+            return self._free.pop()
+
+        row = self._size
+        if self.matrix is None or row >= len(self.matrix):
+            capacity = max(1024, 2 * row)
+            matrix = np.zeros((capacity, dimensions), dtype=np.float32)
+            alive = np.zeros(capacity, dtype=bool)
+            if self.matrix is not None:
+                matrix[:row] = self.matrix[:row]
+                alive[:row] = self.alive[:row]
+            self.matrix, self.alive = matrix, alive
+
+        self._size += 1
+        self._products.append(None)
+        self._keys.append(None)
+        return row
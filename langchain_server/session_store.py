@@ -0,0 +1,392 @@
+from typing import Dict, Iterable, List, Optional, Tuple
+from collections import OrderedDict, deque
+from langchain_core.messages import BaseMessage, message_to_dict, messages_from_dict
+from product_client import logger
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+
+
+def message_size(message: BaseMessage) -> int:
+    content = message.content
+    return len(content) if isinstance(content, str) else len(str(content))
+
+
+class Session:
+    __slots__ = ("messages", "created", "last_access", "size")
+
+    def __init__(self):
+        self.messages: deque = deque()
+        self.created = self.last_access = time.monotonic()
+        self.size = 0
+
+
+class SessionStore:
+    """Bounded in-memory conversation history.
+
+    Sessions are kept in least-recently-used order. The store holds at most
+    ``max_sessions`` sessions, drops sessions idle for longer than
+    ``idle_ttl`` seconds and keeps only the last ``max_messages`` messages of
+    each conversation.
+    """
+
+    def __init__(
+        self,
+        max_sessions: int = 10000,
+        idle_ttl: float = 3600.0,
+        max_messages: int = 10,
+    ):
+        self.max_sessions = max_sessions
+        self.idle_ttl = idle_ttl
+        self.max_messages = max_messages
+        self._sessions: "OrderedDict[str, Session]" = OrderedDict()
+        self.messages = 0
+        self.content_bytes = 0
+        self.evicted = 0
+        self.expired = 0
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def __contains__(self, session_id: str) -> bool:
+        return self._get(session_id) is not None
+
+    def get(self, session_id: str) -> List[BaseMessage]:
+        """Return the retained history of a session (empty if unknown)"""
+        session = self._get(session_id)
+        return list(session.messages) if session else []
+
+    def append(self, session_id: str, *messages: BaseMessage):
+        """Add messages to a session, creating it if needed"""
+        session = self._get_or_create(session_id)
+        for message in messages:
+            size = message_size(message)
+            session.messages.append(message)
+            session.size += size
+            self.messages += 1
+            self.content_bytes += size
+        while len(session.messages) > self.max_messages:
+            size = message_size(session.messages.popleft())
+            session.size -= size
+            self.messages -= 1
+            self.content_bytes -= size
+
+    def delete(self, session_id: str):
+        """Forget a session and its history"""
+        if session_id in self._sessions:
+            self._drop(session_id)
+
+    def load(self, session_id: str, messages: Iterable[BaseMessage]):
+        """Replace the history of a session, e.g. with a copy from storage"""
+        self.delete(session_id)
+        self.append(session_id, *messages)
+
+    def loaded_at(self, session_id: str) -> Optional[float]:
+        """When the session entered the store, or None if it is not held"""
+        session = self._sessions.get(session_id)
+        return session.created if session else None
+
+    async def ensure_loaded(self, session_id: str):
+        """Make the session's history available to ``get`` (held in memory
+        already)"""
+
+    async def start(self):
+        pass
+
+    async def close(self):
+        pass
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "sessions": len(self._sessions),
+            "messages": self.messages,
+            "content_bytes": self.content_bytes,
+            "evicted": self.evicted,
+            "expired": self.expired,
+            "max_sessions": self.max_sessions,
+        }
+
+    def _get_or_create(self, session_id: str) -> Session:
+        session = self._get(session_id)
+        if session is None:
+            self._expire_idle()
+            session = self._sessions[session_id] = Session()
+            while len(self._sessions) > self.max_sessions:
+                self._drop(next(iter(self._sessions)))
+                self.evicted += 1
+        return session
+
+    def _get(self, session_id: str) -> Optional[Session]:
+        session = self._sessions.get(session_id)
+        if session is None:
+            return None
+        now = time.monotonic()
+        if now - session.last_access > self.idle_ttl:
+            self._drop(session_id)
+            self.expired += 1
+            return None
+        session.last_access = now
+        self._sessions.move_to_end(session_id)
+        return session
+
+    def _expire_idle(self):
+        # Sessions are in access order, so idle ones are at the front
+        cutoff = time.monotonic() - self.idle_ttl
+        expired = 0
+        while self._sessions:
+            session_id, session = next(iter(self._sessions.items()))
+            if session.last_access >= cutoff:
+                break
+            self._drop(session_id)
+            expired += 1
+        if expired:
+            self.expired += expired
+            logger.info("Expired %d idle chat sessions", expired)
+
+    def _drop(self, session_id: str):
+        session = self._sessions.pop(session_id)
+        self.messages -= len(session.messages)
+        self.content_bytes -= session.size
+
+
+class SqliteSessionStore:
+    """Conversation history persisted to SQLite so it survives restarts and
+    is shared by every worker process.
+
+    Recently used sessions are held in a bounded ``SessionStore``.
+    ``ensure_loaded()`` fills it from the database in a worker thread and
+    re-reads a cached session after ``cache_ttl`` seconds so turns served by
+    another worker are picked up; ``get`` and ``append`` only touch the
+    cache. Appends and deletes are queued and written in order, in batches,
+    by a background task, so no database I/O runs on the event loop.
+    ``compact()`` trims every session to its history window and deletes
+    idle sessions.
+    """
+
+    def __init__(
+        self,
+        path: str = "sessions.db",
+        max_sessions: int = 10000,
+        idle_ttl: float = 3600.0,
+        max_messages: int = 10,
+        cache_ttl: float = 5.0,
+        batch_size: int = 256,
+        flush_interval: float = 0.05,
+        compact_interval: float = 300.0,
+    ):
+        self.path = path
+        self.idle_ttl = idle_ttl
+        self.max_messages = max_messages
+        self.cache_ttl = cache_ttl
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.compact_interval = compact_interval
+        self.cache = SessionStore(max_sessions, idle_ttl, max_messages)
+        # (session_id, created, message) rows; a None message deletes the session
+        self._pending: List[Tuple[str, float, Optional[str]]] = []
+        self._pending_lock = threading.Lock()
+        self._read_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._flusher: Optional[asyncio.Task] = None
+        self.loads = 0
+        self.flushes = 0
+        self.written = 0
+
+        self._reader = self._connect()
+        self._writer = self._connect()
+        with self._writer:
+            self._writer.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS messages (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    session_id TEXT NOT NULL,
+                    created REAL NOT NULL,
+                    message TEXT NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS messages_session
+                    ON messages (session_id, id);
+                """
+            )
+        logger.info("SQLite session store opened at %s", path)
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.path, check_same_thread=False)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        return connection
+
+    def __len__(self) -> int:
+        return len(self.cache)
+
+    def __contains__(self, session_id: str) -> bool:
+        return session_id in self.cache
+
+    def get(self, session_id: str) -> List[BaseMessage]:
+        return self.cache.get(session_id)
+
+    def append(self, session_id: str, *messages: BaseMessage):
+        self.cache.append(session_id, *messages)
+
+        now = time.time()
+        rows = [
+            (session_id, now, json.dumps(message_to_dict(message)))
+            for message in messages
+        ]
+        self._queue(rows, flush=False)
+
+    def delete(self, session_id: str):
+        self.cache.delete(session_id)
+        # Queued behind the session's pending appends, so none outlive it
+        self._queue([(session_id, time.time(), None)], flush=True)
+
+    def flush(self) -> int:
+        """Write buffered messages and deletes in one transaction, in the
+        order they were made; returns rows written"""
+        with self._pending_lock:
+            rows, self._pending = self._pending, []
+        if not rows:
+            return 0
+        written = 0
+        with self._write_lock, self._writer:
+            start = 0
+            for end, (session_id, _, message) in enumerate(rows + [(None, 0, None)]):
+                if message is not None:
+                    continue
+                self._writer.executemany(
+                    "INSERT INTO messages (session_id, created, message) VALUES (?, ?, ?)",
+                    rows[start:end],
+                )
+                written += end - start
+                start = end + 1
+                if session_id is not None:
+                    self._writer.execute(
+                        "DELETE FROM messages WHERE session_id = ?", (session_id,)
+                    )
+        self.flushes += 1
+        self.written += written
+        return written
+
+    def compact(self) -> int:
+        """Trim sessions to their history window and drop idle sessions"""
+        self.flush()
+        cutoff = time.time() - self.idle_ttl
+        with self._write_lock:
+            with self._writer:
+                removed = self._writer.execute(
+                    """
+                    DELETE FROM messages WHERE id IN (
+                        SELECT id FROM (
+                            SELECT id, ROW_NUMBER() OVER (
+                                PARTITION BY session_id ORDER BY id DESC
+                            ) AS position
+                            FROM messages
+                        ) WHERE position > ?
+                    )
+                    """,
+                    (self.max_messages,),
+                ).rowcount
+                removed += self._writer.execute(
+                    """
+                    DELETE FROM messages WHERE session_id IN (
+                        SELECT session_id FROM messages
+                        GROUP BY session_id HAVING MAX(created) < ?
+                    )
+                    """,
+                    (cutoff,),
+                ).rowcount
+            # Outside the transaction, which would keep the WAL in use
+            self._writer.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        if removed:
+            logger.info("Compacted session store, removed %d messages", removed)
+        return removed
+
+    async def start(self):
+        if self._flusher is None:
+            self._flusher = asyncio.create_task(self._flush_loop())
+
+    async def close(self):
+        if self._flusher is not None:
+            self._flusher.cancel()
+            try:
+                await self._flusher
+            except asyncio.CancelledError:
+                pass
+            self._flusher = None
+        await asyncio.to_thread(self.flush)
+        self._reader.close()
+        self._writer.close()
+
+    def stats(self) -> Dict[str, int]:
+        stats = self.cache.stats()
+        stats.update(
+            pending_writes=len(self._pending),
+            loads=self.loads,
+            flushes=self.flushes,
+            written=self.written,
+        )
+        return stats
+
+    async def _flush_loop(self):
+        last_compaction = time.monotonic()
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                if self._pending:
+                    await asyncio.to_thread(self.flush)
+                if time.monotonic() - last_compaction > self.compact_interval:
+                    last_compaction = time.monotonic()
+                    await asyncio.to_thread(self.compact)
+            except sqlite3.Error as e:
+                logger.error("Error writing session store: %s", e, exc_info=True)
+
+    async def ensure_loaded(self, session_id: str):
+        """Read the session from the database unless a fresh copy is cached"""
+        loaded_at = self.cache.loaded_at(session_id)
+        if loaded_at is not None and time.monotonic() - loaded_at < self.cache_ttl:
+            return
+        messages = await asyncio.to_thread(self._read, session_id)
+        self.cache.load(session_id, messages)
+        self.loads += 1
+
+    def _read(self, session_id: str) -> List[BaseMessage]:
+        # Our own buffered writes must be visible before re-reading
+        self.flush()
+        with self._read_lock:
+            rows = self._reader.execute(
+                """
+                SELECT message FROM messages WHERE session_id = ?
+                ORDER BY id DESC LIMIT ?
+                """,
+                (session_id, self.max_messages),
+            ).fetchall()
+        return messages_from_dict([json.loads(row[0]) for row in reversed(rows)])
+
+    def _queue(self, rows: List[Tuple[str, float, Optional[str]]], flush: bool):
+        with self._pending_lock:
+            self._pending.extend(rows)
+            pending = len(self._pending)
+        # Without a running flusher (scripts), write once a batch is full
+        if self._flusher is None and (flush or pending >= self.batch_size):
+            self.flush()
+
+
+def create_session_store():
+    """Build the session store selected by the SESSION_BACKEND setting"""
+    options = dict(
+        max_sessions=int(os.getenv("SESSION_MAX_COUNT", "10000")),
+        idle_ttl=float(os.getenv("SESSION_IDLE_TTL", "3600")),
+        max_messages=int(os.getenv("SESSION_HISTORY_WINDOW", "20")),
+    )
+    backend = os.getenv("SESSION_BACKEND", "memory").lower()
+    if backend == "sqlite":
+        return SqliteSessionStore(
+            path=os.getenv("SESSION_DB_PATH", "sessions.db"),
+            cache_ttl=float(os.getenv("SESSION_CACHE_TTL", "5")),
+            **options,
+        )
+    if backend != "memory":
+        logger.warning("Unknown SESSION_BACKEND '%s', using memory", backend)
+    return SessionStore(**options)
@@ -1,5 +1,7 @@
 from fastapi import WebSocket
 from chat_engine import ChatEngine
+from logging_config import sample_request
+from metrics import metrics
 import uuid
 
 
@@ -17,9 +19,26 @@ class WebSocketManager:
     def disconnect(self, session_id: str):
         if session_id in self.active_connections:
             del self.active_connections[session_id]
+        # Session ids are per connection, so the history can't be resumed
+        self.chat_engine.end_session(session_id)
 
+    @metrics.timed("websocket.process_message")
     async def process_message(
-        self, websocket: WebSocket, message: str, session_id: str
+        self, websocket: WebSocket, message: str, session_id: str, stream: bool = False
     ):
-        response = await self.chat_engine.process_message(message, session_id)
-        await websocket.send_json({"message": response})
+        # Each message is a request of its own for log sampling
+        sample_request()
+        if not stream:
+            response = await self.chat_engine.process_message(message, session_id)
+            with metrics.span("websocket.send"):
+                await websocket.send_json({"message": response})
+            return
+
+        # Streaming clients get the answer in chunks, then a "done" frame
+        chunks = []
+        async for chunk in self.chat_engine.stream_message(message, session_id):
+            chunks.append(chunk)
+            with metrics.span("websocket.send"):
+                await websocket.send_json({"type": "chunk", "content": chunk})
+        with metrics.span("websocket.send"):
+            await websocket.send_json({"type": "done", "message": "".join(chunks)})
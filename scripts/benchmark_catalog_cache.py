@@ -0,0 +1,56 @@
+import argparse
+import asyncio
+import logging
+import time
+
+from stubs import StubProductBackend, make_products
+from inventory import InventoryManager
+
+
+async def run(products: int, messages: int, concurrency: int, latency: float, ttl: float):
+    backend = StubProductBackend(make_products(products), latency=latency)
+    async with backend.serve() as base_url:
+        for label, cache_ttl in (("no cache", 0.0), (f"ttl {ttl}s", ttl)):
+            inventory = InventoryManager()
+            inventory.product_client.base_url = base_url
+            inventory.catalog.ttl = cache_ttl
+            if not cache_ttl:
+                # Bypass the cache entirely to reproduce the old behaviour
+                inventory.get_products = inventory.product_client.get_products
+            backend.requests = 0
+            semaphore = asyncio.Semaphore(concurrency)
+
+            async def one():
+                async with semaphore:
+                    await inventory.get_product_list()
+
+            start = time.perf_counter()
+            await asyncio.gather(*(one() for _ in range(messages)))
+            elapsed = time.perf_counter() - start
+            await inventory.close()
+
+            print(
+                f"{label:10} {elapsed / messages * 1000:8.2f}ms/msg  "
+                f"{backend.requests:5} backend requests  {inventory.catalog.stats()}"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Backend load and latency of get_product_list with and without the catalog cache"
+    )
+    parser.add_argument("--products", type=int, default=200)
+    parser.add_argument("--messages", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--ttl", type=float, default=60.0)
+    args = parser.parse_args()
+    logging.getLogger("product_client").setLevel(logging.WARNING)
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    asyncio.run(
+        run(args.products, args.messages, args.concurrency, args.latency, args.ttl)
+    )
+
+
+if __name__ == "__main__":
+    main()
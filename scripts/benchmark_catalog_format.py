@@ -0,0 +1,82 @@
+import argparse
+import logging
+import time
+
+from stubs import make_products
+from catalog_cache import CatalogDiff
+from inventory import InventoryManager
+from product_client import Product
+
+
+def legacy_format(products) -> str:
+    """The formatter as it was: repeated += with a debug f-string per product"""
+    logger = logging.getLogger("product_client")
+    formatted = "Available Products:\n\n"
+    for p in products:
+        logger.debug(f"Formatting product: {p.name}")
+        formatted += f"• {p.name} ({p.brand} {p.model})\n"
+        formatted += f"  Description: {p.description}\n"
+        formatted += f"  Category: {p.category}\n"
+        formatted += f"  Price: ${p.price:,.2f}\n"
+        formatted += f"  Stock: {p.stock} units\n"
+        if p.processor:
+            formatted += f"  Processor: {p.processor}\n"
+            formatted += f"  RAM: {p.ram}\n"
+            formatted += f"  Storage: {p.storageCapacity} {p.storageType}\n"
+            formatted += f"  Graphics: {p.graphicsCard}\n"
+            formatted += f"  OS: {p.operatingSystem}\n"
+        elif p.printingTechnology:
+            formatted += f"  Printing Technology: {p.printingTechnology}\n"
+            if p.connectivityOptions:
+                formatted += f"  Connectivity: {', '.join(p.connectivityOptions)}\n"
+        formatted += "\n"
+    return formatted
+
+
+def timed(fn, *args, rounds: int):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        result = fn(*args)
+    return (time.perf_counter() - start) / rounds, result
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare the old catalog formatter with the memoized one"
+    )
+    parser.add_argument("--products", type=int, default=10000)
+    parser.add_argument("--changed", type=float, default=0.01)
+    parser.add_argument("--rounds", type=int, default=10)
+    args = parser.parse_args()
+    logging.getLogger("product_client").setLevel(logging.WARNING)
+
+    raw = make_products(args.products)
+    products = [Product(**p) for p in raw]
+    inventory = InventoryManager()
+
+    legacy, expected = timed(legacy_format, products, rounds=args.rounds)
+
+    inventory._blocks = {}
+    cold, text = timed(inventory._format_products, products, rounds=1)
+    assert text == expected, "memoized formatter must produce identical text"
+
+    # Refresh with a fraction of the products changed
+    step = max(1, int(1 / args.changed)) if args.changed else len(raw) + 1
+    changed = [
+        Product(**dict(p, stock=p["stock"] + 1)) if i % step == 0 else products[i]
+        for i, p in enumerate(raw)
+    ]
+    # The catalog's diff names the products to re-render
+    diff = CatalogDiff([], [p.id for i, p in enumerate(changed) if i % step == 0], [])
+    inventory._format_products(products)
+    warm, text = timed(inventory._format_products, changed, diff, rounds=args.rounds)
+    assert text == legacy_format(changed), "refreshed text must match a full format"
+
+    print(f"{args.products} products, {args.changed:.0%} changed per refresh")
+    print(f"old formatter (+=):       {legacy * 1000:8.2f}ms")
+    print(f"new formatter, cold:      {cold * 1000:8.2f}ms")
+    print(f"new formatter, refresh:   {warm * 1000:8.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
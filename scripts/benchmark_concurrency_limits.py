@@ -0,0 +1,79 @@
+import argparse
+import asyncio
+import logging
+import time
+
+from stubs import FakeChatModel
+from chat_engine import ChatEngine
+from concurrency import LLMLimiter
+
+
+class CountingChatModel(FakeChatModel):
+    """FakeChatModel that records how many calls run at the same time"""
+
+    running: int = 0
+    peak: int = 0
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        try:
+            return await super()._agenerate(messages, stop, run_manager, **kwargs)
+        finally:
+            self.running -= 1
+
+
+async def burst(args):
+    llm = CountingChatModel(latency=args.latency)
+    engine = ChatEngine(llm=llm)
+    engine.fast_path = False
+    engine.responses.max_entries = 0
+    engine.llm_limiter = LLMLimiter(
+        max_concurrent=args.max_concurrent,
+        max_queue=args.max_queue,
+        queue_timeout=args.queue_timeout,
+    )
+
+    async def one(i):
+        start = time.perf_counter()
+        answer = await engine.process_message(f"Recommend a laptop for task {i}", f"s{i}")
+        return answer, time.perf_counter() - start
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(one(i) for i in range(args.requests)))
+    elapsed = time.perf_counter() - start
+
+    rejected = [t for answer, t in results if answer.startswith("I'm receiving too many")]
+    served = [t for answer, t in results if answer == llm.answer]
+    stats = engine.llm_limiter.stats()
+    print(f"Burst of {args.requests} requests in {elapsed:.2f}s")
+    print(f"  peak concurrent LLM calls {llm.peak} (limit {args.max_concurrent})")
+    print(f"  served {len(served)}, slowest {max(served, default=0) * 1000:.0f}ms")
+    print(
+        f"  rejected {len(rejected)}, slowest rejection "
+        f"{max(rejected, default=0) * 1000:.1f}ms"
+    )
+    print(f"  limiter {stats}")
+    assert llm.peak <= args.max_concurrent
+    assert len(served) + len(rejected) == args.requests
+    # A rejected turn leaves no unanswered question in its session
+    histories = [len(engine.conversations.get(f"s{i}")) for i in range(args.requests)]
+    assert sorted(histories) == [0] * len(rejected) + [2] * len(served)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="LLM concurrency cap and fast rejection under a burst"
+    )
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--max-concurrent", type=int, default=8)
+    parser.add_argument("--max-queue", type=int, default=32)
+    parser.add_argument("--queue-timeout", type=float, default=10.0)
+    args = parser.parse_args()
+    logging.getLogger("product_client").setLevel(logging.WARNING)
+    asyncio.run(burst(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+import argparse
+import asyncio
+import logging
+import time
+
+from stubs import FakeChatModel, StubProductBackend, make_products
+from chat_engine import ChatEngine
+from concurrency import LLMLimiter
+
+
+async def run(sessions: int, latency: float, products: int):
+    backend = StubProductBackend(make_products(products))
+    async with backend.serve() as base_url:
+        engine = ChatEngine(llm=FakeChatModel(latency=latency))
+        engine.inventory_manager.product_client.base_url = base_url
+        # Measure parallelism, not admission control: no turn is turned away
+        engine.llm_limiter = LLMLimiter(max_concurrent=sessions, max_queue=sessions)
+        # Every turn goes to the model: no cached answers
+        engine.responses.max_entries = 0
+        await engine.start()
+
+        start = time.perf_counter()
+        responses = await asyncio.gather(
+            *(
+                engine.process_message("Recommend a laptop for video editing", f"s{i}")
+                for i in range(sessions)
+            )
+        )
+        elapsed = time.perf_counter() - start
+        await engine.close()
+
+    print(f"Sessions:        {sessions}")
+    print(f"LLM latency:     {latency:.3f}s")
+    print(f"Wall time:       {elapsed:.3f}s")
+    print(f"Serial estimate: {sessions * latency:.3f}s")
+    print(f"Speedup:         {sessions * latency / elapsed:.1f}x")
+    print(f"Overhead:        {(elapsed - latency) / sessions * 1000:.1f}ms per session")
+
+    # Every session must keep its own question and answer
+    assert all(len(engine.conversations.get(f"s{i}")) == 2 for i in range(sessions))
+    assert len(set(responses)) == 1
+    # The sessions wait for the model together, not one after another
+    # The sessions wait for the model together: one model latency plus the
+    # turns' own CPU time on the event loop, a few ms each
+    assert elapsed < latency + sessions * 0.005, f"{elapsed:.3f}s for a {latency:.3f}s model"
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Run N chat sessions in parallel against a stubbed LLM"
+    )
+    parser.add_argument("--sessions", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.5)
+    parser.add_argument("--products", type=int, default=200)
+    args = parser.parse_args()
+    for name in ("product_client", "httpx"):
+        logging.getLogger(name).setLevel(logging.WARNING)
+    asyncio.run(run(args.sessions, args.latency, args.products))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+import argparse
+import asyncio
+import logging
+import time
+
+from stubs import StubProductBackend, make_products
+from product_client import ProductClient
+
+
+async def run(products: int, rounds: int):
+    catalog = make_products(products)
+    backend = StubProductBackend(catalog)
+
+    async with backend.serve() as base_url:
+        client = ProductClient(base_url=base_url)
+
+        # Count JSON decodes to prove a 304 skips parsing entirely
+        decodes = 0
+        loads = client.loads
+
+        def counting_loads(body):
+            nonlocal decodes
+            decodes += 1
+            return loads(body)
+
+        client.loads = counting_loads
+
+        start = time.perf_counter()
+        first = await client.get_products()
+        full = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for _ in range(rounds):
+            again = await client.get_products()
+            assert again is first, "304 must reuse the parsed product list"
+        conditional = (time.perf_counter() - start) / rounds
+
+        assert decodes == 1, f"expected a single JSON decode, got {decodes}"
+        assert backend.not_modified == rounds
+
+        # A changed catalog must be downloaded and parsed again
+        catalog[0] = dict(catalog[0], price=1.0)
+        backend.set_products(catalog)
+        changed = await client.get_products()
+        assert changed is not first and changed[0].price == 1.0
+        assert decodes == 2
+
+        await client.close()
+
+    print(f"Catalog size:      {products} products ({len(backend._body) / 1024:.0f} KiB)")
+    print(f"Full fetch:        {full * 1000:8.2f}ms")
+    print(f"304 revalidation:  {conditional * 1000:8.2f}ms ({rounds} rounds, no re-parse)")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Verify and time conditional GETs of the product catalog"
+    )
+    parser.add_argument("--products", type=int, default=5000)
+    parser.add_argument("--rounds", type=int, default=50)
+    args = parser.parse_args()
+    logging.getLogger("product_client").setLevel(logging.WARNING)
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    asyncio.run(run(args.products, args.rounds))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+import argparse
+import random
+import statistics
+import time
+
+from langchain_core.messages import AIMessage, HumanMessage
+
+import stubs  # noqa: F401  (puts langchain_server on the path)
+from context_window import ContextBuilder, PromptSizeHistogram, count_tokens
+
+
+def conversation(rng: random.Random, turns: int):
+    history = []
+    for turn in range(turns):
+        question = f"Question {turn}: " + "word " * rng.randint(3, 40)
+        history.append(HumanMessage(content=question))
+        # Turns that errored out store no answer
+        if rng.random() < 0.1:
+            continue
+        # Occasionally a long answer, e.g. a full comparison of several products
+        length = rng.choice([20, 60, 120, 2000])
+        history.append(AIMessage(content="detail " * length))
+    return history
+
+
+def describe(name: str, sizes, orphans: int, histogram: PromptSizeHistogram):
+    sizes = sorted(sizes)
+    print(
+        f"{name:18} p50 {statistics.median(sizes):7.0f}  "
+        f"p99 {sizes[int(len(sizes) * 0.99)]:7.0f}  max {sizes[-1]:7.0f}  "
+        f"windows starting with an answer: {orphans}"
+    )
+    print(f"{'':18} {histogram.stats()['buckets']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Prompt history size of the fixed 5-message slice vs the token budget"
+    )
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--budget", type=int, default=2000)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    builder = ContextBuilder(budget_tokens=args.budget)
+    results = {
+        "last 5 messages": ([], 0, PromptSizeHistogram()),
+        f"budget {args.budget}": ([], 0, PromptSizeHistogram()),
+    }
+
+    elapsed = 0.0
+    for _ in range(args.requests):
+        history = conversation(rng, rng.randint(1, 10))
+        history.append(HumanMessage(content="And how much is it?"))
+
+        start = time.perf_counter()
+        packed = builder.build(history)
+        elapsed += time.perf_counter() - start
+
+        for name, window in zip(results, (history[-5:], packed)):
+            sizes, orphans, histogram = results[name]
+            tokens = count_tokens(window)
+            sizes.append(tokens)
+            histogram.observe(tokens)
+            first = next(m for m in window if m.type != "system")
+            results[name] = (sizes, orphans + isinstance(first, AIMessage), histogram)
+
+    for name, (sizes, orphans, histogram) in results.items():
+        describe(name, sizes, orphans, histogram)
+    print(f"build time: {elapsed / args.requests * 1e6:.1f}us per request")
+
+
+if __name__ == "__main__":
+    main()
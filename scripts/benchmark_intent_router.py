@@ -0,0 +1,109 @@
+import argparse
+import asyncio
+import logging
+import random
+import time
+
+from stubs import FakeChatModel, StubProductBackend, make_products
+from chat_engine import ChatEngine
+
+# Questions the router answers from the catalog ("{name}" is a product name)
+ROUTED = [
+    "How many computers do you have?",
+    "¿Cuántas impresoras hay?",
+    "How many printers are in stock?",
+    "¿Cuántos productos tienen disponibles?",
+    "What's the price of the {name}?",
+    "¿Cuánto cuesta el {name}?",
+    "Is the {name} in stock?",
+    "¿Hay {name} disponible?",
+]
+# Questions that need the LLM
+LLM = [
+    "Compare the {name} with a cheaper alternative",
+    "Which laptop is best for video editing?",
+    "¿Qué impresora me recomiendas para una oficina pequeña?",
+    "How many computers under $1000 have an RTX card?",
+]
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+async def run(args):
+    catalog = make_products(args.products)
+    names = [p["name"] for p in catalog]
+    backend = StubProductBackend(catalog)
+    async with backend.serve() as base_url:
+        engine = ChatEngine(
+            llm=FakeChatModel(latency=args.latency, tool_name="filter_products")
+        )
+        engine.inventory_manager.product_client.base_url = base_url
+        # Measure routing alone, not the response cache
+        engine.responses.max_entries = 0
+        await engine.start()
+        # Time the answers, not the first catalog download
+        await engine.inventory_manager.get_products()
+
+        # Record which path answered each session
+        routed_sessions = set()
+        answer_directly = engine._answer_directly
+
+        async def tracked(message, session_id, catalog_version):
+            answer = await answer_directly(message, session_id, catalog_version)
+            if answer is not None:
+                routed_sessions.add(session_id)
+            return answer
+
+        engine._answer_directly = tracked
+
+        rng = random.Random(0)
+        semaphore = asyncio.Semaphore(args.concurrency)
+        timings = {"routed": [], "llm": []}
+
+        async def one(i):
+            routed = rng.random() < args.routed_share
+            question = rng.choice(ROUTED if routed else LLM).format(name=rng.choice(names))
+            async with semaphore:
+                start = time.perf_counter()
+                await engine.process_message(question, f"s{i}")
+                elapsed = time.perf_counter() - start
+            path = "routed" if f"s{i}" in routed_sessions else "llm"
+            timings[path].append(elapsed)
+            if routed and path == "llm":
+                print(f"not routed: {question}")
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(args.messages)))
+        elapsed = time.perf_counter() - start
+        await engine.close()
+
+        for path, values in timings.items():
+            if values:
+                print(
+                    f"{path:7} {len(values):5} requests  "
+                    f"p50 {percentile(values, 0.5) * 1000:9.3f}ms  "
+                    f"p99 {percentile(values, 0.99) * 1000:9.3f}ms"
+                )
+        print(f"wall {elapsed:.2f}s  router {engine.inventory_manager.router.stats()}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Latency of questions answered by the intent router vs the LLM"
+    )
+    parser.add_argument("--products", type=int, default=200)
+    parser.add_argument("--messages", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--routed-share", type=float, default=0.5)
+    args = parser.parse_args()
+    logging.getLogger("product_client").setLevel(logging.WARNING)
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
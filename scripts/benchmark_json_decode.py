@@ -0,0 +1,48 @@
+import argparse
+import json
+import time
+from typing import List
+
+from pydantic import TypeAdapter
+
+from stubs import make_products
+from product_client import ProductModel, load_products
+
+
+def pipelines():
+    models = TypeAdapter(List[ProductModel])
+    return {
+        "json + pydantic (old)": lambda body: [
+            ProductModel(**p) for p in json.loads(body.decode())
+        ],
+        "pydantic validate_json": models.validate_json,
+        "json + records": load_products,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Catalog decode + parse throughput in MB/s for several pipelines"
+    )
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    runs = pipelines()
+    print(f"{'products':>9} {'MB':>6}  " + "  ".join(f"{name:>24}" for name in runs))
+    for size in args.sizes:
+        body = json.dumps(make_products(size)).encode()
+        row = []
+        for name, run in runs.items():
+            best = float("inf")
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                products = run(body)
+                best = min(best, time.perf_counter() - start)
+            assert len(products) == size
+            row.append(f"{len(body) / best / 2**20:19.1f} MB/s")
+        print(f"{size:>9} {len(body) / 2**20:6.1f}  " + "  ".join(row))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+import argparse
+import asyncio
+import logging
+import time
+import timeit
+
+from stubs import FakeChatModel, StubProductBackend, make_products
+from chat_engine import ChatEngine
+from metrics import metrics
+
+STAGES = (
+    "chat_engine.process_message",
+    "graph.assistant",
+    "llm.invoke",
+    "graph.tools",
+    "product_client.get_products",
+    "product_client.parse",
+    "inventory.get_product_list",
+    "inventory.format_products",
+)
+
+
+async def turns(engine: ChatEngine, count: int) -> float:
+    start = time.perf_counter()
+    for i in range(count):
+        await engine.process_message("Show me the whole catalog", f"s{i}")
+    return (time.perf_counter() - start) / count
+
+
+async def run(args):
+    backend = StubProductBackend(make_products(args.products))
+    async with backend.serve() as base_url:
+        engine = ChatEngine(llm=FakeChatModel(latency=0, tool_name="get_product_list"))
+        engine.inventory_manager.product_client.base_url = base_url
+        # Every turn goes through the graph, a tool call and the catalog
+        engine.fast_path = False
+        engine.responses.max_entries = 0
+        engine.inventory_manager.catalog.ttl = 0
+        await engine.start()
+        await turns(engine, 10)
+
+        # Alternate so drift in the machine affects both sides alike
+        timings = {False: [], True: []}
+        for _ in range(args.rounds):
+            for enabled in (False, True):
+                metrics.enabled = enabled
+                timings[enabled].append(await turns(engine, args.turns))
+        await engine.close()
+
+    off, on = min(timings[False]), min(timings[True])
+    print(f"chat turn, metrics off: {off * 1000:8.3f}ms")
+    print(f"chat turn, metrics on:  {on * 1000:8.3f}ms  ({(on - off) / off:+.1%})")
+
+    text = metrics.render()
+    print(f"\n/metrics: {len(text.splitlines())} lines, {len(text) / 1024:.1f} KiB")
+    print(f"{'stage':32} {'count':>7} {'mean':>10}")
+    for stage in STAGES:
+        histogram = metrics._stages[stage]
+        print(f"{stage:32} {histogram.count:7} {histogram.sum / histogram.count * 1000:8.3f}ms")
+        assert f'aida_stage_seconds_count{{stage="{stage}"}}' in text
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Overhead of stage spans and counters on a chat turn, and a /metrics sample"
+    )
+    parser.add_argument("--products", type=int, default=200)
+    parser.add_argument("--turns", type=int, default=200)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+    logging.getLogger("product_client").setLevel(logging.WARNING)
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    for enabled in (False, True):
+        metrics.enabled = enabled
+        seconds = min(timeit.repeat(
+            "with span('x'): pass", globals={"span": metrics.span}, number=100_000, repeat=5
+        )) / 100_000
+        print(f"empty span, metrics {'on ' if enabled else 'off'}: {seconds * 1e9:6.0f}ns")
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
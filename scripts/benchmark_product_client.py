@@ -0,0 +1,72 @@
+import argparse
+import asyncio
+import logging
+import time
+
+import httpx
+
+from stubs import StubProductBackend, make_products
+from product_client import Product, ProductClient
+
+
+async def fetch_per_call(base_url: str):
+    """Previous behaviour: a fresh AsyncClient (and TCP connection) per call"""
+    async with httpx.AsyncClient() as client:
+        response = await client.get(f"{base_url}/products")
+        response.raise_for_status()
+        return [Product(**product) for product in response.json()]
+
+
+async def measure(backend: StubProductBackend, fetch, requests: int, concurrency: int):
+    backend.requests = 0
+    backend.connections.clear()
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            await fetch()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(requests)))
+    elapsed = time.perf_counter() - start
+    return elapsed, len(backend.connections)
+
+
+async def run(products: int, requests: int, concurrency: int):
+    backend = StubProductBackend(make_products(products))
+    async with backend.serve() as base_url:
+        before = await measure(
+            backend, lambda: fetch_per_call(base_url), requests, concurrency
+        )
+
+        client = ProductClient(base_url=base_url)
+        await client.start()
+        after = await measure(backend, client.get_products, requests, concurrency)
+        await client.close()
+
+    print(f"{requests} GET /products ({products} products), concurrency {concurrency}")
+    for label, (elapsed, sockets) in (
+        ("client per call", before),
+        ("shared pool", after),
+    ):
+        print(
+            f"{label:16} {elapsed / requests * 1000:8.2f}ms/req  "
+            f"{requests / elapsed:8.1f} req/s  {sockets:5} sockets"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare a per-call httpx client with the shared ProductClient pool"
+    )
+    parser.add_argument("--products", type=int, default=20)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=10)
+    args = parser.parse_args()
+    logging.getLogger("product_client").setLevel(logging.WARNING)
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    asyncio.run(run(args.products, args.requests, args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+import argparse
+import gc
+import json
+import time
+import tracemalloc
+
+from stubs import make_products
+from product_client import ProductModel, parse_products
+
+
+def measure(label, build, body, count):
+    """Parse time from decoded JSON, and the memory still held by the
+    catalog once the decoded JSON is gone"""
+    gc.collect()
+    raw = json.loads(body)
+    start = time.perf_counter()
+    products = build(raw)
+    elapsed = time.perf_counter() - start
+    del products, raw
+
+    gc.collect()
+    tracemalloc.start()
+    products = build(json.loads(body))
+    gc.collect()
+    held, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(
+        f"{label:16} parse {elapsed * 1000:8.1f}ms  "
+        f"{count / elapsed / 1000:7.1f}k products/s  "
+        f"{held / count:6.0f} bytes/product"
+    )
+    return products
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Parse time and memory of pydantic models vs compact Product records"
+    )
+    parser.add_argument("--products", type=int, default=100_000)
+    args = parser.parse_args()
+
+    body = json.dumps(make_products(args.products)).encode()
+    models = measure(
+        "pydantic models", lambda r: [ProductModel(**p) for p in r], body, args.products
+    )
+    records = measure("Product records", parse_products, body, args.products)
+
+    # Same content either way
+    for model, record in zip(models[:1000], records[:1000]):
+        for field in ProductModel.model_fields:
+            expected = getattr(model, field)
+            if field == "connectivityOptions" and expected is not None:
+                expected = tuple(expected)
+            if field == "images" and expected == {}:
+                expected = None
+            assert getattr(record, field) == expected, field
+
+
+if __name__ == "__main__":
+    main()
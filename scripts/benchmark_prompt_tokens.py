@@ -0,0 +1,66 @@
+import argparse
+import asyncio
+import logging
+
+from stubs import make_products
+from inventory import InventoryManager
+from product_client import Product
+
+
+def token_counter():
+    """tiktoken when its encoding is available locally, else ~4 chars per token"""
+    try:
+        import tiktoken
+
+        encoding = tiktoken.get_encoding("cl100k_base")
+        return lambda text: len(encoding.encode(text)), "tiktoken cl100k_base"
+    except Exception:
+        return lambda text: len(text) // 4, "estimated at 4 chars per token"
+
+
+async def measure(size: int, count_tokens):
+    inventory = InventoryManager()
+    products = [Product(**p) for p in make_products(size)]
+
+    async def fetch():
+        return products
+
+    inventory.catalog.fetch = fetch
+    inventory.product_client.get_product = lambda product_id: _first(products)
+
+    return {
+        "get_product_list": count_tokens(await inventory.get_product_list()),
+        "search_products": count_tokens(await inventory.search_products("Dell")),
+        "filter_products": count_tokens(
+            await inventory.filter_products("Computacion", max_price=1500, in_stock=True)
+        ),
+        "get_product": count_tokens(await inventory.get_product("p0")),
+    }
+
+
+async def _first(products):
+    return products[0]
+
+
+async def run(sizes):
+    count_tokens, method = token_counter()
+    results = {size: await measure(size, count_tokens) for size in sizes}
+
+    print(f"Tool output tokens ({method})")
+    print(f"{'tool':18}" + "".join(f"{size:>12}" for size in sizes))
+    for tool in results[sizes[0]]:
+        print(f"{tool:18}" + "".join(f"{results[s][tool]:>12,}" for s in sizes))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Prompt tokens added by each product tool as the catalog grows"
+    )
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    args = parser.parse_args()
+    logging.getLogger("product_client").setLevel(logging.WARNING)
+    asyncio.run(run(args.sizes))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+import argparse
+import asyncio
+import logging
+import random
+import statistics
+import time
+
+from stubs import FakeChatModel, StubProductBackend, make_products
+from chat_engine import ChatEngine
+
+# Near-identical phrasings of the questions that make up most of the traffic
+QUESTIONS = [
+    ["How many computers do you have?", "how many computers do you have", "How many computers do you have ?"],
+    ["¿Cuántos computadores hay?", "cuantos computadores hay", "¿Cuántos computadores hay"],
+    ["What printers do you sell?", "what printers do you sell?"],
+    ["Which laptops are in stock?", "Which laptops are in stock"],
+    ["¿Qué impresoras tienen?", "¿que impresoras tienen?"],
+    ["What is your cheapest laptop?", "what's your cheapest laptop?"],
+]
+
+
+async def run(args):
+    backend = StubProductBackend(make_products(args.products))
+    async with backend.serve() as base_url:
+        for label, size in (("no cache", 0), ("response cache", args.size)):
+            engine = ChatEngine(
+                llm=FakeChatModel(latency=args.latency, tool_name="filter_products")
+            )
+            engine.inventory_manager.product_client.base_url = base_url
+            engine.responses.max_entries = size
+            if args.similarity:
+                engine.responses.similarity = args.similarity
+                engine.responses.embeddings = engine.inventory_manager.semantic_index.embeddings
+            await engine.start()
+
+            rng = random.Random(0)
+            semaphore = asyncio.Semaphore(args.concurrency)
+            timings = []
+
+            async def one(i):
+                question = rng.choice(rng.choice(QUESTIONS))
+                async with semaphore:
+                    start = time.perf_counter()
+                    await engine.process_message(question, f"s{i}")
+                    timings.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            await asyncio.gather(*(one(i) for i in range(args.messages)))
+            elapsed = time.perf_counter() - start
+            await engine.close()
+
+            timings.sort()
+            stats = engine.responses.stats()
+            print(
+                f"{label:15} wall {elapsed:6.2f}s  p50 {statistics.median(timings) * 1000:7.1f}ms  "
+                f"p99 {timings[int(len(timings) * 0.99) - 1] * 1000:7.1f}ms  "
+                f"hit ratio {stats['hit_ratio']:.2f}  "
+                f"latency saved {stats['latency_saved_seconds']:.1f}s"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Latency and hit ratio of repeated inventory questions with the response cache"
+    )
+    parser.add_argument("--products", type=int, default=200)
+    parser.add_argument("--messages", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--size", type=int, default=1000)
+    parser.add_argument(
+        "--similarity", type=float, default=0.0,
+        help="embedding similarity threshold for paraphrases (0 = exact matches only)",
+    )
+    args = parser.parse_args()
+    logging.getLogger("product_client").setLevel(logging.WARNING)
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
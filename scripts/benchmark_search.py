@@ -0,0 +1,70 @@
+import argparse
+import logging
+import statistics
+import time
+
+from stubs import make_products
+from product_client import Product
+from product_index import ProductIndex
+
+QUERIES = [
+    {"query": "Dell"},
+    {"query": "laptop RTX 4070", "max_price": 1500},
+    {"query": "macbook apple m3", "in_stock": True},
+    {"query": "laser wi-fi printer", "category": "Impresion"},
+    {"query": "ryzen 32gb 1tb ssd"},
+    {"category": "Computacion", "min_price": 500, "max_price": 1500, "in_stock": True},
+]
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the BM25 product index")
+    parser.add_argument("--products", type=int, default=100000)
+    parser.add_argument("--changed", type=float, default=0.01)
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args()
+    logging.getLogger("product_client").setLevel(logging.WARNING)
+
+    raw = make_products(args.products)
+    products = [Product(**p) for p in raw]
+
+    build, index = timed(lambda: ProductIndex(products))
+    print(f"{args.products} products")
+    print(f"full build:            {build * 1000:10.1f}ms")
+
+    step = max(1, int(1 / args.changed))
+    refreshed = [
+        Product(**dict(p, price=p["price"] + 1)) if i % step == 0 else products[i]
+        for i, p in enumerate(raw)
+    ]
+    # Compile the posting lists the queries use, as a running service has
+    for kwargs in QUERIES:
+        index.search(**kwargs)
+    update, counts = timed(lambda: index.update(refreshed))
+    print(f"incremental update:    {update * 1000:10.1f}ms {counts} (added, changed, removed)")
+
+    # Price changes only invalidate the sorted indexes, not the posting lists
+    first, _ = timed(lambda: [index.search(**kwargs) for kwargs in QUERIES])
+    print(f"first queries after:   {first * 1000:10.1f}ms")
+
+    print(f"\n{'query':60} {'matches':>8} {'p50 ms':>8} {'p99 ms':>8}")
+    for kwargs in QUERIES:
+        samples = []
+        for _ in range(args.rounds):
+            elapsed, (total, _) = timed(lambda: index.search(**kwargs))
+            samples.append(elapsed * 1000)
+        samples.sort()
+        p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+        print(
+            f"{str(kwargs):60} {total:8} {statistics.median(samples):8.3f} {p99:8.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
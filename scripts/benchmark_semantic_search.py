@@ -0,0 +1,79 @@
+import argparse
+import logging
+import statistics
+import time
+
+from stubs import make_products
+from product_client import Product
+from semantic_index import HashingEmbedder, SemanticIndex
+
+QUERIES = [
+    "something light for travel",
+    "algo para diseño gráfico",
+    "gaming laptop with a powerful graphics card",
+    "wireless printer for the office",
+    "cheap computer for students",
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the semantic product index")
+    parser.add_argument("--products", type=int, default=50000)
+    parser.add_argument("--dimensions", type=int, default=256)
+    parser.add_argument("--changed", type=float, default=0.01)
+    parser.add_argument("--rounds", type=int, default=100)
+    args = parser.parse_args()
+    logging.getLogger("product_client").setLevel(logging.WARNING)
+
+    raw = make_products(args.products)
+    products = [Product(**p) for p in raw]
+    index = SemanticIndex(HashingEmbedder(args.dimensions))
+
+    start = time.perf_counter()
+    index.update(products)
+    build = time.perf_counter() - start
+
+    step = max(1, int(1 / args.changed))
+    refreshed_raw = [
+        dict(p, description=p["description"] + " refreshed") if i % step == 0 else p
+        for i, p in enumerate(raw)
+    ]
+    refreshed = [
+        Product(**p) if i % step == 0 else products[i]
+        for i, p in enumerate(refreshed_raw)
+    ]
+    start = time.perf_counter()
+    embedded = index.update(refreshed)
+    update = time.perf_counter() - start
+
+    print(f"{args.products} products, {args.dimensions} dimensions")
+    print(f"initial embedding:     {build * 1000:10.1f}ms")
+    print(f"refresh ({embedded} changed): {update * 1000:10.1f}ms")
+
+    # Price and stock are not embedded, so changing them re-embeds nothing
+    repriced = [Product(**dict(p, price=p["price"] + 1, stock=0)) for p in refreshed_raw]
+    start = time.perf_counter()
+    assert index.update(repriced) == 0
+    print(f"refresh (prices only): {(time.perf_counter() - start) * 1000:10.1f}ms, 0 embedded")
+
+    samples = []
+    for _ in range(args.rounds):
+        for query in QUERIES:
+            start = time.perf_counter()
+            index.search(query, limit=10)
+            samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    print(
+        f"top-10 query:          p50 {statistics.median(samples):.3f}ms  "
+        f"p99 {samples[int(len(samples) * 0.99)]:.3f}ms"
+    )
+
+    start = time.perf_counter()
+    for _ in range(args.rounds):
+        index.search_batch(QUERIES, limit=10)
+    batch = (time.perf_counter() - start) / args.rounds / len(QUERIES)
+    print(f"top-10 batched query:  {batch * 1000:.3f}ms per query ({len(QUERIES)} per batch)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+import argparse
+import asyncio
+import logging
+import os
+import tempfile
+import time
+
+from langchain_core.messages import AIMessage, HumanMessage
+
+import stubs  # noqa: F401  (puts langchain_server on the path)
+from session_store import SessionStore, SqliteSessionStore
+
+
+def rate(count: int, elapsed: float) -> str:
+    return f"{count / elapsed:12,.0f}/s"
+
+
+async def run(sessions: int, turns: int):
+    messages = [
+        (HumanMessage(content=f"Question {turn}"), AIMessage(content="Answer " * 20))
+        for turn in range(turns)
+    ]
+    ids = [f"session-{i}" for i in range(sessions)]
+    path = os.path.join(tempfile.mkdtemp(), "sessions.db")
+
+    stores = {
+        "memory": SessionStore(max_sessions=sessions),
+        "sqlite": SqliteSessionStore(path, max_sessions=sessions, cache_ttl=3600),
+    }
+    for name, store in stores.items():
+        await store.start()
+
+        start = time.perf_counter()
+        for pair in messages:
+            for session_id in ids:
+                store.append(session_id, *pair)
+                # Let the background flusher run as it would between requests
+                if name == "sqlite" and len(store._pending) >= store.batch_size:
+                    await asyncio.sleep(0)
+        appends = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for session_id in ids:
+            store.get(session_id)
+        reads = time.perf_counter() - start
+
+        await store.close()
+        print(
+            f"{name:8} appends {rate(sessions * turns * 2, appends)}  "
+            f"cached reads {rate(sessions, reads)}"
+        )
+
+    # A fresh process: history is loaded lazily from disk on first access
+    reopened = SqliteSessionStore(path, max_sessions=sessions)
+    start = time.perf_counter()
+    for session_id in ids:
+        await reopened.ensure_loaded(session_id)
+        assert len(reopened.get(session_id)) == min(turns * 2, reopened.max_messages)
+    cold = time.perf_counter() - start
+    print(f"{'sqlite':8} cold reads after restart {rate(sessions, cold)}")
+
+    start = time.perf_counter()
+    removed = await asyncio.to_thread(reopened.compact)
+    print(f"{'sqlite':8} compaction removed {removed} rows in {time.perf_counter() - start:.2f}s")
+    await reopened.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Append and read throughput of the session store backends"
+    )
+    parser.add_argument("--sessions", type=int, default=10000)
+    parser.add_argument("--turns", type=int, default=8)
+    args = parser.parse_args()
+    logging.getLogger("product_client").setLevel(logging.WARNING)
+    asyncio.run(run(args.sessions, args.turns))
+
+
+if __name__ == "__main__":
+    main()
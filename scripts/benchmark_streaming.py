@@ -0,0 +1,137 @@
+import argparse
+import json
+import logging
+import os
+import socket
+import statistics
+import threading
+import time
+from contextlib import contextmanager
+
+import httpx
+import uvicorn
+from fastapi.testclient import TestClient
+
+from stubs import FakeChatModel, StubProductBackend, make_products
+
+# The service builds its OpenAI client at import time; the key is never used
+os.environ.setdefault("OPENAI_API_KEY", "stub")
+# Every round goes to the model: no cached answers
+os.environ.setdefault("RESPONSE_CACHE_SIZE", "0")
+import inventory_service  # noqa: E402
+
+
+def measure(client: TestClient, stream: bool):
+    """Seconds to the first frame and to the complete answer"""
+    with client.websocket_connect("/ws/chat") as websocket:
+        start = time.perf_counter()
+        websocket.send_text(json.dumps({"message": "Tell me about laptops", "stream": stream}))
+        first = None
+        while True:
+            frame = websocket.receive_json()
+            if first is None:
+                first = time.perf_counter() - start
+            if not stream or frame.get("type") == "done":
+                return first, time.perf_counter() - start, frame["message"]
+
+
+@contextmanager
+def live_server(app):
+    """Run an app on a local port and yield its base URL. TestClient buffers
+    whole responses, which would hide when the first SSE event arrives"""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    server = uvicorn.Server(
+        uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning")
+    )
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    try:
+        yield f"http://127.0.0.1:{port}"
+    finally:
+        server.should_exit = True
+        thread.join()
+
+
+def measure_http(client: httpx.Client, stream: bool):
+    """Same as ``measure`` for POST /chat and the /chat/stream SSE endpoint"""
+    body = {"message": "Tell me about laptops", "session_id": "benchmark"}
+    start = time.perf_counter()
+    if not stream:
+        message = client.post("/chat", json=body).json()["message"]
+        elapsed = time.perf_counter() - start
+        return elapsed, elapsed, message
+
+    first = None
+    event = "message"
+    with client.stream("POST", "/chat/stream", json=body) as response:
+        for line in response.iter_lines():
+            if line.startswith("event:"):
+                event = line[len("event:") :].strip()
+            elif line.startswith("data:"):
+                if first is None:
+                    first = time.perf_counter() - start
+                if event == "done":
+                    message = json.loads(line[len("data:") :])["message"]
+                    return first, time.perf_counter() - start, message
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Time to first token, streaming vs single response, over /ws/chat and HTTP"
+    )
+    parser.add_argument("--latency", type=float, default=0.3)
+    parser.add_argument("--token-delay", type=float, default=0.02)
+    parser.add_argument("--rounds", type=int, default=10)
+    parser.add_argument("--products", type=int, default=200)
+    args = parser.parse_args()
+    for name in ("product_client", "httpx"):
+        logging.getLogger(name).setLevel(logging.WARNING)
+
+    llm = FakeChatModel(
+        latency=args.latency,
+        token_delay=args.token_delay,
+        answer="We have five laptops in stock, from the MacBook Pro M3 to the "
+        "ASUS ROG Zephyrus G14. Would you like more details on any of them?",
+    )
+    engine = inventory_service.ws_manager.chat_engine
+    engine.llm = llm
+    engine.llm_with_tools = llm.bind_tools(engine.tools)
+
+    # The whole answer: the model latency plus the delay between its tokens
+    answer_time = args.latency + args.token_delay * (len(llm._tokens()) - 1)
+
+    def report(label, run, client, stream):
+        firsts, totals = [], []
+        for _ in range(args.rounds):
+            first, total, message = run(client, stream)
+            assert message == llm.answer
+            firsts.append(first)
+            totals.append(total)
+        first, total = statistics.median(firsts), statistics.median(totals)
+        print(
+            f"{label:17} time to first token {first * 1000:7.1f}ms  "
+            f"complete answer {total * 1000:7.1f}ms"
+        )
+        # Streaming shows the first token after about one model latency;
+        # a single response only once the whole answer is generated
+        expected = args.latency if stream else answer_time
+        assert expected <= first < expected + 0.1, f"{label}: first token after {first:.3f}s"
+
+    backend = StubProductBackend(make_products(args.products))
+    with live_server(backend.app) as backend_url:
+        engine.inventory_manager.product_client.base_url = f"{backend_url}/api"
+        with TestClient(inventory_service.app) as client:
+            report("ws single frame", measure, client, False)
+            report("ws streaming", measure, client, True)
+        with live_server(inventory_service.app) as base_url:
+            with httpx.Client(base_url=base_url, timeout=30) as client:
+                report("POST /chat", measure_http, client, False)
+                report("SSE /chat/stream", measure_http, client, True)
+
+
+if __name__ == "__main__":
+    main()
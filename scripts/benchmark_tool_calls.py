@@ -0,0 +1,66 @@
+import argparse
+import asyncio
+import time
+import uuid
+
+from langchain_core.messages import AIMessage
+from langgraph.graph import END, START, MessagesState, StateGraph
+from langgraph.prebuilt import ToolNode
+
+from stubs import FakeChatModel
+from chat_engine import ChatEngine
+
+
+async def time_tool_node(tool, calls: int, rounds: int) -> float:
+    """Average seconds for a ToolNode to run `calls` parallel tool calls"""
+    builder = StateGraph(MessagesState)
+    builder.add_node("tools", ToolNode([tool]))
+    builder.add_edge(START, "tools")
+    builder.add_edge("tools", END)
+    graph = builder.compile()
+    message = AIMessage(
+        content="",
+        tool_calls=[
+            {"name": tool.__name__, "args": {}, "id": str(uuid.uuid4())}
+            for _ in range(calls)
+        ],
+    )
+    start = time.perf_counter()
+    for _ in range(rounds):
+        await graph.ainvoke({"messages": [message]})
+    return (time.perf_counter() - start) / rounds
+
+
+async def run(calls: int, rounds: int, latency: float):
+    engine = ChatEngine(llm=FakeChatModel(latency=0))
+
+    async def fetch() -> str:
+        await asyncio.sleep(latency)
+        return "Available Products:\n\n"
+
+    engine.inventory_manager.get_product_list = fetch
+
+    # Previous implementation: a sync tool that spins up a new event loop
+    def get_product_list() -> str:
+        """Get the list of available products with all their details"""
+        return asyncio.run(engine.inventory_manager.get_product_list())
+
+    before = await time_tool_node(get_product_list, calls, rounds)
+    after = await time_tool_node(engine.get_product_list, calls, rounds)
+
+    print(f"Tool calls per turn: {calls}, backend latency: {latency * 1000:.1f}ms")
+    print(f"asyncio.run bridge:  {before * 1000:8.2f}ms per turn")
+    print(f"native coroutine:    {after * 1000:8.2f}ms per turn")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure ToolNode tool-call overhead")
+    parser.add_argument("--calls", type=int, default=4)
+    parser.add_argument("--rounds", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.0)
+    args = parser.parse_args()
+    asyncio.run(run(args.calls, args.rounds, args.latency))
+
+
+if __name__ == "__main__":
+    main()
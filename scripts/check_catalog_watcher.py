@@ -0,0 +1,151 @@
+import argparse
+import asyncio
+import logging
+import os
+import time
+
+from fastapi.testclient import TestClient
+
+from stubs import StubProductBackend, make_products
+from inventory import InventoryManager
+
+
+async def wait_for_version(inventory: InventoryManager, version: int, timeout: float) -> float:
+    start = time.perf_counter()
+    while inventory.catalog.version == version:
+        assert time.perf_counter() - start < timeout, "catalog change not picked up"
+        await asyncio.sleep(0.01)
+    return time.perf_counter() - start
+
+
+async def watch_loop(inventory: InventoryManager, stalls: list):
+    """Record how late the event loop wakes up from 1ms sleeps, with the
+    catalog version current when each sleep began"""
+    while True:
+        version, start = inventory.catalog.version, time.perf_counter()
+        await asyncio.sleep(0.001)
+        stalls.append((version, time.perf_counter() - start - 0.001))
+
+
+async def check_stalls(inventory: InventoryManager, backend: StubProductBackend, catalog, args):
+    """Bring the consumers up to a diff of small and large size and time
+    the longest event loop stall while they update"""
+    consumers = ("formatted", "index", "semantic_index", "router")
+    stalls = []
+    monitor = asyncio.create_task(watch_loop(inventory, stalls))
+    for count in (10, args.changed):
+        for i in range(count):
+            catalog[i] = dict(catalog[i], description=catalog[i]["description"] + " (new)")
+        backend.set_products(catalog)
+        version = inventory.catalog.version
+        inventory.refresh_soon()
+        await wait_for_version(inventory, version, 30)
+        start = time.perf_counter()
+        while any(inventory._versions.get(name) != inventory.catalog.version for name in consumers):
+            assert time.perf_counter() - start < 30, "consumers not updated"
+            await asyncio.sleep(0.01)
+        await asyncio.sleep(0.01)
+        # Decoding the download happens before the new version, and is not counted
+        worst = max(stall for v, stall in stalls if v > version) * 1000
+        print(f"{count} of {args.products} products changed: consumers updated, longest loop stall {worst:.1f}ms")
+        assert worst < args.max_stall, f"event loop stalled {worst:.1f}ms"
+    monitor.cancel()
+
+
+async def run(args):
+    catalog = make_products(args.products)
+    backend = StubProductBackend(catalog, latency=args.latency)
+    async with backend.serve() as base_url:
+        inventory = InventoryManager()
+        inventory.product_client.base_url = base_url
+        inventory.poll_interval = args.interval
+
+        start = time.perf_counter()
+        await inventory.start()
+        startup = time.perf_counter() - start
+
+        # The first question is answered from the prefetched, indexed catalog
+        requests = backend.requests
+        start = time.perf_counter()
+        listing = await inventory.get_product_list()
+        await inventory.search_products("Model 1")
+        first = time.perf_counter() - start
+        assert listing.startswith("Available Products")
+        assert backend.requests == requests, "first message must not fetch"
+        assert inventory.catalog.misses == 0
+        print(
+            f"startup prefetch {startup * 1000:7.1f}ms (backend latency {args.latency * 1000:.0f}ms), "
+            f"first product list + search {first * 1000:.2f}ms, 0 backend requests"
+        )
+
+        # A push is picked up at once and diffed per product
+        version = inventory.catalog.version
+        catalog[1] = dict(catalog[1], price=1.0)
+        backend.set_products(catalog)
+        inventory.refresh_soon()
+        pushed = await wait_for_version(inventory, version, args.interval)
+        assert inventory.catalog.last_diff.changed == ["p1"]
+        assert "$1.00" in await inventory.get_product_list()
+        print(f"webhook push: change live after {pushed * 1000:.1f}ms, diff {inventory.catalog.last_diff.stats()}")
+
+        # Without a push the poll finds the change within one interval
+        version = inventory.catalog.version
+        backend.set_products(catalog[:-1] + [dict(catalog[-1], id="new")])
+        polled = await wait_for_version(inventory, version, args.interval * 3)
+        diff = inventory.catalog.last_diff
+        assert diff.added == ["new"] and diff.removed == [catalog[-1]["id"]]
+        # The watcher re-indexes the change before anyone asks
+        start = time.perf_counter()
+        while inventory._versions["index"] != inventory.catalog.version:
+            assert time.perf_counter() - start < 1, "change not re-indexed"
+            await asyncio.sleep(0.01)
+        print(f"poll every {args.interval}s: change live after {polled:.2f}s, diff {diff.stats()}")
+
+        # A new download with the same content does not bump the version
+        version = inventory.catalog.version
+        backend.set_products([dict(p, warrantyPeriod=24) for p in backend.products.values()])
+        inventory.refresh_soon()
+        while inventory.catalog.unchanged == 0:
+            await asyncio.sleep(0.01)
+        assert inventory.catalog.version == version
+        print("re-download with unchanged content: version kept, caches stay valid")
+        print(f"watcher {inventory.watcher_stats()}")
+
+        await check_stalls(inventory, backend, catalog, args)
+        await inventory.close()
+
+
+def check_webhook():
+    """The endpoint is off without a secret and checks the token with one"""
+    os.environ.setdefault("OPENAI_API_KEY", "stub")
+    import inventory_service
+
+    client = TestClient(inventory_service.app)
+    os.environ.pop("CATALOG_WEBHOOK_SECRET", None)
+    assert client.post("/catalog/webhook").status_code == 404
+    os.environ["CATALOG_WEBHOOK_SECRET"] = "s3cret"
+    assert client.post("/catalog/webhook", headers={"X-Webhook-Token": "nope"}).status_code == 401
+    response = client.post("/catalog/webhook", headers={"X-Webhook-Token": "s3cret"})
+    assert response.status_code == 202
+    assert inventory_service.ws_manager.chat_engine.inventory_manager.pushes == 1
+    print("webhook: 404 when disabled, 401 on a bad token, 202 and a push otherwise")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Startup prefetch, change polling and webhook pushes of the catalog (asserts)"
+    )
+    parser.add_argument("--products", type=int, default=1000)
+    parser.add_argument("--latency", type=float, default=0.2, help="backend latency in seconds")
+    parser.add_argument("--interval", type=float, default=1.0, help="poll interval in seconds")
+    parser.add_argument("--changed", type=int, default=1000, help="products changed by the large diff")
+    parser.add_argument("--max-stall", type=float, default=50, help="longest loop stall allowed, in ms")
+    args = parser.parse_args()
+    for name in ("product_client", "httpx"):
+        logging.getLogger(name).setLevel(logging.WARNING)
+    asyncio.run(run(args))
+    check_webhook()
+
+
+if __name__ == "__main__":
+    main()
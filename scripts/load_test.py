@@ -0,0 +1,346 @@
+"""Load test for inventory_service.py.
+
+Boots the FastAPI app in a child process against a stub LLM (tool call, then
+answer, with configurable latency) and a stub product backend, drives
+concurrent /chat POSTs and /ws/chat sessions, and reports throughput,
+latency percentiles, error and shed rates and the server's RSS. Results can be saved
+as a baseline and later runs compared against it.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import httpx
+import websockets
+
+from stubs import FakeChatModel, StubProductBackend, make_products
+
+DEFAULT_BASELINE = Path(__file__).resolve().parent / "baselines" / "load_test.json"
+
+QUESTIONS = [
+    "Which laptop is best for video editing?",
+    "¿Qué impresora me recomiendas para una oficina pequeña?",
+    "Compare your two cheapest computers",
+    "I need something light for travel",
+    "How many computers do you have?",
+    "¿Cuántas impresoras hay?",
+]
+# Answers the service gives when a request failed, or was shed under load
+ERROR_ANSWERS = (
+    "I apologize, there was an error",
+    "I'm sorry, I couldn't process",
+    "Lo siento, hubo un error",
+)
+SHED_ANSWERS = (
+    "I'm receiving too many questions",
+    "Please wait for my previous answers",
+)
+
+
+# --- Server side ---------------------------------------------------------
+
+
+async def serve(args):
+    """Run the stub backend and the patched app until killed"""
+    os.environ.setdefault("OPENAI_API_KEY", "stub")
+    import uvicorn
+    import inventory_service
+
+    backend = StubProductBackend(
+        make_products(args.products), latency=args.backend_latency
+    )
+    async with backend.serve() as base_url:
+        engine = inventory_service.ws_manager.chat_engine
+        llm = FakeChatModel(
+            latency=args.llm_latency,
+            token_delay=args.token_delay,
+            tool_name=args.tool or None,
+            answer="We have several options that fit, from compact ultrabooks to "
+            "powerful workstations. Would you like more details on any of them?",
+        )
+        engine.llm = llm
+        engine.llm_with_tools = llm.bind_tools(engine.tools)
+        engine.inventory_manager.product_client.base_url = base_url
+
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            port = sock.getsockname()[1]
+        server = uvicorn.Server(
+            uvicorn.Config(
+                inventory_service.app, host="127.0.0.1", port=port, log_level="warning"
+            )
+        )
+        task = asyncio.create_task(server.serve())
+        while not server.started:
+            await asyncio.sleep(0.01)
+        print(f"READY {port}", flush=True)
+        await task
+
+
+# --- Load generation -----------------------------------------------------
+
+
+class Results:
+    def __init__(self):
+        self.latencies: List[float] = []
+        self.errors = 0
+        self.shed = 0
+
+    def record(self, elapsed: float, answer: Optional[str]):
+        """Latency of a served answer; failures and shed requests are counted"""
+        if not answer or answer.startswith(ERROR_ANSWERS):
+            self.errors += 1
+        elif answer.startswith(SHED_ANSWERS):
+            self.shed += 1
+        else:
+            self.latencies.append(elapsed)
+
+    def summary(self, duration: float) -> Dict:
+        latencies = sorted(self.latencies)
+        total = len(latencies) + self.errors + self.shed
+
+        def pct(q):
+            if not latencies:
+                return 0.0
+            return round(latencies[min(len(latencies) - 1, int(len(latencies) * q))] * 1000, 1)
+
+        return {
+            "requests": total,
+            # Served answers per second
+            "throughput": round(len(latencies) / duration, 1),
+            "p50_ms": pct(0.50),
+            "p95_ms": pct(0.95),
+            "p99_ms": pct(0.99),
+            "error_rate": round(self.errors / total, 4) if total else 0.0,
+            "shed_rate": round(self.shed / total, 4) if total else 0.0,
+        }
+
+
+async def http_worker(client: httpx.AsyncClient, worker: int, deadline: float, turns: int, results: Results):
+    rng = random.Random(worker)
+    conversation = 0
+    while time.monotonic() < deadline:
+        session_id = f"http-{worker}-{conversation}"
+        conversation += 1
+        for _ in range(turns):
+            if time.monotonic() >= deadline:
+                return
+            start = time.perf_counter()
+            answer = None
+            try:
+                response = await client.post(
+                    "/chat", json={"message": rng.choice(QUESTIONS), "session_id": session_id}
+                )
+                if response.status_code == 200:
+                    answer = response.json()["message"]
+            except (httpx.HTTPError, ValueError):
+                pass
+            results.record(time.perf_counter() - start, answer)
+
+
+async def ws_worker(url: str, worker: int, deadline: float, turns: int, stream: bool, results: Results):
+    rng = random.Random(10_000 + worker)
+    while time.monotonic() < deadline:
+        try:
+            async with websockets.connect(url, max_size=None) as websocket:
+                for _ in range(turns):
+                    if time.monotonic() >= deadline:
+                        return
+                    start = time.perf_counter()
+                    await websocket.send(
+                        json.dumps({"message": rng.choice(QUESTIONS), "stream": stream})
+                    )
+                    while True:
+                        frame = json.loads(await websocket.recv())
+                        if not stream or frame.get("type") == "done":
+                            break
+                    results.record(time.perf_counter() - start, frame.get("message"))
+        except (OSError, websockets.WebSocketException):
+            results.record(0.0, None)
+            await asyncio.sleep(0.1)
+
+
+def rss_mb(pid: int) -> float:
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return 0.0
+
+
+async def run_mode(mode: str, port: int, pid: int, args) -> Dict:
+    results = Results()
+    rss_start = rss_mb(pid)
+    peak = rss_start
+
+    async def sample_rss():
+        nonlocal peak
+        while True:
+            peak = max(peak, rss_mb(pid))
+            await asyncio.sleep(0.2)
+
+    sampler = asyncio.create_task(sample_rss())
+    deadline = time.monotonic() + args.duration
+    start = time.perf_counter()
+    if mode == "http":
+        limits = httpx.Limits(max_connections=args.concurrency)
+        async with httpx.AsyncClient(
+            base_url=f"http://127.0.0.1:{port}", limits=limits, timeout=args.timeout
+        ) as client:
+            await asyncio.gather(
+                *(http_worker(client, i, deadline, args.turns, results) for i in range(args.concurrency))
+            )
+    else:
+        url = f"ws://127.0.0.1:{port}/ws/chat"
+        await asyncio.gather(
+            *(ws_worker(url, i, deadline, args.turns, args.stream, results) for i in range(args.concurrency))
+        )
+    elapsed = time.perf_counter() - start
+    sampler.cancel()
+
+    summary = results.summary(elapsed)
+    summary.update(
+        rss_start_mb=round(rss_start, 1),
+        rss_peak_mb=round(max(peak, rss_mb(pid)), 1),
+    )
+    return summary
+
+
+def compare(results: Dict, baseline: Dict, tolerance: float) -> bool:
+    """Print deltas against the baseline; False if anything regressed"""
+    ok = True
+    checks = (
+        ("throughput", -1),
+        ("p50_ms", 1),
+        ("p95_ms", 1),
+        ("p99_ms", 1),
+        ("rss_peak_mb", 1),
+    )
+    for mode, current in results.items():
+        previous = baseline.get("results", {}).get(mode)
+        if previous is None:
+            print(f"{mode}: no baseline")
+            continue
+        for metric, worse in checks:
+            old, new = previous[metric], current[metric]
+            change = (new - old) / old if old else 0.0
+            regressed = change * worse > tolerance
+            ok &= not regressed
+            flag = "  REGRESSION" if regressed else ""
+            print(f"{mode:5} {metric:12} {old:10.1f} -> {new:10.1f}  ({change:+.0%}){flag}")
+        for metric in ("error_rate", "shed_rate"):
+            old, new = previous.get(metric, 0.0), current[metric]
+            regressed = new > old + 0.01
+            ok &= not regressed
+            flag = "  REGRESSION" if regressed else ""
+            print(f"{mode:5} {metric:12} {old:10.2%} -> {new:10.2%}{flag}")
+    return ok
+
+
+def start_server(args) -> subprocess.Popen:
+    command = [
+        sys.executable, __file__, "--serve",
+        "--products", str(args.products),
+        "--backend-latency", str(args.backend_latency),
+        "--llm-latency", str(args.llm_latency),
+        "--token-delay", str(args.token_delay),
+        "--tool", args.tool,
+    ]
+    env = dict(os.environ)
+    env.update(item.split("=", 1) for item in args.env)
+    log = open(args.server_log, "w") if args.server_log else subprocess.DEVNULL
+    process = subprocess.Popen(
+        command, stdout=subprocess.PIPE, stderr=log, env=env, text=True
+    )
+    line = process.stdout.readline()
+    if not line.startswith("READY"):
+        process.kill()
+        raise RuntimeError("Service failed to start, run with --server-log to see why")
+    process.port = int(line.split()[1])
+    return process
+
+
+async def drive(args, process) -> Dict:
+    results = {}
+    for mode in args.modes:
+        results[mode] = await run_mode(mode, process.port, process.pid, args)
+        r = results[mode]
+        print(
+            f"{mode:5} {r['requests']:6} requests  {r['throughput']:7.1f} req/s  "
+            f"p50 {r['p50_ms']:7.1f}ms  p95 {r['p95_ms']:7.1f}ms  p99 {r['p99_ms']:7.1f}ms  "
+            f"errors {r['error_rate']:.2%}  shed {r['shed_rate']:.2%}  RSS {r['rss_start_mb']:.0f} -> {r['rss_peak_mb']:.0f}MB"
+        )
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Load test /chat and /ws/chat against a stub LLM and product backend"
+    )
+    parser.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--modes", nargs="+", choices=["http", "ws"], default=["http", "ws"])
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds per mode")
+    parser.add_argument("--turns", type=int, default=3, help="messages per conversation")
+    parser.add_argument("--stream", action="store_true", help="stream /ws/chat answers")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--products", type=int, default=1000)
+    parser.add_argument("--backend-latency", type=float, default=0.02)
+    parser.add_argument("--llm-latency", type=float, default=0.3)
+    parser.add_argument("--token-delay", type=float, default=0.0)
+    parser.add_argument("--tool", default="filter_products", help="tool the stub LLM calls ('' for none)")
+    parser.add_argument(
+        "--env", action="append", default=[], metavar="KEY=VALUE",
+        help="service setting for the run, e.g. --env LLM_MAX_CONCURRENCY=16",
+    )
+    parser.add_argument("--server-log", help="write the service's log to this file")
+    parser.add_argument("--save-baseline", nargs="?", const=str(DEFAULT_BASELINE))
+    parser.add_argument("--baseline", nargs="?", const=str(DEFAULT_BASELINE))
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args()
+
+    if args.serve:
+        asyncio.run(serve(args))
+        return
+
+    process = start_server(args)
+    try:
+        results = asyncio.run(drive(args, process))
+    finally:
+        process.terminate()
+        process.wait()
+
+    config = {
+        key: getattr(args, key)
+        for key in (
+            "concurrency", "duration", "turns", "stream", "products",
+            "backend_latency", "llm_latency", "token_delay", "tool", "env",
+        )
+    }
+    if args.save_baseline:
+        path = Path(args.save_baseline)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps({"config": config, "results": results}, indent=2) + "\n")
+        print(f"Baseline saved to {path}")
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text())
+        if baseline.get("config") != config:
+            print("Warning: baseline was recorded with different settings")
+        if not compare(results, baseline, args.tolerance):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
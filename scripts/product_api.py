@@ -0,0 +1,282 @@
+"""Client for the product backend's admin API, shared by create_products.py
+and delete_products.py.
+
+One pooled ``httpx.AsyncClient`` serves every request. ``run_bulk`` runs an
+operation over many products with bounded concurrency, retrying transient
+failures and reporting progress and throughput.
+"""
+
+import asyncio
+import json
+import os
+import random
+import time
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, Iterable, Iterator, List, Optional
+
+import httpx
+
+# Configuration
+API_BASE_URL = os.getenv("PRODUCT_API_URL", "http://localhost:8081/api")
+AUTH_CREDENTIALS = {
+    "username": os.getenv("PRODUCT_API_USERNAME", "admin"),
+    "password": os.getenv("PRODUCT_API_PASSWORD", "admin"),
+}
+
+# Statuses worth retrying: the request may succeed when sent again
+RETRY_STATUSES = {429, 502, 503, 504}
+# A POST may have been applied before a gateway error or a dropped
+# connection, so it is only retried when the server refused it
+REFUSED_STATUSES = {429, 503}
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+
+
+class ProductAPI:
+    def __init__(
+        self,
+        base_url: str = API_BASE_URL,
+        concurrency: int = 16,
+        retries: int = 3,
+        backoff: float = 0.5,
+        timeout: float = 30.0,
+    ):
+        self.base_url = base_url
+        self.retries = retries
+        self.backoff = backoff
+        self.token = None
+        self.headers = {"Content-Type": "application/json"}
+        # Keep a connection per worker alive for the whole run
+        self.client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=concurrency, max_keepalive_connections=concurrency
+            ),
+            timeout=timeout,
+        )
+        self.retried = 0
+
+    async def close(self):
+        await self.client.aclose()
+
+    async def request(self, method: str, path: str, **kwargs) -> httpx.Response:
+        """Send a request, retrying network errors and 429/5xx gateway
+        statuses with jittered exponential backoff. Non-idempotent requests
+        are retried only when they were never sent or were refused."""
+        idempotent = method.upper() in IDEMPOTENT_METHODS
+        statuses = RETRY_STATUSES if idempotent else REFUSED_STATUSES
+        for attempt in range(self.retries + 1):
+            try:
+                response = await self.client.request(
+                    method, f"{self.base_url}{path}", headers=self.headers, **kwargs
+                )
+                if response.status_code not in statuses or attempt == self.retries:
+                    return response
+            except (httpx.ConnectError, httpx.ConnectTimeout):
+                if attempt == self.retries:
+                    raise
+            except httpx.RequestError:
+                if not idempotent or attempt == self.retries:
+                    raise
+            self.retried += 1
+            await asyncio.sleep(random.uniform(0, self.backoff * 2**attempt))
+
+    async def login(self) -> bool:
+        """Login to get authentication token"""
+        try:
+            print(f"🔑 Logging in as {AUTH_CREDENTIALS['username']}")
+            response = await self.request("POST", "/auth/login", json=AUTH_CREDENTIALS)
+            response.raise_for_status()
+            data = response.json()
+
+            if "token" not in data:
+                print("❌ No token field in response")
+                return False
+
+            self.token = data["token"]
+            self.headers = {
+                "Content-Type": "application/json",
+                "Authorization": f"Bearer {self.token}",
+            }
+
+            roles = data.get("userDTO", {}).get("rolesNames", [])
+            if "ADMIN" not in roles:
+                print("❌ User does not have ADMIN role")
+                return False
+
+            print("✅ Successfully authenticated")
+            return True
+        except httpx.HTTPStatusError as e:
+            print(f"❌ HTTP Error during authentication: {e.response.status_code}")
+            return False
+        except Exception as e:
+            print(f"❌ Unexpected error during authentication: {str(e)}")
+            return False
+
+    async def get_products(self) -> List[Dict]:
+        """Get all products"""
+        try:
+            response = await self.request("GET", "/products")
+            response.raise_for_status()
+            return response.json()
+        except httpx.HTTPStatusError as e:
+            print(f"❌ HTTP Error getting products: {e.response.status_code}")
+            return []
+        except Exception as e:
+            print(f"❌ Unexpected error getting products: {str(e)}")
+            return []
+
+    async def create_product(self, product: Dict) -> bool:
+        """Create a single product"""
+        response = await self.request("POST", "/products", json=product)
+        response.raise_for_status()
+        return True
+
+    async def delete_product(self, product_id: str) -> bool:
+        """Delete a single product by ID"""
+        response = await self.request("DELETE", f"/products/{product_id}")
+        if response.status_code == 404:
+            # Not in the relational DB, try to delete it from MongoDB only
+            response = await self.request("DELETE", f"/products/mongo/{product_id}")
+        response.raise_for_status()
+        return True
+
+
+class BulkResult:
+    def __init__(self, total: Optional[int]):
+        self.total = total
+        self.succeeded = 0
+        self.failed = 0
+        self.latencies: List[float] = []
+        self.errors: Dict[str, int] = {}
+        self.started = time.perf_counter()
+        self.elapsed = 0.0
+
+    @property
+    def done(self) -> int:
+        return self.succeeded + self.failed
+
+    def progress(self) -> str:
+        rate = self.done / max(time.perf_counter() - self.started, 1e-9)
+        of = f"/{self.total}" if self.total is not None else ""
+        return f"{self.done}{of} done, {self.failed} failed, {rate:.0f}/s"
+
+    def summary(self, verb: str, retried: int) -> str:
+        latencies = sorted(self.latencies)
+
+        def pct(q):
+            if not latencies:
+                return 0.0
+            return latencies[min(len(latencies) - 1, int(len(latencies) * q))] * 1000
+
+        lines = [
+            f"{verb} {self.succeeded} products, {self.failed} failed, {retried} retries "
+            f"in {self.elapsed:.1f}s ({self.succeeded / max(self.elapsed, 1e-9):.0f} products/s)",
+            f"request latency p50 {pct(0.5):.0f}ms, p95 {pct(0.95):.0f}ms, p99 {pct(0.99):.0f}ms",
+        ]
+        for error, count in sorted(self.errors.items(), key=lambda e: -e[1]):
+            lines.append(f"  {count} x {error}")
+        return "\n".join(lines)
+
+
+async def run_bulk(
+    operation: Callable[[Dict], Awaitable[bool]],
+    products: Iterable[Dict],
+    concurrency: int,
+    total: Optional[int] = None,
+    progress_every: float = 2.0,
+) -> BulkResult:
+    """Run ``operation`` over every product with at most ``concurrency`` in
+    flight. Products are pulled lazily, so large files are never held in
+    memory as a whole."""
+    result = BulkResult(total)
+    items = iter(products)
+
+    async def worker():
+        for product in items:
+            start = time.perf_counter()
+            try:
+                await operation(product)
+                result.succeeded += 1
+                result.latencies.append(time.perf_counter() - start)
+            except httpx.HTTPStatusError as e:
+                result.failed += 1
+                key = f"HTTP {e.response.status_code}"
+                result.errors[key] = result.errors.get(key, 0) + 1
+            except Exception as e:
+                result.failed += 1
+                key = type(e).__name__
+                result.errors[key] = result.errors.get(key, 0) + 1
+
+    async def report():
+        while True:
+            await asyncio.sleep(progress_every)
+            print(f"⏳ {result.progress()}")
+
+    reporter = asyncio.create_task(report())
+    try:
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+    finally:
+        reporter.cancel()
+        result.elapsed = time.perf_counter() - result.started
+    return result
+
+
+def load_jsonl(path: str) -> Iterator[Dict]:
+    """Products from a JSON Lines file, one object per line"""
+    with open(path, encoding="utf-8") as f:
+        for number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"{path}:{number}: invalid JSON ({e.msg})") from None
+
+
+def count_lines(path: str) -> int:
+    with open(path, "rb") as f:
+        return sum(1 for line in f if line.strip())
+
+
+BRANDS = ["Apple", "Lenovo", "Dell", "HP", "ASUS", "Acer", "MSI", "Samsung"]
+PROCESSORS = ["Apple M3", "Intel i7-1355U", "Intel i9-13900H", "AMD Ryzen 9 7940HS"]
+GRAPHICS = ["Integrated", "Intel Iris Xe", "NVIDIA RTX 4060", "NVIDIA RTX 4070"]
+
+
+def synthetic_products(count: int, seed: int = 0) -> Iterator[Dict]:
+    """Generated products shaped like the sample catalog, for large test
+    catalogs"""
+    rng = random.Random(seed)
+    release = int((datetime.now() + timedelta(days=365)).timestamp() * 1000)
+    for i in range(count):
+        brand = rng.choice(BRANDS)
+        product = {
+            "name": f"{brand} Test {i}",
+            "brand": brand,
+            "model": str(2020 + i % 5),
+            "description": f"Synthetic test product number {i}",
+            "price": round(rng.uniform(99, 3999), 2),
+            "stock": rng.randint(0, 100),
+            "warrantyPeriod": 12,
+            "releaseDate": release,
+            "images": {"front": f"https://example.com/products/{i}.png"},
+        }
+        if i % 4 == 3:
+            product.update(
+                category="Impresion",
+                productType="Printer",
+                printingTechnology=rng.choice(["Laser", "Inkjet"]),
+                connectivityOptions=["USB", "Wi-Fi"],
+            )
+        else:
+            product.update(
+                category="Computacion",
+                productType="Laptop",
+                processor=rng.choice(PROCESSORS),
+                ram=rng.choice(["8GB", "16GB", "32GB"]),
+                storageType="SSD",
+                storageCapacity=rng.choice(["512GB", "1TB"]),
+                graphicsCard=rng.choice(GRAPHICS),
+                operatingSystem=rng.choice(["Windows 11 Pro", "macOS"]),
+            )
+        yield product
@@ -0,0 +1,107 @@
+import argparse
+import asyncio
+import cProfile
+import logging
+import os
+import pstats
+import time
+
+from stubs import StubProductBackend, make_products
+import logging_config
+from logging_config import StructuredFormatter, configure_logging, stop_logging
+from inventory import InventoryManager
+
+
+async def hot_path(inventory: InventoryManager, rounds: int):
+    """The backend calls and catalog reads of a busy service"""
+    client = inventory.product_client
+    for i in range(rounds):
+        client._products = None  # a full download and parse
+        await client.get_products()
+        await client.get_products()  # a 304 revalidation
+        await client.get_product(f"p{i % 50 + 1}")
+        await inventory.get_product_list()
+
+
+async def profile(args) -> pstats.Stats:
+    backend = StubProductBackend(make_products(args.products))
+    async with backend.serve() as base_url:
+        inventory = InventoryManager()
+        inventory.product_client.base_url = base_url
+        await hot_path(inventory, 5)
+
+        profiler = cProfile.Profile()
+        wall, cpu, loop_cpu = time.perf_counter(), time.process_time(), time.thread_time()
+        profiler.enable()
+        await hot_path(inventory, args.rounds)
+        profiler.disable()
+        loop_cpu = time.thread_time() - loop_cpu
+        cpu = time.process_time() - cpu
+        wall = time.perf_counter() - wall
+        await inventory.close()
+
+    stats = pstats.Stats(profiler)
+    logging_dir = os.path.dirname(logging.__file__)
+    in_logging = sum(
+        tottime for (path, _, _), (_, _, tottime, _, _) in stats.stats.items()
+        if path.startswith(logging_dir)
+    )
+    print(f"event loop CPU  {loop_cpu / args.rounds * 1000:8.3f}ms per round")
+    print(f"process CPU     {cpu / args.rounds * 1000:8.3f}ms per round (all threads)")
+    print(f"wall time       {wall / args.rounds * 1000:8.3f}ms per round")
+    print(f"in logging      {in_logging / args.rounds * 1000:8.3f}ms per round on the event loop (profiled)")
+    return stats
+
+
+def run_baseline(args, stream):
+    """Every line formatted and written by a handler on the event loop"""
+    handler = logging.StreamHandler(stream)
+    handler.setFormatter(StructuredFormatter())
+    root = logging.getLogger()
+    root.setLevel(args.level.upper())
+    root.addHandler(handler)
+    # As in the service, so both runs log the same lines
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    logging_config.SAMPLE_RATE = 1.0
+    try:
+        return asyncio.run(profile(args))
+    finally:
+        root.removeHandler(handler)
+
+
+def run_service(args, stream):
+    """The service's setup: a queue to a writer thread, sampled request lines"""
+    os.environ["LOG_SAMPLE_RATE"] = str(args.sample_rate)
+    configure_logging(args.level, stream=stream)
+    try:
+        return asyncio.run(profile(args))
+    finally:
+        stop_logging()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="CPU profile of the product backend hot path with service logging"
+    )
+    parser.add_argument("--products", type=int, default=1000)
+    parser.add_argument("--rounds", type=int, default=200)
+    parser.add_argument("--level", default="info")
+    parser.add_argument("--sample-rate", type=float, default=0.1, help="LOG_SAMPLE_RATE of the service run")
+    parser.add_argument("--log-file", default=os.devnull, help="where log lines are written")
+    parser.add_argument("--top", type=int, default=0, help="print the N most expensive functions")
+    args = parser.parse_args()
+
+    print(f"{args.rounds} rounds, {args.products} products, LOG_LEVEL={args.level}")
+    with open(args.log_file, "w") as stream:
+        for label, run in (
+            ("baseline: synchronous handler, every line", run_baseline),
+            (f"service: queue handler, sample rate {args.sample_rate}", run_service),
+        ):
+            print(f"\n{label}")
+            stats = run(args, stream)
+            if args.top:
+                stats.sort_stats("tottime").print_stats(args.top)
+
+
+if __name__ == "__main__":
+    main()
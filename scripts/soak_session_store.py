@@ -0,0 +1,68 @@
+import argparse
+import gc
+import resource
+import time
+import uuid
+
+from langchain_core.messages import AIMessage, HumanMessage
+
+import stubs  # noqa: F401  (puts langchain_server on the path)
+from session_store import SessionStore
+
+
+def rss_mb() -> float:
+    """Current resident set size, falling back to the peak where /proc is missing"""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * resource.getpagesize() / 2**20
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Simulate many one-off chat sessions and check memory stays bounded"
+    )
+    parser.add_argument("--sessions", type=int, default=1_000_000)
+    parser.add_argument("--max-sessions", type=int, default=10000)
+    parser.add_argument("--turns", type=int, default=2)
+    parser.add_argument("--max-growth-mb", type=float, default=50.0)
+    args = parser.parse_args()
+
+    store = SessionStore(max_sessions=args.max_sessions, max_messages=10)
+    answer_text = "We currently have 42 computers available. " * 5
+
+    # Measure after the store has filled up once
+    warmup = 2 * args.max_sessions
+    baseline = None
+    start = time.perf_counter()
+    for i in range(args.sessions):
+        session_id = str(uuid.uuid4())
+        for turn in range(args.turns):
+            store.append(
+                session_id,
+                HumanMessage(content=f"Question {turn} from {session_id}"),
+                AIMessage(content=answer_text),
+            )
+
+        if i + 1 == warmup:
+            gc.collect()
+            baseline = rss_mb()
+        if (i + 1) % (args.sessions // 10 or 1) == 0:
+            print(
+                f"{i + 1:>9} sessions  rss {rss_mb():8.1f}MB  "
+                f"{store.stats()}  {time.perf_counter() - start:6.1f}s"
+            )
+
+    gc.collect()
+    final = rss_mb()
+    assert len(store) <= args.max_sessions
+    if baseline is not None:
+        growth = final - baseline
+        print(f"RSS growth after warm-up: {growth:.1f}MB")
+        assert growth < args.max_growth_mb, f"RSS grew by {growth:.1f}MB"
+
+
+if __name__ == "__main__":
+    main()
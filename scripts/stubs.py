@@ -0,0 +1,224 @@
+"""Local stand-ins for the OpenAI chat model and the product backend used by
+the benchmark scripts"""
+
+import asyncio
+import hashlib
+import json
+import random
+import re
+import socket
+import sys
+import time
+import uuid
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from email.utils import formatdate
+
+import uvicorn
+from fastapi import FastAPI, Request, Response
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+# Make the langchain_server modules importable the same way the service does
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "langchain_server"))
+
+
+class FakeChatModel(BaseChatModel):
+    """Chat model that sleeps for a fixed latency instead of calling OpenAI.
+
+    ``latency`` is the time to the first token and ``token_delay`` the time
+    between later tokens. When ``tool_name`` is set, the first turn asks for
+    that tool and the turn after the tool result returns a plain answer,
+    mimicking the real flow.
+    """
+
+    latency: float = 0.5
+    token_delay: float = 0.0
+    tool_name: Optional[str] = None
+    answer: str = "We have several computers available."
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat-model"
+
+    def bind_tools(self, tools: Any, **kwargs: Any) -> "FakeChatModel":
+        return self
+
+    def _reply(self, messages: List[BaseMessage]) -> ChatResult:
+        if self.tool_name and not isinstance(messages[-1], ToolMessage):
+            message = AIMessage(
+                content="",
+                tool_calls=[
+                    {"name": self.tool_name, "args": {}, "id": str(uuid.uuid4())}
+                ],
+            )
+        else:
+            message = AIMessage(content=self.answer)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _tokens(self) -> List[str]:
+        return re.findall(r"\S+\s*", self.answer)
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        time.sleep(self.latency + self.token_delay * (len(self._tokens()) - 1))
+        return self._reply(messages)
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        await asyncio.sleep(self.latency + self.token_delay * (len(self._tokens()) - 1))
+        return self._reply(messages)
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        await asyncio.sleep(self.latency)
+        message = self._reply(messages).generations[0].message
+        if message.tool_calls:
+            call = message.tool_calls[0]
+            yield ChatGenerationChunk(
+                message=AIMessageChunk(
+                    content="",
+                    tool_call_chunks=[
+                        {"name": call["name"], "args": "{}", "id": call["id"], "index": 0}
+                    ],
+                )
+            )
+            return
+
+        for i, token in enumerate(self._tokens()):
+            if i:
+                await asyncio.sleep(self.token_delay)
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=token))
+            if run_manager:
+                await run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
+
+
+BRANDS = ["Apple", "Lenovo", "Dell", "HP", "ASUS", "Acer", "MSI", "Epson"]
+PROCESSORS = ["Apple M3", "Intel i7-1355U", "Intel i9-13900H", "AMD Ryzen 9 7940HS"]
+GRAPHICS = ["Apple M3 GPU", "Intel Iris Xe", "NVIDIA RTX 4060", "NVIDIA RTX 4070"]
+
+
+def make_products(count: int, seed: int = 0) -> List[Dict]:
+    """Synthetic catalog shaped like the records in scripts/create_products.py"""
+    rng = random.Random(seed)
+    products = []
+    for i in range(count):
+        brand = rng.choice(BRANDS)
+        product = {
+            "id": f"p{i}",
+            "name": f"{brand} Model {i}",
+            "brand": brand,
+            "model": str(2020 + i % 5),
+            "description": f"Synthetic product number {i}",
+            "price": round(rng.uniform(99, 3999), 2),
+            "stock": rng.randint(0, 100),
+            "warrantyPeriod": 12,
+            "releaseDate": 1700000000000 + i,
+            "images": {"front": f"https://example.com/{i}.png"},
+        }
+        if i % 4 == 3:
+            product.update(
+                category="Impresion",
+                printingTechnology=rng.choice(["Laser", "Inkjet"]),
+                connectivityOptions=["USB", "Wi-Fi"],
+            )
+        else:
+            product.update(
+                category="Computacion",
+                processor=rng.choice(PROCESSORS),
+                ram=rng.choice(["8GB", "16GB", "32GB"]),
+                storageType="SSD",
+                storageCapacity=rng.choice(["512GB", "1TB"]),
+                graphicsCard=rng.choice(GRAPHICS),
+                operatingSystem=rng.choice(["Windows 11 Pro", "macOS"]),
+            )
+        products.append(product)
+    return products
+
+
+class StubProductBackend:
+    """In-process stand-in for the ``/api/products`` backend.
+
+    Records every request and every distinct TCP connection so benchmarks
+    can report how many sockets a client opened. ``error_rate`` makes that
+    share of requests fail with a 503 and ``outage`` fails all of them.
+    """
+
+    def __init__(
+        self,
+        products: List[Dict],
+        latency: float = 0.0,
+        error_rate: float = 0.0,
+        seed: int = 0,
+    ):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.outage = False
+        self._rng = random.Random(seed)
+        self.requests = 0
+        self.errors = 0
+        self.not_modified = 0
+        self.connections = set()
+        self.set_products(products)
+        self.app = FastAPI()
+        self.app.add_api_route("/api/products", self.list_products)
+        self.app.add_api_route("/api/products/{product_id}", self.get_product)
+
+    def set_products(self, products: List[Dict]):
+        self.products = {p["id"]: p for p in products}
+        self._body = json.dumps(products).encode()
+        self.etag = f'"{hashlib.sha1(self._body).hexdigest()}"'
+        self.last_modified = formatdate(usegmt=True)
+
+    async def _record(self, request: Request):
+        self.requests += 1
+        self.connections.add((request.client.host, request.client.port))
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+    def _fail(self) -> bool:
+        if self.outage or (self.error_rate and self._rng.random() < self.error_rate):
+            self.errors += 1
+            return True
+        return False
+
+    async def list_products(self, request: Request):
+        await self._record(request)
+        if self._fail():
+            return Response(status_code=503)
+        headers = {"ETag": self.etag, "Last-Modified": self.last_modified}
+        if request.headers.get("If-None-Match") == self.etag:
+            self.not_modified += 1
+            return Response(status_code=304, headers=headers)
+        return Response(
+            content=self._body, media_type="application/json", headers=headers
+        )
+
+    async def get_product(self, product_id: str, request: Request):
+        await self._record(request)
+        if self._fail():
+            return Response(status_code=503)
+        if product_id not in self.products:
+            return Response(status_code=404)
+        return Response(
+            content=json.dumps(self.products[product_id]),
+            media_type="application/json",
+        )
+
+    @asynccontextmanager
+    async def serve(self):
+        """Run the stub on a free local port and yield its API base URL"""
+        sock = socket.socket()
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+        config = uvicorn.Config(self.app, log_level="warning", lifespan="off")
+        server = uvicorn.Server(config)
+        task = asyncio.create_task(server.serve(sockets=[sock]))
+        while not server.started:
+            await asyncio.sleep(0.01)
+        try:
+            yield f"http://127.0.0.1:{port}/api"
+        finally:
+            server.should_exit = True
+            await task
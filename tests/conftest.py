@@ -0,0 +1,11 @@
+import logging
+import sys
+from pathlib import Path
+
+# The tests share the stand-ins of the benchmark scripts
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
+
+import stubs  # noqa: E402,F401  (puts langchain_server on the path)
+
+logging.getLogger("product_client").setLevel(logging.WARNING)
+logging.getLogger("httpx").setLevel(logging.WARNING)
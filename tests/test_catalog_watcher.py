@@ -0,0 +1,85 @@
+import asyncio
+import os
+import time
+
+from fastapi.testclient import TestClient
+
+from stubs import StubProductBackend, make_products
+from inventory import InventoryManager
+
+
+async def wait_for(condition, timeout: float):
+    start = time.perf_counter()
+    while not condition():
+        assert time.perf_counter() - start < timeout, "timed out"
+        await asyncio.sleep(0.01)
+
+
+def test_watcher_keeps_the_catalog_warm_and_picks_up_changes():
+    async def run():
+        catalog = make_products(50)
+        backend = StubProductBackend(catalog, latency=0.05)
+        async with backend.serve() as base_url:
+            inventory = InventoryManager()
+            inventory.product_client.base_url = base_url
+            inventory.poll_interval = 0.2
+            await inventory.start()
+            try:
+                # The first question is answered from the prefetched catalog
+                requests = backend.requests
+                assert (await inventory.get_product_list()).startswith("Available Products")
+                await inventory.search_products("Model 1")
+                assert backend.requests == requests
+                assert inventory.catalog.misses == 0
+
+                # A push is picked up at once and diffed per product
+                version = inventory.catalog.version
+                catalog[1] = dict(catalog[1], price=1.0)
+                backend.set_products(catalog)
+                inventory.refresh_soon()
+                await wait_for(lambda: inventory.catalog.version != version, 0.15)
+                assert inventory.catalog.last_diff.changed == ["p1"]
+                assert "$1.00" in await inventory.get_product_list()
+
+                # Without a push the poll finds the change
+                version = inventory.catalog.version
+                backend.set_products(catalog[:-1] + [dict(catalog[-1], id="new")])
+                await wait_for(lambda: inventory.catalog.version != version, 1)
+                diff = inventory.catalog.last_diff
+                assert diff.added == ["new"] and diff.removed == [catalog[-1]["id"]]
+                # and the consumers are brought up to date before anyone asks
+                await wait_for(
+                    lambda: inventory._versions.get("index") == inventory.catalog.version, 1
+                )
+
+                # A new download with the same content keeps the version
+                version = inventory.catalog.version
+                backend.set_products(
+                    [dict(p, warrantyPeriod=24) for p in backend.products.values()]
+                )
+                inventory.refresh_soon()
+                await wait_for(lambda: inventory.catalog.unchanged > 0, 1)
+                assert inventory.catalog.version == version
+                assert inventory.watcher_stats()["running"]
+            finally:
+                await inventory.close()
+
+    asyncio.run(run())
+
+
+def test_webhook_checks_its_token(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "stub")
+    import inventory_service
+
+    client = TestClient(inventory_service.app)
+    inventory = inventory_service.ws_manager.chat_engine.inventory_manager
+    pushes = inventory.pushes
+
+    monkeypatch.delenv("CATALOG_WEBHOOK_SECRET", raising=False)
+    assert client.post("/catalog/webhook").status_code == 404
+    monkeypatch.setenv("CATALOG_WEBHOOK_SECRET", "s3cret")
+    response = client.post("/catalog/webhook", headers={"X-Webhook-Token": "nope"})
+    assert response.status_code == 401
+    response = client.post("/catalog/webhook", headers={"X-Webhook-Token": "s3cret"})
+    assert response.status_code == 202
+    assert inventory.pushes == pushes + 1
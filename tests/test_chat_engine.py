@@ -0,0 +1,81 @@
+import asyncio
+import time
+
+from langchain_core.messages import AIMessage, HumanMessage
+
+from stubs import FakeChatModel
+from chat_engine import ChatEngine
+from concurrency import LLMLimiter
+
+
+class CountingChatModel(FakeChatModel):
+    """FakeChatModel that records how many calls run at the same time"""
+
+    running: int = 0
+    peak: int = 0
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        try:
+            return await super()._agenerate(messages, stop, run_manager, **kwargs)
+        finally:
+            self.running -= 1
+
+
+def test_anonymous_requests_are_not_serialized():
+    """Requests without a session id neither share a conversation nor wait
+    for each other"""
+
+    async def run():
+        llm = FakeChatModel(latency=0.1)
+        engine = ChatEngine(llm=llm)
+        start = time.perf_counter()
+        answers = await asyncio.gather(
+            *(engine.process_message("Recommend a laptop") for _ in range(10))
+        )
+        return engine, llm, answers, time.perf_counter() - start
+
+    engine, llm, answers, elapsed = asyncio.run(run())
+    assert answers == [llm.answer] * 10
+    # One after another would take 10 model latencies
+    assert elapsed < 0.5
+    assert engine.session_locks.stats()["rejected"] == 0
+    # One-off conversations are not kept
+    assert len(engine.conversations) == 0
+
+
+def test_messages_of_one_session_are_answered_in_order():
+    async def run():
+        engine = ChatEngine(llm=FakeChatModel(latency=0.05))
+        await asyncio.gather(
+            *(engine.process_message(f"Question {i}", "same-session") for i in range(3))
+        )
+        return engine.conversations.get("same-session")
+
+    history = asyncio.run(run())
+    # Each question is followed by its own answer
+    assert [type(m) for m in history] == [HumanMessage, AIMessage] * 3
+    assert [m.content for m in history[::2]] == ["Question 0", "Question 1", "Question 2"]
+
+
+def test_a_burst_is_capped_and_the_overflow_rejected():
+    async def run():
+        llm = CountingChatModel(latency=0.1)
+        engine = ChatEngine(llm=llm)
+        engine.fast_path = False
+        engine.responses.max_entries = 0
+        engine.llm_limiter = LLMLimiter(max_concurrent=4, max_queue=8, queue_timeout=10)
+        answers = await asyncio.gather(
+            *(engine.process_message(f"Recommend a laptop for task {i}", f"s{i}") for i in range(30))
+        )
+        return engine, llm, answers
+
+    engine, llm, answers = asyncio.run(run())
+    served = [i for i, answer in enumerate(answers) if answer == llm.answer]
+    rejected = [i for i, answer in enumerate(answers) if answer.startswith("I'm receiving too many")]
+    assert llm.peak == 4
+    assert len(served) == 12 and len(rejected) == 18
+    # A rejected turn leaves no unanswered question in its session
+    assert all(len(engine.conversations.get(f"s{i}")) == 2 for i in served)
+    assert all(len(engine.conversations.get(f"s{i}")) == 0 for i in rejected)
@@ -0,0 +1,89 @@
+import pytest
+
+from stubs import make_products
+from product_client import Product
+from catalog_cache import CatalogDiff
+from intent_router import IntentRouter
+from product_index import ProductIndex
+from semantic_index import SemanticIndex
+
+
+def catalogs():
+    """A catalog and its next version: products added, changed, repriced
+    and removed"""
+    records = make_products(200)
+    old = [Product(**r) for r in records]
+    new = []
+    for i, r in enumerate(records):
+        if i % 10 == 0:
+            continue
+        if i % 10 == 1:
+            r = dict(r, description=r["description"] + " refurbished")
+        elif i % 10 == 2:
+            r = dict(r, price=r["price"] + 1, stock=0)
+        new.append(Product(**r))
+    new += [Product(**dict(r, id=f"n{r['id']}")) for r in make_products(20, seed=1)]
+
+    ids = {p.id for p in old}
+    old_by_id = {p.id: p for p in old}
+    diff = CatalogDiff(
+        added=[p.id for p in new if p.id not in ids],
+        changed=[p.id for p in new if p.id in ids and p != old_by_id[p.id]],
+        removed=[pid for pid in ids if pid not in {p.id for p in new}],
+    )
+    changed = [p for p in new if p.id in set(diff.added + diff.changed)]
+    return old, new, changed, diff
+
+
+SEARCHES = [
+    dict(query="refurbished"),
+    dict(query="laptop intel"),
+    dict(category="Impresion", in_stock=True),
+    dict(min_price=500, max_price=1500, limit=50),
+]
+
+
+def product_searches(index):
+    return [index.search(**search) for search in SEARCHES]
+
+
+def semantic_searches(index):
+    return [[p.id for p, _ in index.search(q)] for q in ("refurbished laptop", "printer")]
+
+
+def build_semantic_index(products):
+    index = SemanticIndex()
+    index.update(products)
+    return index
+
+
+@pytest.mark.parametrize(
+    "build, searches",
+    [(ProductIndex, product_searches), (build_semantic_index, semantic_searches)],
+    ids=["product_index", "semantic_index"],
+)
+def test_diffed_update_of_a_copy_matches_a_rebuild(build, searches):
+    old, new, changed, diff = catalogs()
+    index, fresh = build(old), build(new)
+
+    copy = index.copy()
+    copy.update(changed, diff)
+
+    assert searches(copy) == searches(fresh)
+    assert len(copy) == len(fresh)
+    # Readers of the original see the old catalog throughout
+    assert searches(index) == searches(build(old))
+    assert len(index) == len(old)
+
+
+def test_diffed_router_update_matches_a_rebuild():
+    old, new, changed, diff = catalogs()
+    router, fresh = IntentRouter(), IntentRouter()
+    router.update(old)
+    router.update(changed, diff)
+    fresh.update(new)
+
+    assert router._counts == fresh._counts
+    assert {k: set(v) for k, v in router._names.items()} == {
+        k: set(v) for k, v in fresh._names.items()
+    }
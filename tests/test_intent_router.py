@@ -0,0 +1,89 @@
+import asyncio
+
+import pytest
+
+from stubs import FakeChatModel, StubProductBackend, make_products
+from product_client import Product
+from chat_engine import ChatEngine
+from intent_router import IntentRouter
+
+
+def catalog():
+    records = make_products(8)
+    records[0].update(price=1299.0, stock=4)
+    records[1].update(stock=0)
+    return [Product(**r) for r in records]
+
+
+@pytest.fixture
+def router():
+    router = IntentRouter()
+    router.update(catalog())
+    return router
+
+
+def test_counts_by_category(router):
+    products = catalog()
+    printers = [p for p in products if p.category == "Impresion"]
+    in_stock = sum(p.stock > 0 for p in printers)
+
+    answer = router.route("How many printers do you have?")
+    assert answer.startswith(f"We have {len(printers)} printers in our catalog, {in_stock}")
+    answer = router.route("¿Cuántas impresoras hay?")
+    assert answer.startswith(f"Tenemos {len(printers)} impresoras")
+    assert router.route("how many products are in stock").startswith(
+        f"We have {len(products)} products"
+    )
+
+
+def test_price_and_stock_of_one_product(router):
+    name = catalog()[0].name
+    assert router.route(f"What is the price of the {name}?") == (
+        f"The {name} costs $1,299.00. Would you like more information about it?"
+    )
+    assert router.route(f"¿Cuánto cuesta el {name}?").startswith(f"El {name} cuesta $1,299.00")
+    assert router.route(f"Is the {name} in stock?").startswith(f"Yes, we have 4 units of the {name}")
+    out_of_stock = catalog()[1].name
+    assert router.route(f"Is the {out_of_stock} available?").startswith(f"Sorry, the {out_of_stock}")
+    assert router.stats() == {"count": 0, "price": 2, "stock": 2, "fallbacks": 0}
+
+
+@pytest.mark.parametrize(
+    "message",
+    [
+        "Recommend a laptop for video editing",
+        # A brand names several products
+        "How much does Dell cost?",
+        "How many printers with wi-fi do you have?",
+        "What is the price of the Model 999?",
+    ],
+)
+def test_anything_else_goes_to_the_model(router, message):
+    assert router.route(message) is None
+    assert router.stats()["fallbacks"] == 1
+
+
+def test_routed_questions_skip_the_model():
+    async def run():
+        backend = StubProductBackend([dict(r) for r in make_products(8)])
+        async with backend.serve() as base_url:
+            llm = FakeChatModel(latency=0.05)
+            engine = ChatEngine(llm=llm)
+            engine.inventory_manager.product_client.base_url = base_url
+            await engine.start()
+            try:
+                routed = await engine.process_message("How many computers do you have?", "s1")
+                other = await engine.process_message("Recommend a laptop", "s2")
+            finally:
+                await engine.close()
+        return llm, routed, other, engine
+
+    llm, routed, other, engine = asyncio.run(run())
+    assert routed.startswith("We have 6 computers in our catalog")
+    assert other == llm.answer
+    assert engine.inventory_manager.router.stats()["count"] == 1
+    # Both turns are kept in their conversations
+    assert [m.content for m in engine.conversations.get("s1")] == [
+        "How many computers do you have?",
+        routed,
+    ]
@@ -0,0 +1,39 @@
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+import logging_config
+from logging_config import SampleRequests, sampled
+
+
+def make_app():
+    app = FastAPI()
+    app.add_middleware(SampleRequests)
+
+    @app.get("/lines")
+    async def lines():
+        return [sampled() for _ in range(20)]
+
+    @app.get("/stream")
+    async def stream():
+        async def events():
+            for _ in range(20):
+                yield f"{sampled()}\n"
+
+        return StreamingResponse(events(), media_type="text/plain")
+
+    return app
+
+
+def test_each_request_is_sampled_once(monkeypatch):
+    monkeypatch.setattr(logging_config, "SAMPLE_RATE", 0.5)
+    client = TestClient(make_app())
+    decisions = set()
+    for _ in range(20):
+        lines = client.get("/lines").json()
+        # A request keeps or drops all of its lines
+        assert len(set(lines)) == 1
+        decisions.add(lines[0])
+        streamed = client.get("/stream").text.split()
+        assert len(set(streamed)) == 1
+    assert decisions == {True, False}
@@ -0,0 +1,136 @@
+import asyncio
+import logging
+import time
+
+import pytest
+
+from stubs import StubProductBackend, make_products
+from product_client import ProductClient
+from inventory import InventoryManager
+
+
+@pytest.fixture(autouse=True)
+def quiet_failures():
+    # The failures below are expected; keep their tracebacks out of the output
+    loggers = [logging.getLogger(name) for name in ("product_client", "circuit_breaker")]
+    levels = [logger.level for logger in loggers]
+    for logger in loggers:
+        logger.setLevel(logging.CRITICAL)
+    yield
+    for logger, level in zip(loggers, levels):
+        logger.setLevel(level)
+
+
+def make_client(base_url: str, retries: int = 2, timeout: float = 0.2) -> ProductClient:
+    client = ProductClient(
+        base_url=base_url,
+        timeout=timeout,
+        connect_timeout=timeout,
+        retries=retries,
+        retry_backoff=0.01,
+    )
+    client.breaker.failure_threshold = 3
+    client.breaker.reset_timeout = 0.3
+    return client
+
+
+def test_not_modified_reuses_the_parsed_catalog():
+    async def run():
+        catalog = make_products(100)
+        backend = StubProductBackend(catalog)
+        async with backend.serve() as base_url:
+            client = ProductClient(base_url=base_url)
+            decodes = []
+            loads = client.loads
+            client.loads = lambda body: decodes.append(len(body)) or loads(body)
+
+            first = await client.get_products()
+            revalidated = [await client.get_products() for _ in range(5)]
+
+            catalog[0] = dict(catalog[0], price=1.0)
+            backend.set_products(catalog)
+            changed = await client.get_products()
+            await client.close()
+        return backend, decodes, first, revalidated, changed
+
+    backend, decodes, first, revalidated, changed = asyncio.run(run())
+    assert all(products is first for products in revalidated)
+    assert backend.not_modified == 5
+    # One decode for the first download and one for the changed catalog
+    assert len(decodes) == 2
+    assert changed is not first and changed[0].price == 1.0
+
+
+def test_retries_ride_out_a_flaky_backend():
+    async def run(retries):
+        backend = StubProductBackend(make_products(20), error_rate=0.3, seed=1)
+        async with backend.serve() as base_url:
+            client = make_client(base_url, retries=retries)
+            # Keep the breaker out of the way to measure retries alone
+            client.breaker.failure_threshold = 10**9
+            ok = 0
+            for _ in range(100):
+                ok += bool(await client.get_products())
+                client._products = None  # no 304s, always a full fetch
+            await client.close()
+        return ok
+
+    without, with_retries = asyncio.run(run(0)), asyncio.run(run(2))
+    assert without < 85
+    # Three attempts each fail with probability 0.3 ** 3
+    assert with_retries >= 95
+
+
+def test_open_breaker_serves_the_last_catalog_without_calling_the_backend():
+    async def run():
+        backend = StubProductBackend(make_products(20))
+        async with backend.serve() as base_url:
+            inventory = InventoryManager()
+            inventory.product_client = make_client(base_url)
+            inventory.catalog.fetch = inventory.product_client.get_products
+            inventory.catalog.ttl = 0  # every read revalidates
+            assert (await inventory.get_product_list()).startswith("Available Products")
+
+            backend.outage = True
+            for _ in range(3):
+                await inventory.catalog.refresh()
+            breaker = inventory.product_client.breaker
+            assert breaker.state == "open"
+
+            requests = backend.requests
+            for _ in range(20):
+                listing = await inventory.get_product_list()
+                await inventory.catalog.refresh()
+            assert backend.requests == requests
+            assert listing.startswith("Note: the product backend is unavailable")
+            assert "Available Products" in listing
+            product = await inventory.get_product("p1")
+            assert product.startswith("Note:") and "Model 1" in product
+
+            # After the reset timeout one trial request closes it again
+            backend.outage = False
+            await asyncio.sleep(breaker.reset_timeout)
+            await inventory.catalog.refresh()
+            assert breaker.state == "closed"
+            assert not inventory.catalog.failing
+            assert (await inventory.get_product_list()).startswith("Available Products")
+            await inventory.close()
+
+    asyncio.run(run())
+
+
+def test_read_timeouts_bound_a_hung_backend():
+    async def run():
+        backend = StubProductBackend(make_products(20), latency=1.0)
+        async with backend.serve() as base_url:
+            client = make_client(base_url, retries=2, timeout=0.1)
+            start = time.perf_counter()
+            products = await client.get_products()
+            elapsed = time.perf_counter() - start
+            await client.close()
+        return products, elapsed
+
+    products, elapsed = asyncio.run(run())
+    assert products == []
+    # Three attempts of 0.1s plus the backoff between them
+    assert elapsed < 0.3 + 0.04 + 0.3
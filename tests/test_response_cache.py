@@ -0,0 +1,28 @@
+from response_cache import ResponseCache
+
+
+def test_late_put_for_an_older_version_is_ignored():
+    cache = ResponseCache()
+    assert cache.get("How many laptops?", 1) is None
+    cache.put("How many laptops?", 1, "12 laptops")
+    # Another turn sees the catalog change
+    assert cache.get("Cheapest printer?", 2) is None
+    cache.put("Cheapest printer?", 2, "The Epson one")
+
+    # A turn that started on version 1 finishes late
+    cache.put("Any monitors?", 1, "Stale answer")
+
+    assert cache.version == 2
+    assert cache.get("Cheapest printer?", 2) == "The Epson one"
+    assert cache.get("Any monitors?", 2) is None
+    assert cache.invalidations == 1
+
+
+def test_lookup_for_an_older_version_keeps_the_cache():
+    cache = ResponseCache()
+    cache.get("Cheapest printer?", 2)
+    cache.put("Cheapest printer?", 2, "The Epson one")
+
+    assert cache.get("Cheapest printer?", 1) is None
+    assert cache.get("Cheapest printer?", 2) == "The Epson one"
+    assert cache.invalidations == 0
@@ -1,9 +1,8 @@
 import streamlit as st
-import asyncio
 import json
 import uuid
 import httpx
-from typing import Dict
+from typing import Iterator
 
 # Page config
 st.set_page_config(
@@ -11,7 +10,7 @@ st.set_page_config(
 )
 
 # Constants
-LANGCHAIN_SERVER_URL = "http://localhost:8001/chat"
+LANGCHAIN_SERVER_URL = "http://localhost:8001/chat/stream"
 
 # Initialize session state
 if "messages" not in st.session_state:
@@ -21,20 +20,27 @@ if "session_id" not in st.session_state:
     st.session_state.session_id = str(uuid.uuid4())
 
 
-async def send_message(message: str) -> Dict:
-    """Send message to LangChain server"""
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.post(
-                LANGCHAIN_SERVER_URL,
-                json={"session_id": st.session_state.session_id, "message": message},
-                timeout=30.0,
-            )
+def stream_message(message: str) -> Iterator[str]:
+    """Send message to LangChain server and yield the answer as it arrives"""
+    try:
+        with httpx.stream(
+            "POST",
+            LANGCHAIN_SERVER_URL,
+            json={"session_id": st.session_state.session_id, "message": message},
+            timeout=30.0,
+        ) as response:
             response.raise_for_status()
-            return {"response": response.json()["message"]}
-        except Exception as e:
-            st.error(f"Connection error: {str(e)}")
-            return {"response": "Sorry, I'm having trouble connecting to the server."}
+            event = "message"
+            for line in response.iter_lines():
+                if line.startswith("event:"):
+                    event = line[len("event:") :].strip()
+                elif line.startswith("data:") and event == "message":
+                    yield json.loads(line[len("data:") :])["content"]
+                elif not line:
+                    event = "message"
+    except Exception as e:
+        st.error(f"Connection error: {str(e)}")
+        yield "Sorry, I'm having trouble connecting to the server."
 
 
 # UI Elements
@@ -57,8 +63,6 @@ if prompt := st.chat_input("Type your message here..."):
 
     # Get bot response
     with st.chat_message("assistant"):
-        response = asyncio.run(send_message(prompt))
-        st.session_state.messages.append(
-            {"role": "assistant", "content": response["response"]}
-        )
-        st.markdown(response["response"])
+        # Render the answer progressively as chunks arrive
+        response = st.write_stream(stream_message(prompt))
+        st.session_state.messages.append({"role": "assistant", "content": response})